@@ -1,7 +1,11 @@
 import json
+import math
+import queue
 import urllib.parse
 from http.server import BaseHTTPRequestHandler
-from datetime import datetime
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+from zoneinfo import ZoneInfoNotFoundError
 
 # Gunakan absolute imports
 import os
@@ -10,21 +14,76 @@ current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if current_dir not in sys.path:
     sys.path.insert(0, current_dir)
 
-from app.services.finance_manager import ExpertFinanceManager
+from app.services.fleet_aggregator import FleetAggregator
+from app.services.historical_view import HistoricalView
+from app.services.target_simulator import TargetSimulator
+from app.services.tenant_registry import TenantRegistry
 from app.utils.template_renderer import TemplateRenderer
 
 class ExpertFinanceAPIHandler(BaseHTTPRequestHandler):
-    def __init__(self, *args, finance_manager=None, **kwargs):
-        self.finance_manager = finance_manager or ExpertFinanceManager()
+    # Interval heartbeat SSE (detik) agar proxy tidak memutus koneksi idle
+    SSE_HEARTBEAT_INTERVAL = 15
+
+    # Prefix path untuk halaman & API milik satu driver: /d/<driver_id>/...
+    TENANT_PATH_PREFIX = '/d/'
+
+    def __init__(self, *args, finance_manager=None, tenant_registry=None, fleet_aggregator=None, **kwargs):
+        self.tenant_registry = tenant_registry or TenantRegistry(default_manager=finance_manager)
+        self.fleet_aggregator = fleet_aggregator or FleetAggregator(self.tenant_registry)
+        self.finance_manager = self.tenant_registry.get()
         self.template_renderer = TemplateRenderer(self.finance_manager)
+        # Driver yang manager-nya sedang dipakai request ini (dilepas di akhir request)
+        self.tenant_id: Optional[str] = None
         super().__init__(*args, **kwargs)
 
+    # Tulis eksplisit yang boleh membuat folder data untuk driver baru
+    TENANT_CREATING_PATHS = ('/api/add-order', '/api/update-config')
+    # Halaman HTML tidak butuh data driver, jadi tetap bisa dibuka driver baru untuk input order pertama
+    TENANT_PAGE_PATHS = ('/', '/dashboard', '/orders', '/history', '/targets')
+
+    def resolve_tenant(self, path: str) -> Optional[str]:
+        """Pilih manager driver dari prefix path atau header X-Driver-ID
+
+        Mengembalikan path tanpa prefix tenant, atau None jika driver ID tidak valid
+        (400) atau driver belum punya data (404); response error sudah dikirim.
+        """
+        driver_id = self.headers.get('X-Driver-ID')
+        base_path = ''
+        if path.startswith(self.TENANT_PATH_PREFIX):
+            driver_id, _, rest = path[len(self.TENANT_PATH_PREFIX):].partition('/')
+            base_path = self.TENANT_PATH_PREFIX + driver_id
+            path = '/' + rest
+
+        if not driver_id:
+            return path
+
+        try:
+            self.finance_manager = self.tenant_registry.get(
+                driver_id, create=self.command == 'POST' and path in self.TENANT_CREATING_PATHS
+            )
+        except ValueError as e:
+            self.send_error(400, str(e))
+            return None
+        except LookupError as e:
+            if self.command == 'GET' and path in self.TENANT_PAGE_PATHS:
+                self.finance_manager = None
+                self.template_renderer = TemplateRenderer(None, base_path)
+                return path
+            self.send_error(404, str(e))
+            return None
+        self.tenant_id = driver_id
+        self.template_renderer = TemplateRenderer(self.finance_manager, base_path)
+        return path
+
 
     def do_GET(self):
         """Handle GET requests"""
         try:
             parsed_path = urllib.parse.urlparse(self.path)
-            path = parsed_path.path
+            path = self.resolve_tenant(parsed_path.path)
+            if path is None:
+                return
+            self.query_params = urllib.parse.parse_qs(parsed_path.query)
 
             if path == '/' or path == '/dashboard':
                 self.serve_dashboard()
@@ -42,17 +101,41 @@ class ExpertFinanceAPIHandler(BaseHTTPRequestHandler):
                 self.serve_insights()
             elif path == '/api/config':
                 self.serve_config()
+            elif path == '/api/stream':
+                self.serve_event_stream()
+            elif path == '/api/aggregate':
+                self.serve_aggregate()
+            elif path == '/api/history-index':
+                self.serve_history_index()
+            elif path == '/api/range-summary':
+                self.serve_range_summary()
+            elif path == '/api/heatmap':
+                self.serve_heatmap()
+            elif path == '/api/compare':
+                self.serve_period_comparison()
+            elif path == '/api/hotspots':
+                self.serve_hotspots()
+            elif path == '/api/anomalies':
+                self.serve_anomalies()
+            elif path == '/api/simulate-targets':
+                self.serve_target_simulation()
+            elif path == '/api/fleet':
+                self.serve_fleet_summary()
             else:
                 self.send_error(404, "Endpoint not found")
         except Exception as e:
             print(f"❌ Error in do_GET: {e}")
             self.send_error(500, f"Internal server error: {str(e)}")
+        finally:
+            self.release_tenant()
 
     def do_POST(self):
         """Handle POST requests"""
         try:
             parsed_path = urllib.parse.urlparse(self.path)
-            path = parsed_path.path
+            path = self.resolve_tenant(parsed_path.path)
+            if path is None:
+                return
 
             if path == '/api/add-order':
                 self.add_order()
@@ -65,6 +148,12 @@ class ExpertFinanceAPIHandler(BaseHTTPRequestHandler):
         except Exception as e:
             print(f"❌ Error in do_POST: {e}")
             self.send_error(500, f"Internal server error: {str(e)}")
+        finally:
+            self.release_tenant()
+
+    def release_tenant(self):
+        self.tenant_registry.release(self.tenant_id)
+        self.tenant_id = None
 
     def serve_dashboard(self):
         """Serve the dashboard page"""
@@ -98,12 +187,43 @@ class ExpertFinanceAPIHandler(BaseHTTPRequestHandler):
         except Exception as e:
             self.send_error(500, f"Error generating targets page: {str(e)}")
 
+    def build_etag(self, time_sensitive: bool = False) -> str:
+        """ETag dari versi data & config; analytics juga bergantung pada jam saat ini"""
+        tag = self.finance_manager.get_version_tag()
+        if time_sensitive:
+            # Insight & metrik "hari ini" berubah seiring waktu walau data tetap
+            tag += datetime.now().strftime("-%Y%m%d%H")
+            # Output advisor diperbarui di background, setelah data berubah
+            tag += f"-a{self.finance_manager.advisor_sequence}"
+        return f'W/"{tag}"'
+
+    def is_not_modified(self, etag: str) -> bool:
+        """Kirim 304 jika If-None-Match cocok dengan ETag saat ini"""
+        if_none_match = self.headers.get('If-None-Match')
+        if not if_none_match:
+            return False
+
+        candidates = [candidate.strip() for candidate in if_none_match.split(',')]
+        if '*' not in candidates and etag not in candidates:
+            return False
+
+        self.send_response(304)
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        return True
+
     def serve_complete_data(self):
         """Serve complete data dengan analytics real-time"""
         try:
+            etag = self.build_etag(time_sensitive=True)
+            if self.is_not_modified(etag):
+                return
+
             data = self.finance_manager.get_all_data()
             analytics = self.finance_manager.get_real_time_analytics()
-            insights = self.finance_manager.get_performance_insights()
+            insights = analytics.get('ai_analysis', [])
 
             response = {
                 "success": True,
@@ -113,20 +233,55 @@ class ExpertFinanceAPIHandler(BaseHTTPRequestHandler):
                 "timestamp": datetime.now().isoformat()
             }
 
-            self.send_json_response(response)
+            self.send_json_response(response, etag=etag)
         except Exception as e:
             print(f"❌ Error serving complete data: {e}")
             self.send_error(500, f"Error serving data: {str(e)}")
 
+    def get_query_list(self, name: str) -> Optional[List[str]]:
+        """Ambil parameter query berformat `a,b,c` (boleh diulang) sebagai list"""
+        values = self.query_params.get(name)
+        if not values:
+            return None
+        return [item for value in values for item in value.split(',')]
+
     def serve_analytics(self):
         """Serve analytics data saja"""
         try:
-            analytics = self.finance_manager.get_real_time_analytics()
+            try:
+                fields = self.finance_manager.resolve_analytics_fields(self.get_query_list('fields'))
+                # Analytics seperti pada akhir tanggal tersebut (misal untuk rekonsiliasi)
+                as_of = self.parse_query_date('as_of')
+                # occurred: per tanggal order; entered: hanya order yang sudah dicatat s.d. akhir as_of
+                as_of_mode = self.get_query_value('as_of_mode', 'occurred')
+                if as_of_mode not in HistoricalView.MODES:
+                    raise ValueError(f"as_of_mode must be one of: {', '.join(HistoricalView.MODES)}")
+            except ValueError as e:
+                self.send_error(400, str(e))
+                return
+
+            # Tampilan historis tidak bergantung jam sekarang
+            etag = self.build_etag(time_sensitive=as_of is None or as_of >= date.today())
+            if self.is_not_modified(etag):
+                return
+
+            try:
+                max_points = self.parse_max_points()
+            except ValueError as e:
+                self.send_error(400, str(e))
+                return
+
+            analytics = self.finance_manager.get_real_time_analytics(
+                fields=fields, max_points=max_points, as_of=as_of, as_of_mode=as_of_mode
+            )
             response = {
                 "success": True,
                 "analytics": analytics
             }
-            self.send_json_response(response)
+            if as_of is not None:
+                response["as_of"] = as_of.isoformat()
+                response["as_of_mode"] = as_of_mode
+            self.send_json_response(response, etag=etag)
         except Exception as e:
             print(f"❌ Error serving analytics: {e}")
             self.send_error(500, f"Error serving analytics: {str(e)}")
@@ -134,12 +289,16 @@ class ExpertFinanceAPIHandler(BaseHTTPRequestHandler):
     def serve_insights(self):
         """Serve performance insights"""
         try:
+            etag = self.build_etag(time_sensitive=True)
+            if self.is_not_modified(etag):
+                return
+
             insights = self.finance_manager.get_performance_insights()
             response = {
                 "success": True,
                 "insights": insights
             }
-            self.send_json_response(response)
+            self.send_json_response(response, etag=etag)
         except Exception as e:
             print(f"❌ Error serving insights: {e}")
             self.send_error(500, f"Error serving insights: {str(e)}")
@@ -147,15 +306,297 @@ class ExpertFinanceAPIHandler(BaseHTTPRequestHandler):
     def serve_config(self):
         """Serve current configuration"""
         try:
+            etag = self.build_etag()
+            if self.is_not_modified(etag):
+                return
+
             response = {
                 "success": True,
                 "config": self.finance_manager.config
             }
-            self.send_json_response(response)
+            self.send_json_response(response, etag=etag)
         except Exception as e:
             print(f"❌ Error serving config: {e}")
             self.send_error(500, f"Error serving config: {str(e)}")
 
+    def get_query_value(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        values = self.query_params.get(name)
+        return values[0] if values else default
+
+    def parse_query_datetime(self, name: str, end_of_range: bool = False) -> Optional[datetime]:
+        """Parse YYYY-MM-DD atau ISO datetime; tanggal saja pada `to` berarti sampai akhir hari itu"""
+        value = self.get_query_value(name)
+        if not value:
+            return None
+        try:
+            if len(value) == 10:
+                moment = datetime.strptime(value, '%Y-%m-%d')
+                return moment + timedelta(days=1) if end_of_range else moment
+            return datetime.fromisoformat(value).replace(tzinfo=None)
+        except ValueError:
+            raise ValueError(f"Invalid '{name}' date: {value}")
+
+    def serve_aggregate(self):
+        """Serve agregasi per bucket waktu (hour/day/week/month)"""
+        try:
+            etag = self.build_etag()
+            if self.is_not_modified(etag):
+                return
+
+            try:
+                result = self.finance_manager.get_time_aggregates(
+                    bucket=self.get_query_value('bucket', 'day'),
+                    start=self.parse_query_datetime('from'),
+                    end=self.parse_query_datetime('to', end_of_range=True),
+                    timezone=self.get_query_value('tz'),
+                    order_type=self.get_query_value('order_type'),
+                    max_points=self.parse_max_points()
+                )
+            except (ValueError, ZoneInfoNotFoundError) as e:
+                self.send_error(400, str(e))
+                return
+
+            response = {"success": True}
+            response.update(result)
+            self.send_json_response(response, etag=etag)
+        except Exception as e:
+            print(f"❌ Error serving aggregate: {e}")
+            self.send_error(500, f"Error serving aggregate: {str(e)}")
+
+    def parse_max_points(self) -> Optional[int]:
+        """Batas jumlah titik chart (LTTB downsampling), minimal 3"""
+        value = self.get_query_value('max_points')
+        if not value:
+            return None
+        try:
+            max_points = int(value)
+        except ValueError:
+            raise ValueError(f"Invalid 'max_points': {value}")
+        if max_points < 3:
+            raise ValueError("'max_points' minimal 3")
+        return max_points
+
+    def parse_query_date(self, name: str) -> Optional[date]:
+        value = self.get_query_value(name)
+        if not value:
+            return None
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise ValueError(f"Invalid '{name}' date: {value}. Gunakan format YYYY-MM-DD")
+
+    def serve_history_index(self):
+        """Serve satu level riwayat: ?year=YYYY, ?month=YYYY-MM atau ?day=YYYY-MM-DD"""
+        try:
+            year = self.get_query_value('year')
+            month = self.get_query_value('month')
+            day = self.get_query_value('day')
+            try:
+                if year and not (len(year) == 4 and year.isdigit()):
+                    raise ValueError(f"Invalid 'year': {year}. Gunakan format YYYY")
+                if month:
+                    try:
+                        if len(month) != 7:
+                            raise ValueError
+                        datetime.strptime(month, '%Y-%m')
+                    except ValueError:
+                        raise ValueError(f"Invalid 'month': {month}. Gunakan format YYYY-MM")
+                day_date = self.parse_query_date('day')
+            except ValueError as e:
+                self.send_error(400, str(e))
+                return
+
+            etag = self.build_etag()
+            if self.is_not_modified(etag):
+                return
+
+            history = self.finance_manager.get_history_level(
+                year, month, day_date.isoformat() if day_date else None
+            )
+            self.send_json_response({"success": True, "history": history}, etag=etag)
+        except Exception as e:
+            print(f"❌ Error serving history index: {e}")
+            self.send_error(500, f"Error serving history index: {str(e)}")
+
+    def serve_range_summary(self):
+        """Serve total & progres target untuk rentang tanggal bebas"""
+        try:
+            etag = self.build_etag()
+            if self.is_not_modified(etag):
+                return
+
+            try:
+                summary = self.finance_manager.get_range_summary(
+                    self.parse_query_date('from'), self.parse_query_date('to')
+                )
+            except ValueError as e:
+                self.send_error(400, str(e))
+                return
+
+            self.send_json_response({"success": True, "summary": summary}, etag=etag)
+        except Exception as e:
+            print(f"❌ Error serving range summary: {e}")
+            self.send_error(500, f"Error serving range summary: {str(e)}")
+
+    def serve_heatmap(self):
+        """Serve heatmap earnings hari x jam (opsional per jenis order)"""
+        try:
+            etag = self.build_etag()
+            if self.is_not_modified(etag):
+                return
+
+            heatmap = self.finance_manager.get_heatmap(self.get_query_value('order_type'))
+            self.send_json_response({"success": True, "heatmap": heatmap}, etag=etag)
+        except Exception as e:
+            print(f"❌ Error serving heatmap: {e}")
+            self.send_error(500, f"Error serving heatmap: {str(e)}")
+
+    def serve_period_comparison(self):
+        """Serve perbandingan periode berjalan vs periode sebelumnya"""
+        try:
+            etag = self.build_etag(time_sensitive=True)
+            if self.is_not_modified(etag):
+                return
+
+            comparison = self.finance_manager.get_period_comparison()
+            self.send_json_response({"success": True, "comparison": comparison}, etag=etag)
+        except Exception as e:
+            print(f"❌ Error serving period comparison: {e}")
+            self.send_error(500, f"Error serving period comparison: {str(e)}")
+
+    def serve_hotspots(self):
+        """Serve jam & jenis order dengan pendapatan per jam aktif tertinggi"""
+        try:
+            try:
+                weekday = self.get_query_value('weekday')
+                weekday = int(weekday) if weekday not in (None, '') else None
+                top = int(self.get_query_value('top', '5'))
+            except ValueError:
+                self.send_error(400, "Parameter 'weekday' dan 'top' harus berupa angka")
+                return
+            if weekday is not None and not 0 <= weekday <= 6:
+                self.send_error(400, "Parameter 'weekday' harus 0 (Senin) sampai 6 (Minggu)")
+                return
+
+            etag = self.build_etag()
+            if self.is_not_modified(etag):
+                return
+
+            hotspots = self.finance_manager.get_hotspots(
+                weekday, self.get_query_value('order_type') or None, max(1, min(top, 24))
+            )
+            self.send_json_response({"success": True, "hotspots": hotspots}, etag=etag)
+        except Exception as e:
+            print(f"❌ Error serving hotspots: {e}")
+            self.send_error(500, f"Error serving hotspots: {str(e)}")
+
+    def serve_anomalies(self):
+        """Serve daftar order dengan nilai mencurigakan"""
+        try:
+            try:
+                limit = int(self.get_query_value('limit', '50'))
+            except ValueError:
+                self.send_error(400, "Parameter 'limit' harus berupa angka")
+                return
+
+            etag = self.build_etag()
+            if self.is_not_modified(etag):
+                return
+
+            result = self.finance_manager.get_anomalies(max(1, min(limit, 500)))
+            response = {"success": True}
+            response.update(result)
+            self.send_json_response(response, etag=etag)
+        except Exception as e:
+            print(f"❌ Error serving anomalies: {e}")
+            self.send_error(500, f"Error serving anomalies: {str(e)}")
+
+    def parse_query_number(self, name: str) -> Optional[float]:
+        value = self.get_query_value(name)
+        if value is None or value == '':
+            return None
+        try:
+            number = float(value)
+        except ValueError:
+            raise ValueError(f"Parameter '{name}' harus berupa angka")
+        if not math.isfinite(number) or number < 0:
+            raise ValueError(f"Parameter '{name}' tidak boleh negatif")
+        return number
+
+    def serve_target_simulation(self):
+        """Serve peluang mencapai target harian/mingguan (simulasi Monte Carlo)"""
+        try:
+            try:
+                daily_income = self.parse_query_number('daily_income')
+                weekly_orders = self.parse_query_number('weekly_orders')
+                trials = self.parse_query_number('trials')
+            except ValueError as e:
+                self.send_error(400, str(e))
+                return
+
+            etag = self.build_etag(time_sensitive=True)
+            if self.is_not_modified(etag):
+                return
+
+            simulation = self.finance_manager.simulate_targets(
+                daily_income, weekly_orders, int(trials) if trials else TargetSimulator.DEFAULT_TRIALS
+            )
+            self.send_json_response({"success": True, "simulation": simulation}, etag=etag)
+        except Exception as e:
+            print(f"❌ Error serving target simulation: {e}")
+            self.send_error(500, f"Error serving target simulation: {str(e)}")
+
+    def serve_fleet_summary(self):
+        """Serve agregat seluruh driver: total, leaderboard & komposisi jenis order"""
+        try:
+            try:
+                top = int(self.get_query_value('top', '10'))
+            except ValueError:
+                self.send_error(400, "Parameter 'top' harus berupa angka")
+                return
+            top = max(1, min(top, 100))
+
+            versions = self.fleet_aggregator.get_partition_versions()
+            etag = f'W/"fleet-{self.fleet_aggregator.get_version_tag(versions)}-t{top}"'
+            if self.is_not_modified(etag):
+                return
+
+            fleet = self.fleet_aggregator.get_fleet_summary(top, versions)
+            self.send_json_response({"success": True, "fleet": fleet}, etag=etag)
+        except Exception as e:
+            print(f"❌ Error serving fleet summary: {e}")
+            self.send_error(500, f"Error serving fleet summary: {str(e)}")
+
+    def serve_event_stream(self):
+        """Stream delta analytics via Server-Sent Events"""
+        broker = self.finance_manager.event_broker
+        subscriber = broker.subscribe()
+        try:
+            self.send_response(200)
+            self.send_header('Content-type', 'text/event-stream; charset=utf-8')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Connection', 'keep-alive')
+            self.send_header('X-Accel-Buffering', 'no')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+
+            self.wfile.write(b"retry: 5000\n\n")
+            self.send_sse_event("hello", {
+                "data_version": self.finance_manager.data_handler.data_version
+            })
+
+            while True:
+                try:
+                    event, data = subscriber.get(timeout=self.SSE_HEARTBEAT_INTERVAL)
+                    self.send_sse_event(event, data)
+                except queue.Empty:
+                    self.wfile.write(b": heartbeat\n\n")
+                    self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError, ConnectionAbortedError):
+            pass
+        finally:
+            broker.unsubscribe(subscriber)
+
     def add_order(self):
         """Handle adding new order"""
         try:
@@ -241,10 +682,19 @@ class ExpertFinanceAPIHandler(BaseHTTPRequestHandler):
         self.end_headers()
         self.wfile.write(content.encode('utf-8'))
 
-    def send_json_response(self, data: dict, status_code: int = 200):
+    def send_sse_event(self, event: str, data: dict):
+        """Write a single SSE frame"""
+        payload = json.dumps(data, ensure_ascii=False)
+        self.wfile.write(f"event: {event}\ndata: {payload}\n\n".encode('utf-8'))
+        self.wfile.flush()
+
+    def send_json_response(self, data: dict, status_code: int = 200, etag: Optional[str] = None):
         """Send JSON response"""
         self.send_response(status_code)
         self.send_header('Content-type', 'application/json')
         self.send_header('Access-Control-Allow-Origin', '*')
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
         self.end_headers()
         self.wfile.write(json.dumps(data, ensure_ascii=False).encode('utf-8'))
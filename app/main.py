@@ -5,7 +5,7 @@ Maxim Finance AI System - Main Application
 
 import os
 import sys
-from http.server import HTTPServer
+from http.server import ThreadingHTTPServer
 
 # ABSOLUTE IMPORTS - tambahkan path ke sys.path
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -15,25 +15,42 @@ if parent_dir not in sys.path:
 
 # Sekarang gunakan absolute imports
 from app.handlers.api_handler import ExpertFinanceAPIHandler
+from app.services.advisor_scheduler import AdvisorScheduler
 from app.services.finance_manager import ExpertFinanceManager
+from app.services.fleet_aggregator import FleetAggregator
+from app.services.tenant_registry import TenantRegistry
 
 def main():
     """Main function"""
     finance_manager = ExpertFinanceManager()
+    # Insight, tips & prediksi dihitung di background, request cukup membaca hasilnya
+    advisor_scheduler = AdvisorScheduler()
+    finance_manager.attach_advisor_scheduler(advisor_scheduler)
+    # Driver lain (multi-tenant) dimuat sesuai kebutuhan, maksimal MAX_LIVE_TENANTS di memori
+    tenant_registry = TenantRegistry(
+        max_live_tenants=int(os.getenv('MAX_LIVE_TENANTS', 100)),
+        default_manager=finance_manager,
+        advisor_scheduler=advisor_scheduler
+    )
+    fleet_aggregator = FleetAggregator(tenant_registry)
     
     def handler(*args):
-        ExpertFinanceAPIHandler(*args, finance_manager=finance_manager)
+        ExpertFinanceAPIHandler(*args, tenant_registry=tenant_registry, fleet_aggregator=fleet_aggregator)
     
     port = int(os.getenv('PORT', 8000))
     host = os.getenv('HOST', '0.0.0.0')
     
-    server = HTTPServer((host, port), handler)
+    # Threading server: koneksi SSE yang panjang tidak boleh memblokir request lain
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
     
     print(f"\n🚀 Maxim Finance AI System Started!")
     print(f"📍 Server running at: http://{host}:{port}")
     print("\n📊 Features:")
     print("   • Real-time Analytics & Visualizations")
     print("   • AI-powered Insights") 
+    print("   • Live Updates via Server-Sent Events")
+    print("   • Multi-driver Data (/d/<driver_id>/dashboard)")
     print("   • Professional UI/UX")
     print("   • Mobile Responsive Design")
     print("\n🎯 Built by: Kasih")
@@ -51,6 +68,8 @@ def main():
         print("\n🛑 AI Finance server stopped.")
     except Exception as e:
         print(f"❌ Error: {e}")
+    finally:
+        tenant_registry.flush_all()
 
 if __name__ == "__main__":
     main()
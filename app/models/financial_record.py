@@ -29,3 +29,18 @@ class FinancialRecord:
             'order_type': self.order_type,
             'custom_date': self.custom_date or ""
         }
+
+    def to_csv_row(self):
+        """Convert record to a CSV row in riwayat_orderan.csv column order"""
+        return [
+            self.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+            self.total_order,
+            self.commission,
+            self.saldo_savings,
+            self.bbm_savings,
+            self.oli_savings,
+            self.net_income,
+            self.usable_income,
+            self.order_type,
+            self.custom_date or ""
+        ]
@@ -1,5 +1,34 @@
 from .finance_manager import ExpertFinanceManager
 from .ai_advisor import AIFinanceAdvisor
 from .data_handler import DataHandler
+from .event_broker import EventBroker
+from .bulk_importer import BulkImporter
+from .rollup_store import RollupStore
+from .time_index import TimeIndex
+from .day_index import DayPrefixIndex
+from .analytics_engine import get_analytics_engine
+from .earnings_heatmap import EarningsHeatmap
+from .rolling_metrics import RollingMetrics
+from .order_value_sketches import OrderValueSketches
+from .tenant_registry import TenantRegistry
+from .fleet_aggregator import FleetAggregator
+from .chart_series import ChartSeries
+from .forecaster import HoltWintersForecaster
+from .backtester import run_backtests
+from .insight_rules import InsightRule, InsightRuleEngine, INSIGHT_RULES
+from .target_simulator import TargetSimulator
+from .anomaly_detector import AnomalyDetector
+from .advisor_scheduler import AdvisorScheduler
+from .hotspot_index import HotspotIndex
+from .time_hierarchy import TimeHierarchy
+from .entry_date_rollup import EntryDateRollup
 
-__all__ = ['ExpertFinanceManager', 'AIFinanceAdvisor', 'DataHandler']
+__all__ = [
+    'ExpertFinanceManager', 'AIFinanceAdvisor', 'DataHandler', 'EventBroker',
+    'BulkImporter', 'RollupStore', 'TimeIndex', 'DayPrefixIndex', 'get_analytics_engine',
+    'EarningsHeatmap', 'RollingMetrics', 'OrderValueSketches', 'TenantRegistry',
+    'FleetAggregator', 'ChartSeries', 'HoltWintersForecaster',
+    'run_backtests', 'InsightRule', 'InsightRuleEngine', 'INSIGHT_RULES',
+    'TargetSimulator', 'AnomalyDetector', 'AdvisorScheduler',
+    'HotspotIndex', 'TimeHierarchy', 'EntryDateRollup'
+]
@@ -0,0 +1,82 @@
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional
+
+class AdvisorScheduler:
+    """Satu worker thread yang menghitung ulang output advisor di background
+
+    Manager yang terdaftar dihitung ulang saat datanya berubah (`schedule`) dan
+    setiap pergantian jam, karena insight & tips bergantung pada jam saat ini.
+    Request cukup membaca hasil terakhir, tanpa pernah menunggu advisor.
+    """
+
+    def __init__(self):
+        # Manager yang di-evict dari TenantRegistry cukup hilang dari WeakSet
+        self._managers: "weakref.WeakSet" = weakref.WeakSet()
+        self._pending: "OrderedDict[int, object]" = OrderedDict()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def register(self, manager):
+        with self._condition:
+            self._managers.add(manager)
+        self.schedule(manager)
+
+    def unregister(self, manager):
+        with self._condition:
+            self._managers.discard(manager)
+            self._pending.pop(id(manager), None)
+
+    def schedule(self, manager):
+        """Minta hitung ulang; permintaan beruntun untuk manager sama digabung"""
+        with self._condition:
+            if self._closed:
+                return
+            self._pending[id(manager)] = manager
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.run, name="advisor-scheduler", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    @property
+    def pending_count(self) -> int:
+        with self._condition:
+            return len(self._pending)
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._pending.clear()
+            self._condition.notify()
+
+    @staticmethod
+    def seconds_until_next_hour() -> float:
+        now = datetime.now()
+        next_hour = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        return max((next_hour - now).total_seconds(), 0.0) + 0.5
+
+    def run(self):
+        deadline = time.monotonic() + self.seconds_until_next_hour()
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        # Pergantian jam: semua manager yang masih hidup dihitung ulang
+                        for manager in list(self._managers):
+                            self._pending[id(manager)] = manager
+                        deadline = time.monotonic() + self.seconds_until_next_hour()
+                        continue
+                    self._condition.wait(remaining)
+                if self._closed:
+                    return
+                _, manager = self._pending.popitem(last=False)
+
+            try:
+                manager.refresh_advisor_outputs()
+            except Exception as e:
+                print(f"❌ Error refreshing advisor outputs: {e}")
@@ -1,99 +1,94 @@
+import threading
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
+
+# Absolute imports
+import os
+import sys
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from app.services.insight_rules import INSIGHT_RULES, InsightRuleEngine
 
 class AIFinanceAdvisor:
     """AI Financial Advisor dengan analisis cerdas"""
     
+    def __init__(self):
+        self.insight_engine = InsightRuleEngine(INSIGHT_RULES)
+        self._insight_memo: Optional[Tuple[Any, List[Dict[str, Any]]]] = None
+        # Rule engine menyimpan hasil per group: worker advisor & request tulis tidak boleh bersamaan
+        self._lock = threading.Lock()
+
     @staticmethod
-    def analyze_performance(analytics_data: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Analisis performa dengan AI"""
+    def extract_insight_metrics(analytics_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Metric input aturan insight dari section analytics"""
         summary = analytics_data['summary']
         time_metrics = analytics_data['time_metrics']
-        
-        insights = []
-        
-        efficiency = summary['efficiency_ratio']
-        if efficiency > 75:
-            insights.append({
-                "type": "success",
-                "icon": "🚀",
-                "title": "Efisiensi Elite",
-                "message": f"Efisiensi {efficiency:.1f}% - Performa luar biasa!",
-                "priority": "high"
-            })
-        elif efficiency > 60:
-            insights.append({
-                "type": "success", 
-                "icon": "⭐",
-                "title": "Efisiensi Optimal",
-                "message": f"Efisiensi {efficiency:.1f}% - Pertahankan!",
-                "priority": "medium"
-            })
-        elif efficiency < 40:
-            insights.append({
-                "type": "warning",
-                "icon": "⚡",
-                "title": "Butuh Optimasi",
-                "message": f"Efisiensi {efficiency:.1f}% - Perlu evaluasi strategi",
-                "priority": "high"
-            })
-        
-        daily_data = analytics_data['daily_analytics']
-        if len(daily_data) >= 3:
-            dates = sorted(daily_data.keys())[-3:]
-            revenues = [daily_data[date]['revenue'] for date in dates]
-            
-            if len(revenues) >= 2:
+        metrics: Dict[str, Any] = {"efficiency": summary['efficiency_ratio']}
+
+        # Manager mengirim perbandingan periode (kemarin sampai jam yang sama);
+        # tanpa itu dipakai dua tanggal tercatat terakhir
+        trend = None
+        if 'period_comparison' in analytics_data:
+            day = analytics_data['period_comparison']['day']
+            # Kemarin belum ada order sampai jam ini (misal driver baru): tidak ada pembanding
+            if day['previous']['orders'] > 0:
+                trend = day['change']['revenue']
+        else:
+            if 'recent_revenues' in analytics_data:
+                day_count = analytics_data['daily_count']
+                revenues = analytics_data['recent_revenues']
+            else:
+                daily_data = analytics_data['daily_analytics']
+                day_count = len(daily_data)
+                revenues = [daily_data[date]['revenue'] for date in sorted(daily_data.keys())[-2:]]
+            if day_count >= 3 and len(revenues) >= 2:
                 trend = revenues[-1] - revenues[-2]
-                if trend > 0:
-                    insights.append({
-                        "type": "success",
-                        "icon": "📈",
-                        "title": "Trend Positif",
-                        "message": f"Revenue naik {trend:,.0f} dari hari sebelumnya",
-                        "priority": "medium"
-                    })
-                elif trend < 0:
-                    insights.append({
-                        "type": "warning",
-                        "icon": "📉",
-                        "title": "Trend Menurun",
-                        "message": f"Revenue turun {abs(trend):,.0f} dari hari sebelumnya",
-                        "priority": "high"
-                    })
-        
-        order_analytics = analytics_data['order_analytics']
-        if order_analytics:
-            valid_order_types = {k: v for k, v in order_analytics.items() if v.get('count', 0) > 0}
-            if valid_order_types:
-                best_type = max(valid_order_types.items(), key=lambda x: x[1].get('avg_value', 0))
-                worst_type = min(valid_order_types.items(), key=lambda x: x[1].get('avg_value', 0))
-                
-                if best_type[1].get('avg_value', 0) > worst_type[1].get('avg_value', 0) * 1.5:
-                    insights.append({
-                        "type": "info",
-                        "icon": "🎯",
-                        "title": "Fokus Optimal",
-                        "message": f"{best_type[0]} menghasilkan {best_type[1]['avg_value']:,.0f}/order",
-                        "priority": "medium"
-                    })
-        
+        if trend is not None:
+            metrics["revenue_trend"] = trend
+            metrics["revenue_trend_abs"] = abs(trend)
+
+        valid_order_types = {k: v for k, v in analytics_data['order_analytics'].items() if v.get('count', 0) > 0}
+        if valid_order_types:
+            best_type = max(valid_order_types.items(), key=lambda x: x[1].get('avg_value', 0))
+            worst_type = min(valid_order_types.items(), key=lambda x: x[1].get('avg_value', 0))
+            metrics["best_type"] = best_type[0]
+            metrics["best_type_avg"] = best_type[1].get('avg_value', 0)
+            metrics["best_type_margin"] = best_type[1].get('avg_value', 0) - worst_type[1].get('avg_value', 0) * 1.5
+
         today_revenue = time_metrics['today_revenue']
         if today_revenue > 0:
-            time_now = datetime.now().hour
+            # `now` diisi untuk analytics "as of" tanggal lampau
+            time_now = (analytics_data.get('now') or datetime.now()).hour
             expected_revenue = (today_revenue / time_now) * 12 if time_now > 0 else 0
-            
-            if expected_revenue > today_revenue * 1.2:
-                insights.append({
-                    "type": "success",
-                    "icon": "🎉",
-                    "title": "Performa Cemerlang",
-                    "message": f"Diperkirakan {expected_revenue:,.0f} hari ini",
-                    "priority": "medium"
-                })
-        
-        insights.sort(key=lambda x: {'high': 0, 'medium': 1, 'low': 2}[x['priority']])
-        return insights[:5]
+            metrics["expected_revenue"] = expected_revenue
+            metrics["today_projection_margin"] = expected_revenue - today_revenue * 1.2
+
+        return metrics
+
+    def analyze_performance(self, analytics_data: Dict[str, Any], version: Optional[Any] = None) -> List[Dict[str, Any]]:
+        """Analisis performa dengan AI
+
+        Insight berasal dari aturan deklaratif (`INSIGHT_RULES`); hanya aturan yang
+        metric-nya berubah yang dievaluasi ulang. Dengan `version` (versi data + jam),
+        hasil untuk versi yang sama langsung dipakai ulang.
+        """
+        metrics = self.extract_insight_metrics(analytics_data)
+        with self._lock:
+            cached = self.get_cached_insights(version)
+            if cached is not None:
+                return cached
+
+            insights = self.insight_engine.evaluate(metrics)
+            if version is not None:
+                self._insight_memo = (version, insights)
+            return [dict(insight) for insight in insights]
+
+    def get_cached_insights(self, version: Optional[Any]) -> Optional[List[Dict[str, Any]]]:
+        if version is None or not self._insight_memo or self._insight_memo[0] != version:
+            return None
+        return [dict(insight) for insight in self._insight_memo[1]]
 
     @staticmethod
     def generate_financial_tips(analytics_data: Dict[str, Any]) -> List[str]:
@@ -113,17 +108,87 @@ class AIFinanceAdvisor:
         elif summary['efficiency_ratio'] > 70:
             tips.append("💰 **Strategi Solid**: Pertahankan model bisnis current")
         
-        current_hour = datetime.now().hour
-        if 7 <= current_hour <= 9:
+        now = analytics_data.get('now') or datetime.now()
+        best_hours = AIFinanceAdvisor.find_best_hours(analytics_data.get('heatmap'), now.weekday())
+        if best_hours:
+            # Jam terbaik dari data driver sendiri, bukan tebakan jam sibuk umum
+            hours_text = ", ".join(f"{hour:02d}:00" for hour in best_hours)
+            if now.hour in best_hours:
+                tips.append(f"⏰ **Jam Emas Sekarang**: Jam ini termasuk jam terbaik Anda ({hours_text})")
+            else:
+                tips.append(f"⏰ **Jam Terbaik Hari Ini**: Revenue Anda paling tinggi sekitar {hours_text}")
+        elif 7 <= now.hour <= 9:
             tips.append("⏰ **Morning Rush**: Fokus pada jam sibuk pagi")
-        elif 16 <= current_hour <= 19:
+        elif 16 <= now.hour <= 19:
             tips.append("⏰ **Evening Peak**: Manfaatkan jam pulang kerja")
         
         return tips
 
     @staticmethod
-    def predict_earnings(analytics_data: Dict[str, Any], days: int = 7) -> Dict[str, Any]:
-        """Prediksi earnings berdasarkan historical data"""
+    def find_best_hours(heatmap: Optional[Dict[str, Any]], weekday: int, top: int = 3,
+                        min_orders: int = 10) -> List[int]:
+        """Jam dengan revenue tertinggi untuk hari `weekday` dari heatmap 7x24"""
+        if not heatmap:
+            return []
+
+        revenue_row = heatmap['revenue'][weekday]
+        orders_row = heatmap['orders'][weekday]
+        if sum(orders_row) < min_orders:
+            # Data hari ini terlalu sedikit: pakai total semua hari
+            revenue_row = [sum(day[hour] for day in heatmap['revenue']) for hour in range(24)]
+            orders_row = [sum(day[hour] for day in heatmap['orders']) for hour in range(24)]
+            if sum(orders_row) < min_orders:
+                return []
+
+        ranked = sorted((hour for hour in range(24) if orders_row[hour] > 0),
+                        key=lambda hour: revenue_row[hour], reverse=True)
+        return sorted(ranked[:top])
+
+    @staticmethod
+    def recommend_hotspots(matrix: Dict[str, List[List[float]]], type_totals: Dict[str, Dict[str, float]],
+                           weekday: Optional[int] = None, top: int = 5, min_orders: int = 5) -> Dict[str, Any]:
+        """Jam & jenis order dengan pendapatan per jam kerja aktif tertinggi
+
+        `matrix` berisi revenue, orders & active_minutes 7x24 dari HotspotIndex; tanpa
+        `weekday` semua hari dijumlahkan per jam. Biaya tetap (168 sel), tidak bergantung riwayat.
+        """
+        def describe(revenue: float, orders: int, minutes: float) -> Dict[str, Any]:
+            return {
+                "earnings_per_hour": revenue / minutes * 60 if minutes > 0 else 0,
+                "orders": orders,
+                "avg_value": revenue / orders if orders > 0 else 0,
+                "avg_gap_minutes": minutes / orders if orders > 0 else 0
+            }
+
+        rows = [weekday] if weekday is not None else range(7)
+        hours = []
+        for hour in range(24):
+            orders = sum(matrix["orders"][row][hour] for row in rows)
+            if orders < min_orders:
+                continue
+            revenue = sum(matrix["revenue"][row][hour] for row in rows)
+            minutes = sum(matrix["active_minutes"][row][hour] for row in rows)
+            hours.append(dict(describe(revenue, orders, minutes), hour=hour))
+        hours.sort(key=lambda item: item["earnings_per_hour"], reverse=True)
+
+        order_types = [
+            dict(describe(totals["revenue"], totals["orders"], totals["active_minutes"]), order_type=order_type)
+            for order_type, totals in type_totals.items() if totals["orders"] >= min_orders
+        ]
+        order_types.sort(key=lambda item: item["earnings_per_hour"], reverse=True)
+
+        return {"weekday": weekday, "hours": hours[:top], "order_types": order_types[:top]}
+
+    @staticmethod
+    def predict_earnings(analytics_data: Dict[str, Any], days: int = 7, forecaster: Optional[Any] = None) -> Dict[str, Any]:
+        """Prediksi earnings berdasarkan historical data
+
+        Dengan `forecaster` (Holt-Winters incremental) hasilnya berisi interval prediksi;
+        tanpa itu dipakai model lama: rata-rata 7 hari terakhir dikali `days`.
+        """
+        if forecaster is not None:
+            return forecaster.forecast(days)
+
         daily_data = analytics_data['daily_analytics']
         if len(daily_data) < 3:
             return {"prediction": 0, "confidence": "low", "daily_average": 0}
@@ -0,0 +1,147 @@
+from typing import Dict, Any, List
+
+try:
+    import numpy as np
+except ImportError:  # numpy ikut terpasang bersama pandas, tapi tetap opsional
+    np = None
+
+class PythonAnalyticsEngine:
+    """Engine default: agregasi record satu per satu"""
+
+    name = "python"
+
+    def accumulate(self, rollups: Any, records: List[Dict[str, Any]]):
+        for record in records:
+            rollups.add(record)
+
+class NumpyAnalyticsEngine:
+    """Engine vektor: kolom NumPy + bincount per bucket
+
+    Hasilnya identik dengan PythonAnalyticsEngine: nilai bucket yang sudah ada
+    dimasukkan di depan bobot bincount, sehingga urutan penjumlahan per bucket
+    sama persis dengan penjumlahan record satu per satu.
+    """
+
+    name = "numpy"
+
+    COLUMNS = {
+        "revenue": "total_order",
+        "income": "usable_income",
+        "commission": "commission",
+        "saldo_savings": "saldo_savings",
+        "bbm_savings": "bbm_savings",
+        "oli_savings": "oli_savings",
+        "net_income": "net_income"
+    }
+
+    def factorize(self, values: Any):
+        """Kode integer per nilai dengan urutan kemunculan pertama (seperti insertion order dict)"""
+        uniques, first_index, inverse = np.unique(np.asarray(values), return_index=True, return_inverse=True)
+        order = np.argsort(first_index, kind='stable')
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        return rank[inverse.ravel()], uniques[order]
+
+    def first_appearance(self, codes):
+        uniques, first_index = np.unique(codes, return_index=True)
+        return uniques[np.argsort(first_index, kind='stable')]
+
+    def sequential_sum(self, existing: List[float], codes, weights, size: int):
+        """bincount dengan nilai awal: existing[i] dijumlahkan lebih dulu ke bucket i"""
+        indices = np.concatenate([np.arange(size), codes])
+        values = np.concatenate([np.asarray(existing, dtype=float), weights])
+        return np.bincount(indices, weights=values, minlength=size)
+
+    def accumulate_buckets(self, rollups: Any, buckets: Dict[str, Dict[str, Any]], names: List[str],
+                           codes, columns: Dict[str, Any], type_codes, type_names: List[str]):
+        size = len(names)
+        for code in self.first_appearance(codes):
+            if names[code] not in buckets:
+                buckets[names[code]] = rollups.empty_bucket()
+        targets = [buckets[name] for name in names]
+
+        for field, weights in columns.items():
+            sums = self.sequential_sum([bucket[field] for bucket in targets], codes, weights, size)
+            for bucket, value in zip(targets, sums):
+                bucket[field] = float(value)
+
+        counts = np.bincount(codes, minlength=size)
+        for bucket, count in zip(targets, counts):
+            bucket["orders"] += int(count)
+
+        # Per jenis order di dalam bucket
+        type_count = len(type_names)
+        compact_codes, pairs = self.factorize(codes * type_count + type_codes)
+        pair_targets = []
+        for pair in pairs.tolist():
+            bucket = targets[pair // type_count]
+            pair_targets.append(bucket["by_type"].setdefault(
+                type_names[pair % type_count], {"count": 0, "revenue": 0}
+            ))
+
+        revenue = self.sequential_sum([target["revenue"] for target in pair_targets], compact_codes,
+                                      columns["revenue"], len(pair_targets))
+        pair_counts = np.bincount(compact_codes, minlength=len(pair_targets))
+        for target, value, count in zip(pair_targets, revenue, pair_counts):
+            target["revenue"] = float(value)
+            target["count"] += int(count)
+
+    def accumulate(self, rollups: Any, records: List[Dict[str, Any]]):
+        if not records:
+            return
+        size = len(records)
+
+        columns = {
+            field: np.fromiter((record[key] for record in records), dtype=float, count=size)
+            for field, key in self.COLUMNS.items()
+        }
+        # Sama dengan urutan operasi di RollupStore.apply: (saldo + bbm) + oli
+        columns["savings"] = columns["saldo_savings"] + columns["bbm_savings"] + columns["oli_savings"]
+
+        day_codes, day_names = self.factorize([record['display_date'] for record in records])
+        type_codes, type_names = self.factorize([record['order_type'] for record in records])
+        type_names = type_names.tolist()
+
+        # Key week/month cukup dihitung sekali per hari unik
+        level_keys = [rollups.bucket_keys(day) for day in day_names.tolist()]
+        for level in rollups.LEVELS:
+            level_codes_per_day, level_names = self.factorize([keys[level] for keys in level_keys])
+            codes = level_codes_per_day[day_codes]
+            level_names = level_names.tolist()
+            self.accumulate_buckets(rollups, rollups.levels[level], level_names, codes,
+                                    columns, type_codes, type_names)
+            for key in level_names:
+                rollups.mark_dirty(level, key)
+
+        totals = {"total": rollups.totals}
+        self.accumulate_buckets(rollups, totals, ["total"], np.zeros(size, dtype=np.int64),
+                                columns, type_codes, type_names)
+
+class AutoAnalyticsEngine:
+    """Pilih engine per batch: NumPy hanya menguntungkan di atas jumlah baris tertentu"""
+
+    name = "auto"
+
+    # Titik crossover dari benchmark_analytics.py
+    NUMPY_MIN_ROWS = 500
+
+    def __init__(self):
+        self.python_engine = PythonAnalyticsEngine()
+        self.numpy_engine = NumpyAnalyticsEngine() if np is not None else None
+
+    def accumulate(self, rollups: Any, records: List[Dict[str, Any]]):
+        if self.numpy_engine is not None and len(records) >= self.NUMPY_MIN_ROWS:
+            self.numpy_engine.accumulate(rollups, records)
+        else:
+            self.python_engine.accumulate(rollups, records)
+
+def get_analytics_engine(name: str = "auto"):
+    """Buat engine dari nama di config (`analytics_engine`)"""
+    if name == "numpy":
+        if np is None:
+            print("⚠️ NumPy tidak tersedia, memakai engine python")
+            return PythonAnalyticsEngine()
+        return NumpyAnalyticsEngine()
+    if name == "python":
+        return PythonAnalyticsEngine()
+    return AutoAnalyticsEngine()
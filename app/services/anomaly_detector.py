@@ -0,0 +1,139 @@
+import json
+import math
+import os
+from collections import deque
+from typing import Dict, Any, List, Optional, Tuple
+
+# Absolute imports
+import sys
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from app.utils.helpers import get_record_datetime
+
+class AnomalyDetector:
+    """Deteksi online nilai order mencurigakan (misal kelebihan satu nol)
+
+    Per (jenis order, jam), per jenis order, dan global disimpan EWMA dari
+    log(total_order) beserta EWMA deviasi absolutnya. Skor = robust z-score
+    terhadap level paling spesifik yang datanya cukup. Update O(1) per order.
+    Nilai yang masuk statistik di-winsorize ke mean ± Z_THRESHOLD·scale: satu
+    salah ketik hanya menggeser baseline sedikit, tapi pergeseran level yang
+    bertahan (misal tarif naik) tetap terkejar setelah beberapa order.
+    """
+
+    ALPHA = 0.05
+    MIN_COUNT = 20
+    Z_THRESHOLD = 3.5
+    MIN_SCALE = 0.1  # batas bawah deviasi (log), hindari z meledak pada nilai yang selalu sama
+    MAX_FLAGGED = 500
+
+    def __init__(self, rollup_dir: str = 'data/rollups'):
+        self.rollup_dir = rollup_dir
+        self.reset()
+
+    def reset(self):
+        # key "type|hour", "type|*", "*|*" -> [count, mean, mad]
+        self.stats: Dict[str, List[float]] = {}
+        self.flagged: deque = deque(maxlen=self.MAX_FLAGGED)
+
+    def keys(self, record: Dict[str, Any]) -> Tuple[str, str, str]:
+        hour = get_record_datetime(record).hour
+        order_type = record['order_type']
+        return f"{order_type}|{hour}", f"{order_type}|*", "*|*"
+
+    def score(self, record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Hasil penilaian satu order (tanpa mengubah state); None jika data pembanding belum cukup"""
+        value = record['total_order']
+        if value <= 0:
+            return None
+
+        log_value = math.log(value)
+        for key in self.keys(record):
+            stats = self.stats.get(key)
+            if stats is None or stats[0] < self.MIN_COUNT:
+                continue
+            _, mean, mad = stats
+            z_score = (log_value - mean) / (1.4826 * max(mad, self.MIN_SCALE))
+            return {
+                "baseline": key,
+                "expected": math.exp(mean),
+                "z_score": z_score,
+                "ratio": value / math.exp(mean),
+                "is_anomaly": abs(z_score) > self.Z_THRESHOLD
+            }
+        return None
+
+    def update(self, key: str, log_value: float):
+        stats = self.stats.get(key)
+        if stats is None:
+            self.stats[key] = [1, log_value, 0.0]
+            return
+        count, mean, mad = stats
+        if count >= self.MIN_COUNT:
+            limit = self.Z_THRESHOLD * 1.4826 * max(mad, self.MIN_SCALE)
+            log_value = min(max(log_value, mean - limit), mean + limit)
+        # Awal seri: rata-rata biasa supaya tidak bias ke nilai pertama
+        alpha = max(self.ALPHA, 1.0 / (count + 1))
+        deviation = abs(log_value - mean)
+        stats[0] = count + 1
+        stats[1] = mean + alpha * (log_value - mean)
+        stats[2] = mad + alpha * (deviation - mad)
+
+    def add(self, record: Dict[str, Any]):
+        result = self.score(record)
+        if result and result["is_anomaly"]:
+            self.flagged.append({
+                "timestamp": record['timestamp'],
+                "display_date": record['display_date'],
+                "order_type": record['order_type'],
+                "total_order": record['total_order'],
+                "expected": result["expected"],
+                "ratio": result["ratio"],
+                "z_score": result["z_score"],
+                "baseline": result["baseline"]
+            })
+        if record['total_order'] <= 0:
+            return
+
+        log_value = math.log(record['total_order'])
+        for key in self.keys(record):
+            self.update(key, log_value)
+
+    def remove(self, record: Dict[str, Any]):
+        """Order dihapus: buang dari daftar anomali; statistik EWMA meluruh sendiri"""
+        for item in self.flagged:
+            if (item["timestamp"] == record['timestamp'] and item["total_order"] == record['total_order']
+                    and item["order_type"] == record['order_type']):
+                self.flagged.remove(item)
+                break
+
+    @property
+    def state_file(self) -> str:
+        return os.path.join(self.rollup_dir, "anomalies.json")
+
+    def flush(self, signature: Dict[str, Any]):
+        os.makedirs(self.rollup_dir, exist_ok=True)
+        payload = {"signature": signature, "stats": self.stats, "flagged": list(self.flagged)}
+        temp_path = self.state_file + '.tmp'
+        with open(temp_path, 'w') as file:
+            json.dump(payload, file, separators=(',', ':'))
+        os.replace(temp_path, self.state_file)
+
+    def restore(self, signature: Dict[str, Any]) -> bool:
+        try:
+            with open(self.state_file, 'r') as file:
+                payload = json.load(file)
+        except (OSError, ValueError):
+            return False
+        if payload.get("signature") != signature:
+            return False
+
+        self.stats = payload["stats"]
+        self.flagged = deque(payload["flagged"], maxlen=self.MAX_FLAGGED)
+        return True
+
+    def get_anomalies(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Anomali terbaru lebih dulu"""
+        return list(reversed(self.flagged))[:limit]
@@ -0,0 +1,161 @@
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import Dict, Any, Optional, Sequence
+
+# Absolute imports
+import sys
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from app.services.ai_advisor import AIFinanceAdvisor
+from app.services.data_handler import DataHandler
+from app.services.forecaster import HoltWintersForecaster
+
+class AverageModel:
+    """Model lama `predict_earnings`: rata-rata 7 hari tercatat terakhir x horizon"""
+
+    name = "average"
+
+    def __init__(self):
+        self.daily_analytics: Dict[str, Dict[str, float]] = {}
+
+    def observe(self, ordinal: int, revenue: float, orders: int):
+        # Model lama hanya melihat hari yang punya order
+        if orders > 0:
+            self.daily_analytics[date.fromordinal(ordinal).isoformat()] = {"revenue": revenue, "orders": orders}
+
+    def predict(self, horizon: int) -> Dict[str, Any]:
+        return AIFinanceAdvisor.predict_earnings({"daily_analytics": self.daily_analytics}, days=horizon)
+
+class HoltWintersModel:
+    """Forecaster Holt-Winters incremental, dilipat satu hari per cutoff"""
+
+    name = "holt_winters"
+
+    def __init__(self):
+        self.forecaster = HoltWintersForecaster()
+
+    def observe(self, ordinal: int, revenue: float, orders: int):
+        self.forecaster.fold(ordinal, revenue)
+
+    def predict(self, horizon: int) -> Dict[str, Any]:
+        return AIFinanceAdvisor.predict_earnings({}, days=horizon, forecaster=self.forecaster)
+
+MODELS = {model.name: model for model in (AverageModel, HoltWintersModel)}
+
+def load_daily_series(csv_path: str) -> Dict[str, Any]:
+    """Revenue & order per hari (hari kosong = 0) dari CSV riwayat order"""
+    revenue: Dict[int, float] = defaultdict(float)
+    orders: Dict[int, int] = defaultdict(int)
+    for record in DataHandler(data_file=csv_path, config_file=os.devnull).iter_records():
+        ordinal = date.fromisoformat(record['display_date']).toordinal()
+        revenue[ordinal] += record['total_order']
+        orders[ordinal] += 1
+
+    if not revenue:
+        return {"origin": None, "revenue": [], "orders": []}
+    origin, last = min(revenue), max(revenue)
+    return {
+        "origin": origin,
+        "revenue": [revenue.get(ordinal, 0.0) for ordinal in range(origin, last + 1)],
+        "orders": [orders.get(ordinal, 0) for ordinal in range(origin, last + 1)]
+    }
+
+def backtest_series(series: Dict[str, Any], models: Sequence[str], horizon: int = 7,
+                    min_history: int = 14) -> Dict[str, Dict[str, Any]]:
+    """Replay riwayat hari per hari; di setiap cutoff tiap model memprediksi `horizon` hari ke depan"""
+    origin, revenue, orders = series["origin"], series["revenue"], series["orders"]
+    instances = [MODELS[name]() for name in models]
+    stats = {
+        name: {"predictions": 0, "abs_error": 0.0, "ape_sum": 0.0, "ape_count": 0,
+               "intervals": 0, "covered_80": 0, "seconds": 0.0}
+        for name in models
+    }
+
+    for cutoff in range(len(revenue)):
+        if cutoff >= min_history and cutoff + horizon <= len(revenue):
+            actual = sum(revenue[cutoff:cutoff + horizon])
+            for model in instances:
+                started = time.perf_counter()
+                result = model.predict(horizon)
+                elapsed = time.perf_counter() - started
+
+                model_stats = stats[model.name]
+                model_stats["seconds"] += elapsed
+                model_stats["predictions"] += 1
+                error = abs(result["prediction"] - actual)
+                model_stats["abs_error"] += error
+                if actual > 0:
+                    model_stats["ape_sum"] += error / actual
+                    model_stats["ape_count"] += 1
+                interval = result.get("intervals", {}).get("80")
+                if interval:
+                    model_stats["intervals"] += 1
+                    if interval["low"] <= actual <= interval["high"]:
+                        model_stats["covered_80"] += 1
+
+        # Hari `cutoff` ditutup; biaya update ikut dihitung sebagai biaya model
+        for model in instances:
+            started = time.perf_counter()
+            model.observe(origin + cutoff, revenue[cutoff], orders[cutoff])
+            stats[model.name]["seconds"] += time.perf_counter() - started
+
+    return stats
+
+def backtest_driver(csv_path: str, models: Sequence[str], horizon: int = 7, min_history: int = 14) -> Dict[str, Any]:
+    """Backtest satu file CSV (fungsi top-level agar bisa dijalankan di worker process)"""
+    series = load_daily_series(csv_path)
+    return {
+        "source": csv_path,
+        "days": len(series["revenue"]),
+        "stats": backtest_series(series, models, horizon, min_history)
+    }
+
+def summarize(stats: Dict[str, Any]) -> Dict[str, Any]:
+    predictions = stats["predictions"]
+    return {
+        "predictions": predictions,
+        "mae": stats["abs_error"] / predictions if predictions else None,
+        "mape": stats["ape_sum"] / stats["ape_count"] * 100 if stats["ape_count"] else None,
+        "coverage_80": stats["covered_80"] / stats["intervals"] * 100 if stats["intervals"] else None,
+        "us_per_prediction": stats["seconds"] / predictions * 1e6 if predictions else None
+    }
+
+def run_backtests(csv_paths: Sequence[str], models: Optional[Sequence[str]] = None, horizon: int = 7,
+                  min_history: int = 14, workers: Optional[int] = None) -> Dict[str, Any]:
+    """Backtest banyak driver paralel di beberapa core, lalu gabungkan per model"""
+    models = list(models or MODELS)
+    unknown = [name for name in models if name not in MODELS]
+    if unknown:
+        raise ValueError(f"Unknown model: {', '.join(unknown)}")
+
+    count = len(csv_paths)
+    args = ([models] * count, [horizon] * count, [min_history] * count)
+    if workers == 1 or count <= 1:
+        drivers = [backtest_driver(path, *rest) for path, *rest in zip(csv_paths, *args)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            drivers = list(pool.map(backtest_driver, csv_paths, *args))
+
+    combined = {}
+    for name in models:
+        totals = {"predictions": 0, "abs_error": 0.0, "ape_sum": 0.0, "ape_count": 0,
+                  "intervals": 0, "covered_80": 0, "seconds": 0.0}
+        for driver in drivers:
+            for key, value in driver["stats"][name].items():
+                totals[key] += value
+        combined[name] = summarize(totals)
+
+    return {
+        "horizon": horizon,
+        "models": combined,
+        "drivers": [
+            {"source": driver["source"], "days": driver["days"],
+             "models": {name: summarize(stats) for name, stats in driver["stats"].items()}}
+            for driver in drivers
+        ]
+    }
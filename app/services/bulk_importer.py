@@ -0,0 +1,256 @@
+import csv
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+# Absolute imports
+import sys
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from app.services.finance_manager import ExpertFinanceManager
+
+class BulkImporter:
+    """Import riwayat order dalam jumlah besar (CSV / NDJSON) secara streaming"""
+
+    # Nama kolom yang diterima untuk tiap field, termasuk header CSV aplikasi sendiri
+    FIELD_ALIASES = {
+        "total_order": ("total_order", "Total Orderan", "total", "amount"),
+        "order_type": ("order_type", "Jenis Orderan", "type"),
+        "custom_date": ("custom_date", "Tanggal Custom", "date"),
+        "timestamp": ("timestamp", "Tanggal & Jam", "datetime")
+    }
+
+    def __init__(self, finance_manager: ExpertFinanceManager, batch_size: int = 5000,
+                 checkpoint_file: Optional[str] = None, progress_interval: float = 2.0):
+        self.finance_manager = finance_manager
+        self.data_handler = finance_manager.data_handler
+        self.batch_size = batch_size
+        self.checkpoint_file = checkpoint_file
+        self.progress_interval = progress_interval
+
+    def detect_format(self, source: str) -> str:
+        """Tebak format dari ekstensi file"""
+        extension = os.path.splitext(source)[1].lower()
+        return "ndjson" if extension in (".ndjson", ".jsonl") else "csv"
+
+    def iter_rows(self, source: str, file_format: str) -> Iterator[Tuple[Dict[str, Any], Optional[str]]]:
+        """Baca baris input satu per satu tanpa memuat seluruh file
+
+        Menghasilkan (row, error); baris NDJSON yang rusak diberi error agar
+        ditolak per baris, bukan menghentikan seluruh import.
+        """
+        with open(source, 'r', encoding='utf-8-sig', newline='') as file:
+            if file_format == "ndjson":
+                for line in file:
+                    line = line.strip()
+                    if not line:
+                        yield {}, None
+                        continue
+                    try:
+                        row = json.loads(line)
+                    except ValueError as e:
+                        yield {}, f"Invalid JSON: {e}"
+                        continue
+                    if not isinstance(row, dict):
+                        yield {}, "Invalid JSON: baris harus berupa object"
+                        continue
+                    yield row, None
+            else:
+                for row in csv.DictReader(file):
+                    yield row, None
+
+    def get_field(self, row: Dict[str, Any], field: str) -> Any:
+        for alias in self.FIELD_ALIASES[field]:
+            value = row.get(alias)
+            if value not in (None, ''):
+                return value
+        return None
+
+    def parse_timestamp(self, value: Any) -> Optional[datetime]:
+        if value in (None, ''):
+            return None
+        return datetime.fromisoformat(str(value).strip())
+
+    def build_row(self, row: Dict[str, Any]) -> Tuple[Optional[List], Optional[str]]:
+        """Validasi satu baris input dan hitung komponen finansialnya"""
+        total_order = self.get_field(row, "total_order")
+        if total_order is None:
+            return None, "Total order is required"
+
+        if isinstance(total_order, (int, float)):
+            total_order = float(total_order)
+        else:
+            total_order = self.data_handler.clean_numeric_value(total_order)
+
+        custom_date = self.get_field(row, "custom_date")
+        custom_date = str(custom_date).strip() if custom_date else None
+
+        error = self.finance_manager.validate_order(total_order, custom_date)
+        if error:
+            return None, error
+
+        try:
+            timestamp = self.parse_timestamp(self.get_field(row, "timestamp"))
+        except ValueError:
+            return None, "Invalid timestamp"
+        if timestamp is not None:
+            error = self.finance_manager.validate_order_date(timestamp.date())
+            if error:
+                return None, error
+
+        order_type = self.get_field(row, "order_type") or "Regular"
+        record = self.finance_manager.calculate_finances(total_order, str(order_type).strip(), custom_date, timestamp)
+        return record.to_csv_row(), None
+
+    def source_signature(self, source: str) -> Dict[str, Any]:
+        stat = os.stat(source)
+        return {"source": os.path.abspath(source), "size": stat.st_size, "mtime": stat.st_mtime}
+
+    def load_checkpoint(self, source: str) -> Optional[Dict[str, Any]]:
+        """Ambil checkpoint jika masih untuk file sumber yang sama"""
+        if not self.checkpoint_file or not os.path.exists(self.checkpoint_file):
+            return None
+        try:
+            with open(self.checkpoint_file, 'r') as file:
+                checkpoint = json.load(file)
+        except (ValueError, OSError):
+            return None
+
+        signature = self.source_signature(source)
+        if any(checkpoint.get(key) != value for key, value in signature.items()):
+            return None
+        return checkpoint
+
+    def save_checkpoint(self, checkpoint: Dict[str, Any]):
+        """Tulis checkpoint secara atomik (tulis ke file sementara lalu rename)"""
+        if not self.checkpoint_file:
+            return
+        temp_file = self.checkpoint_file + '.tmp'
+        with open(temp_file, 'w') as file:
+            json.dump(checkpoint, file, indent=2)
+        os.replace(temp_file, self.checkpoint_file)
+
+    def clear_checkpoint(self):
+        if self.checkpoint_file and os.path.exists(self.checkpoint_file):
+            os.remove(self.checkpoint_file)
+
+    def rollback_partial_batch(self, checkpoint: Dict[str, Any]) -> bool:
+        """Potong batch yang terputus di tengah tulis (ditandai `pending_end_size` di checkpoint)
+
+        Hanya byte milik batch itu yang dipotong. Jika CSV sudah tumbuh melewati
+        batch tersebut (misalnya server menambah order sesudahnya), rollback
+        ditolak agar baris orang lain tidak ikut terpotong. True jika CSV dipotong.
+        """
+        data_size = checkpoint.get("data_file_size")
+        pending_end = checkpoint.get("pending_end_size")
+        if data_size is None or pending_end is None or not os.path.exists(self.data_handler.data_file):
+            return False
+
+        current_size = os.path.getsize(self.data_handler.data_file)
+        if current_size <= data_size:
+            return False
+        if current_size > pending_end:
+            raise ValueError(
+                "CSV berubah sejak checkpoint (ada baris baru setelah batch yang terputus); "
+                "periksa data lalu jalankan ulang dengan --restart"
+            )
+        with open(self.data_handler.data_file, 'r+b') as file:
+            file.truncate(data_size)
+        return True
+
+    def run(self, source: str, file_format: Optional[str] = None, resume: bool = True) -> Dict[str, Any]:
+        """Jalankan import dan kembalikan statistik akhir"""
+        file_format = file_format or self.detect_format(source)
+        checkpoint = self.load_checkpoint(source) if resume else None
+
+        stats = {"processed": 0, "imported": 0, "rejected": 0, "errors": []}
+        skip_rows = 0
+        if checkpoint:
+            if self.rollback_partial_batch(checkpoint):
+                # Listener manager sempat memuat baris batch yang baru saja dipotong
+                self.data_handler.replay_listeners(restore=False)
+            skip_rows = checkpoint["rows_processed"]
+            stats["processed"] = checkpoint["rows_processed"]
+            stats["imported"] = checkpoint["imported"]
+            stats["rejected"] = checkpoint["rejected"]
+            print(f"↩️  Melanjutkan import dari baris {skip_rows:,}")
+        else:
+            # Checkpoint awal, supaya batch pertama yang terputus juga bisa di-rollback
+            self.save_checkpoint(self.build_checkpoint(source, stats))
+
+        started = time.perf_counter()
+        last_report = started
+        batch: List[List] = []
+
+        for line_number, (row, error) in enumerate(self.iter_rows(source, file_format), start=1):
+            if line_number <= skip_rows:
+                continue
+
+            csv_row = None
+            if not error:
+                try:
+                    csv_row, error = self.build_row(row)
+                except (ValueError, TypeError, AttributeError) as e:
+                    csv_row, error = None, str(e)
+
+            stats["processed"] += 1
+            if error:
+                stats["rejected"] += 1
+                if len(stats["errors"]) < 20:
+                    stats["errors"].append(f"Baris {line_number}: {error}")
+            else:
+                batch.append(csv_row)
+
+            if len(batch) >= self.batch_size:
+                self.flush_batch(source, batch, stats)
+                batch = []
+
+            now = time.perf_counter()
+            if now - last_report >= self.progress_interval:
+                self.report_progress(stats, now - started, skip_rows)
+                last_report = now
+
+        self.flush_batch(source, batch, stats)
+        # Listener sudah di-update per batch; tinggal simpan state untuk CSV akhir
+        self.data_handler.flush_listeners()
+
+        elapsed = time.perf_counter() - started
+        stats["elapsed_seconds"] = elapsed
+        stats["rows_per_second"] = (stats["processed"] - skip_rows) / elapsed if elapsed > 0 else 0
+        self.clear_checkpoint()
+        return stats
+
+    def build_checkpoint(self, source: str, stats: Dict[str, Any]) -> Dict[str, Any]:
+        checkpoint = self.source_signature(source)
+        checkpoint.update({
+            "rows_processed": stats["processed"],
+            "imported": stats["imported"],
+            "rejected": stats["rejected"],
+            "data_file_size": os.path.getsize(self.data_handler.data_file),
+            "updated_at": datetime.now().isoformat()
+        })
+        return checkpoint
+
+    def flush_batch(self, source: str, batch: List[List], stats: Dict[str, Any]):
+        """Tulis batch ke CSV lalu simpan posisi checkpoint"""
+        if batch and self.checkpoint_file:
+            # Tandai rentang byte batch ini sebelum ditulis, untuk rollback yang aman
+            checkpoint = self.load_checkpoint(source) or self.build_checkpoint(source, stats)
+            data_size = os.path.getsize(self.data_handler.data_file)
+            checkpoint["data_file_size"] = data_size
+            checkpoint["pending_end_size"] = data_size + sum(len(line) for line in self.data_handler.encode_rows(batch))
+            self.save_checkpoint(checkpoint)
+
+        # Listener menerima batch ini saja (add_batch per chunk), bukan replay seluruh CSV
+        self.data_handler.save_records(batch)
+        stats["imported"] += len(batch)
+        self.save_checkpoint(self.build_checkpoint(source, stats))
+
+    def report_progress(self, stats: Dict[str, Any], elapsed: float, skipped: int):
+        rate = (stats["processed"] - skipped) / elapsed if elapsed > 0 else 0
+        print(f"⏳ {stats['processed']:,} baris diproses | {stats['imported']:,} diimport | "
+              f"{stats['rejected']:,} ditolak | {rate:,.0f} baris/detik")
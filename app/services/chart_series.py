@@ -0,0 +1,143 @@
+import bisect
+import json
+import os
+from typing import Dict, Any, List
+
+class ChartSeries:
+    """Data chart dashboard yang di-update saat tulis, bukan dihitung ulang per request
+
+    Menyimpan window 7 hari terakhir yang punya order, counter per jenis order
+    dan total breakdown berjalan. Jika delete mengosongkan hari di dalam window,
+    window diisi ulang dari rollup harian (jarang terjadi).
+    """
+
+    TREND_DAYS = 7
+    PERFORMANCE_DAYS = 5
+
+    def __init__(self, rollups):
+        self.rollups = rollups
+        self.reset()
+
+    def reset(self):
+        self.days: List[str] = []  # terurut, maksimal TREND_DAYS
+        self.day_values: Dict[str, Dict[str, float]] = {}
+        self.order_types: Dict[str, int] = {}
+        self.breakdown = {"commission": 0, "savings": 0, "net_income": 0}
+        self.stale = False
+
+    def add(self, record: Dict[str, Any]):
+        date = record['display_date']
+        if date not in self.day_values:
+            if len(self.days) >= self.TREND_DAYS and date < self.days[0]:
+                date = None
+            else:
+                bisect.insort(self.days, date)
+                self.day_values[date] = {"revenue": 0, "orders": 0}
+                if len(self.days) > self.TREND_DAYS:
+                    del self.day_values[self.days.pop(0)]
+        if date is not None:
+            self.day_values[date]["revenue"] += record['total_order']
+            self.day_values[date]["orders"] += 1
+
+        order_type = record['order_type']
+        self.order_types[order_type] = self.order_types.get(order_type, 0) + 1
+
+        self.breakdown["commission"] += record['commission']
+        self.breakdown["savings"] += record['saldo_savings'] + record['bbm_savings'] + record['oli_savings']
+        self.breakdown["net_income"] += record['net_income']
+
+    def remove(self, record: Dict[str, Any]):
+        values = self.day_values.get(record['display_date'])
+        if values is not None:
+            values["revenue"] = round(values["revenue"] - record['total_order'], 6)
+            values["orders"] -= 1
+            if values["orders"] <= 0:
+                self.stale = True
+
+        order_type = record['order_type']
+        if order_type in self.order_types:
+            self.order_types[order_type] -= 1
+            if self.order_types[order_type] <= 0:
+                del self.order_types[order_type]
+
+        savings = record['saldo_savings'] + record['bbm_savings'] + record['oli_savings']
+        self.breakdown["commission"] = round(self.breakdown["commission"] - record['commission'], 6)
+        self.breakdown["savings"] = round(self.breakdown["savings"] - savings, 6)
+        self.breakdown["net_income"] = round(self.breakdown["net_income"] - record['net_income'], 6)
+
+    def refresh_days(self):
+        """Isi ulang window dari rollup harian setelah ada hari yang kosong"""
+        if not self.stale:
+            return
+        day_rollup = self.rollups.get_level("day")
+        self.days = sorted(day_rollup)[-self.TREND_DAYS:]
+        self.day_values = {
+            date: {"revenue": day_rollup[date]["revenue"], "orders": day_rollup[date]["orders"]}
+            for date in self.days
+        }
+        self.stale = False
+
+    def recent_revenues(self, count: int) -> List[float]:
+        """Revenue `count` hari terakhir yang punya order, urut tanggal"""
+        self.refresh_days()
+        return [self.day_values[date]["revenue"] for date in self.days[-count:]]
+
+    @property
+    def chart_file(self) -> str:
+        return os.path.join(self.rollups.rollup_dir, "charts.json")
+
+    def flush(self, signature: Dict[str, Any]):
+        self.refresh_days()
+        os.makedirs(self.rollups.rollup_dir, exist_ok=True)
+        payload = {
+            "signature": signature,
+            "days": [[date, self.day_values[date]] for date in self.days],
+            "order_types": list(self.order_types.items()),
+            "breakdown": self.breakdown
+        }
+        temp_path = self.chart_file + '.tmp'
+        with open(temp_path, 'w') as file:
+            json.dump(payload, file, separators=(',', ':'))
+        os.replace(temp_path, self.chart_file)
+
+    def restore(self, signature: Dict[str, Any]) -> bool:
+        try:
+            with open(self.chart_file, 'r') as file:
+                payload = json.load(file)
+        except (OSError, ValueError):
+            return False
+        if payload.get("signature") != signature:
+            return False
+
+        self.reset()
+        for date, values in payload["days"]:
+            self.days.append(date)
+            self.day_values[date] = values
+        # List pasangan, agar urutan jenis order (urutan pertama muncul) tetap terjaga
+        self.order_types = dict(payload["order_types"])
+        self.breakdown = payload["breakdown"]
+        return True
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialisasi langsung ke format chart_data"""
+        self.refresh_days()
+        recent_days = self.days[-self.PERFORMANCE_DAYS:]
+        return {
+            "revenue_trend": {
+                "labels": list(self.days),
+                "data": [self.day_values[date]["revenue"] for date in self.days]
+            },
+            "order_types": {
+                "labels": list(self.order_types),
+                "data": list(self.order_types.values())
+            },
+            "income_breakdown": {
+                "labels": ["Komisi", "Tabungan", "Pendapatan Bersih"],
+                "data": [self.breakdown["commission"], self.breakdown["savings"], self.breakdown["net_income"]]
+            },
+            "daily_performance": {
+                "labels": recent_days,
+                "revenue": [self.day_values[date]["revenue"] for date in recent_days],
+                "orders": [self.day_values[date]["orders"] for date in recent_days]
+            }
+        }
@@ -1,18 +1,47 @@
 import csv
+import io
 import os
 import json
+import time
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Absolute imports
+import sys
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from app.services.time_hierarchy import TimeHierarchy
 
 class DataHandler:
+    COLUMNS = [
+        'Tanggal & Jam', 'Total Orderan', 'Komisi (15%)',
+        'Tabungan Saldo (10%)', 'Tabungan BBM (10%)', 'Tabungan Oli (10%)',
+        'Pendapatan Bersih', 'Pendapatan Siap Pakai', 'Jenis Orderan', 'Tanggal Custom'
+    ]
+
+    # Ukuran chunk untuk listener yang mendukung `add_batch` (agregasi vektor)
+    LISTENER_CHUNK_SIZE = 50000
+    # State listener disimpan paling sering sekali per interval ini saat ada tulis beruntun
+    FLUSH_INTERVAL = 5.0
+
     def __init__(self, data_file: str = 'data/riwayat_orderan.csv', config_file: str = 'data/config.json'):
         self.data_file = data_file
         self.config_file = config_file
+        # Naik setiap kali data berhasil ditulis, dipakai untuk mendeteksi perubahan
+        self.data_version = 0
+        self.listeners: List[Any] = []
+        self.flush_pending = False
+        self.last_flush = 0.0
+        # Index tahun/bulan/hari -> offset baris, dimuat saat pertama dipakai
+        self.time_hierarchy: Optional[TimeHierarchy] = None
         self.ensure_directories()
 
     def ensure_directories(self):
         """Ensure data directory exists"""
-        os.makedirs('data', exist_ok=True)
+        for path in (self.data_file, self.config_file):
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
 
     def clean_numeric_value(self, value: Any) -> float:
         """Clean and convert numeric values from CSV"""
@@ -35,11 +64,7 @@ class DataHandler:
         if not os.path.exists(self.data_file) or os.stat(self.data_file).st_size == 0:
             with open(self.data_file, 'w', newline='', encoding='utf-8') as file:
                 writer = csv.writer(file)
-                writer.writerow([
-                    'Tanggal & Jam', 'Total Orderan', 'Komisi (15%)',
-                    'Tabungan Saldo (10%)', 'Tabungan BBM (10%)', 'Tabungan Oli (10%)',
-                    'Pendapatan Bersih', 'Pendapatan Siap Pakai', 'Jenis Orderan', 'Tanggal Custom'
-                ])
+                writer.writerow(self.COLUMNS)
 
     def migrate_data_file(self):
         """Migrate existing data file to include Tanggal Custom column"""
@@ -71,6 +96,8 @@ class DataHandler:
                 "company_name": "Maxim Finance AI",
                 "tax_rate": 0.0,
                 "currency": "IDR",
+                "timezone": "Asia/Jakarta",
+                "forecast_model": "holt_winters",
                 "performance_metrics": {
                     "target_daily_income": 200000,
                     "target_weekly_orders": 20,
@@ -85,63 +112,222 @@ class DataHandler:
         with open(self.config_file, 'w') as file:
             json.dump(config, file, indent=4)
 
+    def add_listener(self, listener: Any):
+        """Daftarkan agregat incremental yang ikut di-update setiap kali data ditulis
+
+        Listener wajib punya `reset()` dan `add(record)`; record berformat sama
+        dengan hasil `load_all_data()`. Opsional: `add_batch(records)` untuk
+        agregasi per chunk, `remove(record)` untuk delete incremental,
+        `restore(signature)` untuk memuat state tersimpan yang masih cocok
+        dengan CSV, dan `flush(signature)` untuk menyimpan state setelah ditulis.
+        """
+        self.listeners.append(listener)
+
+    def get_file_signature(self) -> Dict[str, Any]:
+        """Identitas isi CSV (ukuran + mtime) untuk verifikasi state tersimpan"""
+        try:
+            stat = os.stat(self.data_file)
+        except OSError:
+            return {"size": 0, "mtime_ns": 0}
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def flush_listeners(self, listeners: Optional[List[Any]] = None):
+        signature = self.get_file_signature()
+        for listener in listeners if listeners is not None else self.listeners:
+            if hasattr(listener, 'flush'):
+                listener.flush(signature)
+        if listeners is None:
+            self.flush_pending = False
+            self.last_flush = time.monotonic()
+
+    def request_flush(self):
+        """Flush setelah tulis, tapi paling sering sekali per FLUSH_INTERVAL
+
+        Flush yang tertunda aman: state di disk selalu diverifikasi dengan
+        signature CSV, jadi paling buruk listener di-replay saat start berikutnya.
+        Sisa flush dijalankan oleh tulis berikutnya atau `flush_if_pending()`.
+        """
+        if time.monotonic() - self.last_flush >= self.FLUSH_INTERVAL:
+            self.flush_listeners()
+        else:
+            self.flush_pending = True
+
+    def flush_if_pending(self):
+        if self.flush_pending:
+            self.flush_listeners()
+
+    def to_record(self, row: List, header: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        return self.parse_row(dict(zip(header or self.COLUMNS, (str(value) for value in row))))
+
+    def feed_listeners(self, listeners: List[Any], records: Iterable[Dict[str, Any]]):
+        """Kirim record ke listener; yang punya `add_batch` menerima per chunk"""
+        batch_listeners = [listener for listener in listeners if hasattr(listener, 'add_batch')]
+        record_listeners = [listener for listener in listeners if not hasattr(listener, 'add_batch')]
+
+        chunk = []
+        for record in records:
+            for listener in record_listeners:
+                listener.add(record)
+            if batch_listeners:
+                chunk.append(record)
+                if len(chunk) >= self.LISTENER_CHUNK_SIZE:
+                    for listener in batch_listeners:
+                        listener.add_batch(chunk)
+                    chunk = []
+
+        if chunk:
+            for listener in batch_listeners:
+                listener.add_batch(chunk)
+
+    def notify_rows_added(self, rows: List[List]):
+        if not self.listeners:
+            return
+        records = (self.to_record(row) for row in rows)
+        self.feed_listeners(self.listeners, (record for record in records if record is not None))
+        self.request_flush()
+
+    def notify_rows_deleted(self, rows: List[List], header: Optional[List[str]] = None):
+        """Kurangi record yang dihapus; listener tanpa `remove` dibangun ulang"""
+        incremental = [listener for listener in self.listeners if hasattr(listener, 'remove')]
+        for row in rows:
+            record = self.to_record(row, header)
+            if record is None:
+                continue
+            for listener in incremental:
+                listener.remove(record)
+        self.flush_listeners(incremental)
+
+        rebuild = [listener for listener in self.listeners if not hasattr(listener, 'remove')]
+        if rebuild:
+            self.replay_listeners(rebuild, restore=False)
+
+    def replay_listeners(self, listeners: Optional[List[Any]] = None, restore: bool = True):
+        """Bangun ulang listener dengan satu kali baca CSV
+
+        Listener yang berhasil `restore` dari state tersimpan dilewati; jika
+        semuanya berhasil, CSV tidak dibaca sama sekali.
+        """
+        listeners = list(self.listeners if listeners is None else listeners)
+        if restore:
+            signature = self.get_file_signature()
+            listeners = [
+                listener for listener in listeners
+                if not (hasattr(listener, 'restore') and listener.restore(signature))
+            ]
+        if not listeners:
+            return
+
+        for listener in listeners:
+            listener.reset()
+        self.feed_listeners(listeners, self.iter_records())
+        self.flush_listeners(listeners)
+
+    def encode_rows(self, rows: List[List]) -> List[bytes]:
+        """Byte persis yang akan ditulis ke CSV untuk tiap baris"""
+        encoded = []
+        for row in rows:
+            buffer = io.StringIO()
+            csv.writer(buffer).writerow(row)
+            encoded.append(buffer.getvalue().encode('utf-8'))
+        return encoded
+
+    def append_rows(self, rows: List[List]) -> List[int]:
+        """Tambahkan baris ke CSV dalam satu tulis; kembalikan offset byte tiap baris"""
+        encoded = self.encode_rows(rows)
+        with open(self.data_file, 'ab') as file:
+            offset = os.fstat(file.fileno()).st_size
+            file.write(b''.join(encoded))
+
+        offsets = []
+        for line in encoded:
+            offsets.append(offset)
+            offset += len(line)
+        return offsets
+
     def save_record(self, record_data: List):
         """Save record to CSV"""
-        with open(self.data_file, 'a', newline='', encoding='utf-8') as file:
-            writer = csv.writer(file)
-            writer.writerow(record_data)
+        self.save_records([record_data])
 
-    def load_all_data(self) -> List[Dict[str, Any]]:
-        """Load all data from CSV"""
+    def save_records(self, rows: List[List], notify: bool = True):
+        """Save many records to CSV in a single write
+
+        `notify=False` jika pemanggil membangun ulang listener sendiri.
+        """
+        if not rows:
+            return
+        offsets = self.append_rows(rows)
+        self.data_version += 1
+        if notify:
+            self.notify_rows_added(rows)
+
+        if self.time_hierarchy is not None:
+            for row, offset in zip(rows, offsets):
+                self.time_hierarchy.add(self.time_hierarchy.row_count, offset, self.to_record(row))
+            self.time_hierarchy.flush(self.get_file_signature())
+
+    def parse_row(self, row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Parse satu baris CSV menjadi record; None untuk baris kosong/header"""
+        if not any(row.values()):
+            return None
+            
+        row_values = ' '.join(str(v) for v in row.values()).lower()
+        if any(header in row_values for header in ['tanggal', 'orderan', 'komisi', 'tabungan', 'pendapatan']):
+            return None
+        
+        custom_date = row.get('Tanggal Custom', '')
+
+        display_date = None
+        if custom_date and custom_date.strip():
+            # Tanggal custom hasil edit manual bisa berformat lain; jika tidak valid pakai tanggal timestamp
+            try:
+                display_date = datetime.strptime(custom_date.strip(), '%Y-%m-%d').strftime('%Y-%m-%d')
+            except ValueError:
+                display_date = None
+
+        if display_date is None:
+            timestamp_str = row.get('Tanggal & Jam', '')
+            if timestamp_str:
+                try:
+                    display_date = timestamp_str.split(' ')[0]
+                    datetime.strptime(display_date, '%Y-%m-%d')
+                except (ValueError, IndexError):
+                    display_date = datetime.now().strftime('%Y-%m-%d')
+            else:
+                display_date = datetime.now().strftime('%Y-%m-%d')
+        
+        return {
+            'timestamp': row.get('Tanggal & Jam', ''),
+            'total_order': self.clean_numeric_value(row.get('Total Orderan', '0')),
+            'commission': self.clean_numeric_value(row.get('Komisi (15%)', '0')),
+            'saldo_savings': self.clean_numeric_value(row.get('Tabungan Saldo (10%)', '0')),
+            'bbm_savings': self.clean_numeric_value(row.get('Tabungan BBM (10%)', '0')),
+            'oli_savings': self.clean_numeric_value(row.get('Tabungan Oli (10%)', '0')),
+            'net_income': self.clean_numeric_value(row.get('Pendapatan Bersih', '0')),
+            'usable_income': self.clean_numeric_value(row.get('Pendapatan Siap Pakai', '0')),
+            'order_type': row.get('Jenis Orderan', 'Regular'),
+            'custom_date': custom_date,
+            'display_date': display_date
+        }
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Stream records from CSV tanpa memuat semuanya ke memori"""
         if not os.path.exists(self.data_file) or os.stat(self.data_file).st_size == 0:
-            return []
+            return
 
-        data = []
         with open(self.data_file, 'r', encoding='utf-8') as file:
             reader = csv.DictReader(file)
             for i, row in enumerate(reader):
                 try:
-                    if not any(row.values()):
-                        continue
-                        
-                    row_values = ' '.join(str(v) for v in row.values()).lower()
-                    if any(header in row_values for header in ['tanggal', 'orderan', 'komisi', 'tabungan', 'pendapatan']):
-                        continue
-                    
-                    custom_date = row.get('Tanggal Custom', '')
-                    
-                    if custom_date and custom_date.strip():
-                        display_date = custom_date
-                    else:
-                        timestamp_str = row.get('Tanggal & Jam', '')
-                        if timestamp_str:
-                            try:
-                                display_date = timestamp_str.split(' ')[0]
-                                datetime.strptime(display_date, '%Y-%m-%d')
-                            except (ValueError, IndexError):
-                                display_date = datetime.now().strftime('%Y-%m-%d')
-                        else:
-                            display_date = datetime.now().strftime('%Y-%m-%d')
-                    
-                    data.append({
-                        'timestamp': row.get('Tanggal & Jam', ''),
-                        'total_order': self.clean_numeric_value(row.get('Total Orderan', '0')),
-                        'commission': self.clean_numeric_value(row.get('Komisi (15%)', '0')),
-                        'saldo_savings': self.clean_numeric_value(row.get('Tabungan Saldo (10%)', '0')),
-                        'bbm_savings': self.clean_numeric_value(row.get('Tabungan BBM (10%)', '0')),
-                        'oli_savings': self.clean_numeric_value(row.get('Tabungan Oli (10%)', '0')),
-                        'net_income': self.clean_numeric_value(row.get('Pendapatan Bersih', '0')),
-                        'usable_income': self.clean_numeric_value(row.get('Pendapatan Siap Pakai', '0')),
-                        'order_type': row.get('Jenis Orderan', 'Regular'),
-                        'custom_date': custom_date,
-                        'display_date': display_date
-                    })
-                    
+                    record = self.parse_row(row)
                 except (KeyError, ValueError, AttributeError) as e:
                     print(f"⚠️ Error parsing row {i}: {e}")
                     continue
+                if record is not None:
+                    yield record
 
-        return data
+    def load_all_data(self) -> List[Dict[str, Any]]:
+        """Load all data from CSV"""
+        return list(self.iter_records())
 
     def delete_records(self, indices: List[int]) -> bool:
         """Delete records by indices"""
@@ -157,15 +343,83 @@ class DataHandler:
             if not valid_indices:
                 return False
 
-            for i in sorted(valid_indices, reverse=True):
+            deleted_rows = []
+            for i in sorted(set(valid_indices), reverse=True):
                 if i < len(rows):
-                    rows.pop(i)
+                    deleted_rows.append(rows.pop(i))
 
             with open(self.data_file, 'w', newline='', encoding='utf-8') as file:
                 writer = csv.writer(file)
                 writer.writerows(rows)
 
+            self.data_version += 1
+            self.notify_rows_deleted(deleted_rows, rows[0])
+            if self.time_hierarchy is not None:
+                # Offset semua baris setelahnya bergeser; file toh baru ditulis ulang penuh
+                self.rebuild_time_hierarchy()
             return True
         except Exception as e:
             print(f"❌ Error deleting records: {e}")
             return False
+
+    def iter_rows_with_offsets(self) -> Iterator[Tuple[int, int, Optional[Dict[str, Any]]]]:
+        """(row ID, offset byte, record) untuk setiap baris data; record None jika tidak valid"""
+        if not os.path.exists(self.data_file) or os.stat(self.data_file).st_size == 0:
+            return
+
+        with open(self.data_file, 'rb') as file:
+            header = next(csv.reader([file.readline().decode('utf-8')]), None)
+            row_id = 0
+            while True:
+                offset = file.tell()
+                line = file.readline()
+                if not line:
+                    break
+                values = next(csv.reader([line.decode('utf-8')]), [])
+                try:
+                    record = self.to_record(values, header)
+                except (KeyError, ValueError, AttributeError):
+                    record = None
+                yield row_id, offset, record
+                row_id += 1
+
+    def rebuild_time_hierarchy(self):
+        self.time_hierarchy.reset()
+        for row_id, offset, record in self.iter_rows_with_offsets():
+            self.time_hierarchy.add(row_id, offset, record)
+        self.time_hierarchy.flush(self.get_file_signature())
+
+    def get_time_hierarchy(self) -> TimeHierarchy:
+        """Index hierarki waktu; dimuat dari disk jika masih cocok dengan CSV, selain itu dibangun sekali"""
+        if self.time_hierarchy is None:
+            state_file = os.path.join(os.path.dirname(self.data_file) or '.', 'rollups', 'hierarchy.json')
+            self.time_hierarchy = TimeHierarchy(state_file)
+            if not self.time_hierarchy.restore(self.get_file_signature()):
+                self.rebuild_time_hierarchy()
+        return self.time_hierarchy
+
+    def read_rows_at(self, rows: List[Tuple[int, int]]) -> List[Dict[str, Any]]:
+        """Baca record langsung dari offset-nya di CSV (tanpa membaca baris lain)"""
+        records = []
+        with open(self.data_file, 'rb') as file:
+            header = next(csv.reader([file.readline().decode('utf-8')]), None)
+            for row_id, offset in rows:
+                file.seek(offset)
+                values = next(csv.reader([file.readline().decode('utf-8')]), [])
+                record = self.to_record(values, header)
+                if record is not None:
+                    record['row_id'] = row_id
+                    records.append(record)
+        return records
+
+    def get_history_level(self, year: Optional[str] = None, month: Optional[str] = None,
+                          day: Optional[str] = None) -> Dict[str, Any]:
+        """Satu level riwayat: daftar tahun, bulan dalam tahun, hari dalam bulan, atau order satu hari"""
+        hierarchy = self.get_time_hierarchy()
+        if day:
+            return {"level": "orders", "key": day, "items": self.read_rows_at(hierarchy.day_rows(day))}
+        if month:
+            return {"level": "days", "key": month, "items": hierarchy.list_days(month)}
+        if year:
+            return {"level": "months", "key": year, "items": hierarchy.list_months(year)}
+        return {"level": "years", "key": None, "items": hierarchy.list_years()}
@@ -0,0 +1,135 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date
+from itertools import accumulate
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+class DayPrefixIndex:
+    """Index kumulatif per hari: total rentang [from, to] = dua lookup + satu pengurangan
+
+    Hanya hari yang punya order yang disimpan (sparse, urut tanggal), sehingga
+    ukuran index tidak bergantung pada jarak antar tanggal; lookup memakai bisect.
+    Replay & import memakai `add_batch` (prefix dihitung ulang sekali per chunk,
+    O(hari + chunk)); `add` per order hanya untuk tulis live. Saat start, index
+    dibangun dari rollup harian yang dimuat dari disk, tanpa membaca CSV.
+    """
+
+    FIELDS = ("revenue", "orders", "commission", "savings", "net_income", "usable_income")
+    # Field rollup harian untuk setiap field index
+    ROLLUP_FIELDS = ("revenue", "orders", "commission", "savings", "net_income", "income")
+
+    def __init__(self, rollups=None):
+        self.rollups = rollups
+        self.reset()
+
+    def reset(self):
+        self.days = array('l')  # ordinal hari yang punya order, urut naik
+        self.cumulative: Dict[str, array] = {field: array('d') for field in self.FIELDS}
+
+    def record_values(self, record: Dict[str, Any]) -> Tuple[float, ...]:
+        """Nilai record dengan urutan `FIELDS`"""
+        return (
+            record['total_order'],
+            1,
+            record['commission'],
+            record['saldo_savings'] + record['bbm_savings'] + record['oli_savings'],
+            record['net_income'],
+            record['usable_income']
+        )
+
+    def locate(self, ordinal: int) -> int:
+        """Posisi hari `ordinal`; hari baru disisipkan dengan nilai kumulatif hari sebelumnya"""
+        position = bisect_left(self.days, ordinal)
+        if position == len(self.days) or self.days[position] != ordinal:
+            self.days.insert(position, ordinal)
+            for series in self.cumulative.values():
+                series.insert(position, series[position - 1] if position > 0 else 0.0)
+        return position
+
+    def apply(self, record: Dict[str, Any], sign: int):
+        ordinal = date.fromisoformat(record['display_date']).toordinal()
+        position = self.locate(ordinal)
+        for field, value in zip(self.FIELDS, self.record_values(record)):
+            series = self.cumulative[field]
+            # Order hari ini cuma menyentuh elemen terakhir; backfill memperbarui suffix-nya
+            for i in range(position, len(series)):
+                series[i] += sign * value
+                if sign < 0:
+                    series[i] = round(series[i], 6)
+
+    def add(self, record: Dict[str, Any]):
+        self.apply(record, 1)
+
+    def remove(self, record: Dict[str, Any]):
+        self.apply(record, -1)
+
+    def day_values(self) -> Dict[int, List[float]]:
+        """Nilai per hari (selisih prefix), O(hari)"""
+        values: Dict[int, List[float]] = {}
+        previous = [0.0] * len(self.FIELDS)
+        for position, ordinal in enumerate(self.days):
+            current = [self.cumulative[field][position] for field in self.FIELDS]
+            values[ordinal] = [now - before for now, before in zip(current, previous)]
+            previous = current
+        return values
+
+    def build(self, values: Dict[int, List[float]]):
+        """Susun ulang hari & prefix dari nilai per hari dalam satu lintasan"""
+        ordinals = sorted(values)
+        self.days = array('l', ordinals)
+        for column, field in enumerate(self.FIELDS):
+            self.cumulative[field] = array('d', accumulate(values[ordinal][column] for ordinal in ordinals))
+
+    def add_batch(self, records: Iterable[Dict[str, Any]]):
+        """Gabungkan banyak record per hari, lalu prefix dihitung ulang sekali"""
+        values = self.day_values()
+        for record in records:
+            ordinal = date.fromisoformat(record['display_date']).toordinal()
+            day = values.get(ordinal)
+            if day is None:
+                day = values[ordinal] = [0.0] * len(self.FIELDS)
+            for column, value in enumerate(self.record_values(record)):
+                day[column] += value
+        self.build(values)
+
+    def build_from_rollup(self, day_rollup: Dict[str, Dict[str, Any]]):
+        self.build({
+            date.fromisoformat(key).toordinal(): [bucket[field] for field in self.ROLLUP_FIELDS]
+            for key, bucket in day_rollup.items() if bucket["orders"] > 0
+        })
+
+    def restore(self, signature: Dict[str, Any]) -> bool:
+        """Dibangun dari rollup harian jika rollup baru saja dimuat untuk CSV yang sama"""
+        if self.rollups is None or self.rollups.restored_signature != signature:
+            return False
+        self.build_from_rollup(self.rollups.get_level("day"))
+        return True
+
+    def prefix(self, field: str, ordinal: int) -> float:
+        """Total kumulatif sampai dan termasuk hari `ordinal`"""
+        position = bisect_right(self.days, ordinal) - 1
+        return self.cumulative[field][position] if position >= 0 else 0.0
+
+    def range_totals(self, start: Optional[date] = None, end: Optional[date] = None) -> Dict[str, float]:
+        """Total untuk hari [start, end] (inklusif); None berarti tanpa batas"""
+        totals = {}
+        if not self.days:
+            return {field: 0 for field in self.FIELDS}
+
+        start_ordinal = start.toordinal() if start else self.days[0]
+        end_ordinal = end.toordinal() if end else self.days[-1]
+        for field in self.FIELDS:
+            if end_ordinal < start_ordinal:
+                totals[field] = 0
+                continue
+            totals[field] = self.prefix(field, end_ordinal) - self.prefix(field, start_ordinal - 1)
+        totals["orders"] = int(round(totals["orders"]))
+        return totals
+
+    @property
+    def first_day(self) -> Optional[date]:
+        return date.fromordinal(self.days[0]) if self.days else None
+
+    @property
+    def last_day(self) -> Optional[date]:
+        return date.fromordinal(self.days[-1]) if self.days else None
@@ -0,0 +1,95 @@
+import json
+from typing import Dict, Any, List, Optional
+
+# Absolute imports
+import os
+import sys
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from app.utils.helpers import get_record_datetime
+
+class EarningsHeatmap:
+    """Matriks 7 hari x 24 jam (revenue & orders) per jenis order, di-update O(1) per order"""
+
+    WEEKDAYS = ["Senin", "Selasa", "Rabu", "Kamis", "Jumat", "Sabtu", "Minggu"]
+    ALL_TYPES = "__all__"
+
+    def __init__(self, rollup_dir: Optional[str] = None):
+        self.rollup_dir = rollup_dir
+        self.reset()
+
+    def reset(self):
+        self.matrices: Dict[str, Dict[str, List[List[float]]]] = {}
+
+    def empty_matrix(self) -> Dict[str, List[List[float]]]:
+        return {
+            "revenue": [[0.0] * 24 for _ in range(7)],
+            "orders": [[0] * 24 for _ in range(7)]
+        }
+
+    def apply(self, record: Dict[str, Any], sign: int):
+        moment = get_record_datetime(record)
+        weekday, hour = moment.weekday(), moment.hour
+
+        for key in (self.ALL_TYPES, record['order_type']):
+            matrix = self.matrices.get(key)
+            if matrix is None:
+                matrix = self.matrices[key] = self.empty_matrix()
+            matrix["revenue"][weekday][hour] += sign * record['total_order']
+            matrix["orders"][weekday][hour] += sign
+            if sign < 0:
+                matrix["revenue"][weekday][hour] = round(matrix["revenue"][weekday][hour], 6)
+
+    def add(self, record: Dict[str, Any]):
+        self.apply(record, 1)
+
+    def remove(self, record: Dict[str, Any]):
+        self.apply(record, -1)
+
+    @property
+    def state_file(self) -> str:
+        return os.path.join(self.rollup_dir, "heatmap.json")
+
+    def flush(self, signature: Dict[str, Any]):
+        if not self.rollup_dir:
+            return
+        os.makedirs(self.rollup_dir, exist_ok=True)
+        temp_path = self.state_file + '.tmp'
+        with open(temp_path, 'w') as file:
+            json.dump({"signature": signature, "matrices": self.matrices}, file, separators=(',', ':'))
+        os.replace(temp_path, self.state_file)
+
+    def restore(self, signature: Dict[str, Any]) -> bool:
+        if not self.rollup_dir:
+            return False
+        try:
+            with open(self.state_file, 'r') as file:
+                payload = json.load(file)
+        except (OSError, ValueError):
+            return False
+        if payload.get("signature") != signature:
+            return False
+        self.matrices = payload["matrices"]
+        return True
+
+    def get_matrix(self, order_type: Optional[str] = None) -> Dict[str, List[List[float]]]:
+        return self.matrices.get(order_type or self.ALL_TYPES) or self.empty_matrix()
+
+    def to_dict(self, order_type: Optional[str] = None) -> Dict[str, Any]:
+        """Serialisasi heatmap untuk API (dengan avg_value per sel)"""
+        matrix = self.get_matrix(order_type)
+        avg_value = [
+            [revenue / orders if orders > 0 else 0 for revenue, orders in zip(revenue_row, orders_row)]
+            for revenue_row, orders_row in zip(matrix["revenue"], matrix["orders"])
+        ]
+        return {
+            "order_type": order_type,
+            "weekdays": self.WEEKDAYS,
+            "hours": list(range(24)),
+            "revenue": matrix["revenue"],
+            "orders": matrix["orders"],
+            "avg_value": avg_value,
+            "order_types": sorted(key for key in self.matrices if key != self.ALL_TYPES)
+        }
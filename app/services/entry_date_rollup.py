@@ -0,0 +1,98 @@
+import json
+from typing import Dict, Any
+
+# Absolute imports
+import os
+import sys
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from app.services.rollup_store import RollupStore
+
+class EntryDateRollup:
+    """Bucket rollup per (display_date, tanggal dicatat) untuk order yang dicatat di hari lain
+
+    Order biasa dicatat pada hari kejadiannya dan tidak masuk ke sini; hanya order
+    bertanggal custom (dicatat belakangan atau lebih dulu). Rollup harian mode
+    `entered` = rollup harian live dikoreksi dengan bucket ini, O(hari + pasangan
+    tanggal) tanpa membaca CSV.
+    """
+
+    def __init__(self, rollups: RollupStore):
+        self.rollups = rollups
+        self.reset()
+
+    def reset(self):
+        # display_date -> tanggal dicatat -> bucket (format sama dengan RollupStore)
+        self.buckets: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    @staticmethod
+    def entry_date(record: Dict[str, Any]) -> str:
+        # Timestamp berformat '%Y-%m-%d %H:%M:%S'; kosong berarti selalu dianggap sudah dicatat
+        return (record.get('timestamp') or '')[:10]
+
+    def apply(self, record: Dict[str, Any], sign: int):
+        display_date, entry_date = record['display_date'], self.entry_date(record)
+        if entry_date == display_date:
+            return
+
+        entries = self.buckets.setdefault(display_date, {})
+        bucket = entries.get(entry_date)
+        if bucket is None:
+            if sign < 0:
+                return
+            bucket = entries[entry_date] = self.rollups.empty_bucket()
+        self.rollups.apply(bucket, record, sign)
+        if bucket["orders"] <= 0:
+            del entries[entry_date]
+            if not entries:
+                del self.buckets[display_date]
+
+    def add(self, record: Dict[str, Any]):
+        self.apply(record, 1)
+
+    def remove(self, record: Dict[str, Any]):
+        self.apply(record, -1)
+
+    def day_buckets(self, as_of: str) -> Dict[str, Dict[str, Any]]:
+        """Rollup harian berisi order yang sudah dicatat s.d. akhir hari `as_of`"""
+        days = {}
+        for key, bucket in self.rollups.get_level("day").items():
+            if key <= as_of:
+                days[key] = self.rollups.empty_bucket()
+                self.rollups.merge(days[key], bucket)
+
+        for display_date, entries in self.buckets.items():
+            for entry_date, bucket in entries.items():
+                if display_date <= as_of < entry_date:
+                    # Sudah terjadi, tapi baru dicatat setelah `as_of`
+                    self.rollups.merge(days[display_date], bucket, -1)
+                elif entry_date <= as_of < display_date:
+                    # Dicatat lebih dulu untuk tanggal sesudah `as_of`
+                    target = days.setdefault(display_date, self.rollups.empty_bucket())
+                    self.rollups.merge(target, bucket)
+
+        return {key: bucket for key, bucket in days.items() if bucket["orders"] > 0}
+
+    @property
+    def state_file(self) -> str:
+        return os.path.join(self.rollups.rollup_dir, "entry_dates.json")
+
+    def flush(self, signature: Dict[str, Any]):
+        os.makedirs(self.rollups.rollup_dir, exist_ok=True)
+        temp_path = self.state_file + '.tmp'
+        with open(temp_path, 'w') as file:
+            json.dump({"signature": signature, "buckets": self.buckets}, file, separators=(',', ':'))
+        os.replace(temp_path, self.state_file)
+
+    def restore(self, signature: Dict[str, Any]) -> bool:
+        try:
+            with open(self.state_file, 'r') as file:
+                payload = json.load(file)
+        except (OSError, ValueError):
+            return False
+        if payload.get("signature") != signature:
+            return False
+        self.buckets = payload["buckets"]
+        return True
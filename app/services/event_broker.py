@@ -0,0 +1,45 @@
+import queue
+import threading
+from typing import Dict, Any, Set, Tuple
+
+class EventBroker:
+    """Pub/sub sederhana untuk push Server-Sent Events ke banyak subscriber"""
+
+    def __init__(self, max_queue_size: int = 50):
+        self.max_queue_size = max_queue_size
+        self._subscribers: Set[queue.Queue] = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self) -> queue.Queue:
+        """Daftarkan subscriber baru dan kembalikan antrian event miliknya"""
+        subscriber = queue.Queue(maxsize=self.max_queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue):
+        """Hapus subscriber (misal saat koneksi browser terputus)"""
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, event: str, data: Dict[str, Any]):
+        """Kirim event ke semua subscriber tanpa pernah memblokir penulis"""
+        message: Tuple[str, Dict[str, Any]] = (event, data)
+        with self._lock:
+            subscribers = list(self._subscribers)
+
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(message)
+            except queue.Full:
+                # Subscriber lambat: buang event tertua, delta terbaru lebih penting
+                try:
+                    subscriber.get_nowait()
+                    subscriber.put_nowait(message)
+                except (queue.Empty, queue.Full):
+                    pass
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
@@ -1,5 +1,8 @@
-from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+import threading
+import uuid
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+from typing import Callable, Dict, Iterable, List, Any, Optional, Tuple
 
 # Absolute imports
 import os
@@ -10,13 +13,92 @@ if current_dir not in sys.path:
 
 from app.models.financial_record import FinancialRecord
 from app.services.ai_advisor import AIFinanceAdvisor
+from app.services.analytics_engine import get_analytics_engine
+from app.services.anomaly_detector import AnomalyDetector
+from app.services.chart_series import ChartSeries
 from app.services.data_handler import DataHandler
+from app.services.day_index import DayPrefixIndex
+from app.services.earnings_heatmap import EarningsHeatmap
+from app.services.entry_date_rollup import EntryDateRollup
+from app.services.hotspot_index import HotspotIndex
+from app.services.historical_view import HistoricalView
+from app.services.period_comparator import PeriodComparator
+from app.services.event_broker import EventBroker
+from app.services.forecaster import HoltWintersForecaster
+from app.services.order_value_sketches import OrderValueSketches
+from app.services.rolling_metrics import RollingMetrics
+from app.services.rollup_store import RollupStore
+from app.services.target_simulator import TargetSimulator
+from app.services.time_index import TimeIndex
+from app.utils.downsample import downsample_series, lttb_indices
 
 class ExpertFinanceManager:
-    def __init__(self):
-        self.data_handler = DataHandler()
+    # Section yang bisa diminta lewat parameter `fields`
+    ANALYTICS_SECTIONS = (
+        "summary", "time_metrics", "daily_analytics", "order_analytics",
+        "financial_breakdown", "ai_analysis", "financial_tips",
+        "earnings_prediction", "chart_data", "order_value_quantiles", "period_comparison"
+    )
+    # Section yang bergantung pada jam saat ini; tidak pernah dihitung di thread request
+    ADVISOR_SECTIONS = ("ai_analysis", "financial_tips", "earnings_prediction")
+    # Batas bawah tanggal order (custom date / timestamp import); batas atas hari ini
+    MIN_ORDER_DATE = date(2000, 1, 1)
+
+    def __init__(self, data_dir: str = 'data'):
+        # Tiap driver (tenant) punya folder data & config sendiri
+        self.data_dir = data_dir
+        self.data_handler = DataHandler(
+            data_file=os.path.join(data_dir, 'riwayat_orderan.csv'),
+            config_file=os.path.join(data_dir, 'config.json')
+        )
         self.ai_advisor = AIFinanceAdvisor()
         self.config = self.data_handler.load_config()
+        self.config_version = 0
+        # Token unik per proses supaya ETag lama tidak cocok setelah restart
+        self.instance_id = uuid.uuid4().hex[:8]
+        self.event_broker = EventBroker()
+        rollup_dir = os.path.join(os.path.dirname(self.data_handler.data_file), 'rollups')
+        self.rollups = RollupStore(
+            rollup_dir,
+            engine=get_analytics_engine(self.config.get('analytics_engine', 'auto'))
+        )
+        self.data_handler.add_listener(self.rollups)
+        # Chart dashboard dimaterialisasi saat tulis (refill window hari butuh rollup di atas)
+        self.chart_series = ChartSeries(self.rollups)
+        self.data_handler.add_listener(self.chart_series)
+        self.forecaster = HoltWintersForecaster(self.rollups)
+        self.data_handler.add_listener(self.forecaster)
+        self.order_value_sketches = OrderValueSketches(rollup_dir)
+        self.data_handler.add_listener(self.order_value_sketches)
+        self.day_index = DayPrefixIndex(self.rollups)
+        self.data_handler.add_listener(self.day_index)
+        self.heatmap = EarningsHeatmap(rollup_dir)
+        self.data_handler.add_listener(self.heatmap)
+        # Restore hotspot memakai seri TimeIndex, jadi TimeIndex didaftarkan lebih dulu
+        self.time_index = TimeIndex(self.config.get('timezone', 'Asia/Jakarta'), rollup_dir)
+        self.data_handler.add_listener(self.time_index)
+        self.hotspot_index = HotspotIndex(rollup_dir, self.time_index)
+        self.data_handler.add_listener(self.hotspot_index)
+        self.rolling_metrics = RollingMetrics(self.rollups)
+        self.data_handler.add_listener(self.rolling_metrics)
+        self.anomaly_detector = AnomalyDetector(rollup_dir)
+        self.data_handler.add_listener(self.anomaly_detector)
+        self.entry_dates = EntryDateRollup(self.rollups)
+        self.data_handler.add_listener(self.entry_dates)
+        self.target_simulator = TargetSimulator(self.rollups, self.order_value_sketches)
+        self.period_comparator = PeriodComparator(self.day_index, self.time_index)
+        self.historical_view = HistoricalView(self.rollups, self.day_index, self.order_value_sketches, self.time_index)
+        # View mode `entered` terakhir, per (versi data, tanggal): dibangun dari rollup, O(jumlah hari)
+        self.entered_view: Optional[Tuple[Tuple[str, str], HistoricalView]] = None
+        # Server sekarang multi-thread, tulis data harus serial
+        self._write_lock = threading.RLock()
+        # Output advisor (insight, tips, prediksi) dihitung di background oleh AdvisorScheduler
+        self.advisor_scheduler = None
+        self.advisor_outputs: Optional[Dict[str, Any]] = None
+        self.advisor_sequence = 0
+        # Snapshot terakhir yang diambil / yang hasilnya sudah dipasang (refresh bisa tumpang tindih)
+        self.advisor_snapshot_sequence = 0
+        self.advisor_published_snapshot = 0
         
         # Constants
         self.COMMISSION_RATE = 0.15
@@ -30,6 +112,12 @@ class ExpertFinanceManager:
         """Initialize file data"""
         self.data_handler.initialize_data_file()
         self.data_handler.migrate_data_file()
+        self.data_handler.replay_listeners()
+
+    def flush_state(self):
+        """Simpan state rollup/index yang flush-nya masih tertunda (saat evict atau shutdown)"""
+        with self._write_lock:
+            self.data_handler.flush_if_pending()
 
     def update_config(self, new_config: Dict[str, Any]) -> Dict[str, Any]:
         """Update configuration dengan validasi"""
@@ -46,11 +134,18 @@ class ExpertFinanceManager:
                     self.config[key] = value
             
             self.data_handler.save_config(self.config)
+            self.config_version += 1
+            self.schedule_advisor_refresh()
             return {"success": True, "message": "✅ Konfigurasi berhasil diperbarui!"}
         except Exception as e:
             return {"success": False, "message": f"❌ Error: {str(e)}"}
 
-    def calculate_finances(self, total_order: float, order_type: str = "Regular", custom_date: Optional[str] = None) -> FinancialRecord:
+    def get_version_tag(self) -> str:
+        """Tag versi data + config, dasar ETag untuk conditional GET"""
+        return f"{self.instance_id}-d{self.data_handler.data_version}-c{self.config_version}"
+
+    def calculate_finances(self, total_order: float, order_type: str = "Regular", custom_date: Optional[str] = None,
+                           timestamp: Optional[datetime] = None) -> FinancialRecord:
         """Calculate financial components"""
         commission = total_order * self.COMMISSION_RATE
         saldo_savings = total_order * self.SALDO_SAVINGS_RATE
@@ -61,7 +156,7 @@ class ExpertFinanceManager:
         usable_income = net_income - (saldo_savings + bbm_savings + oli_savings)
 
         return FinancialRecord(
-            timestamp=datetime.now(),
+            timestamp=timestamp or datetime.now(),
             total_order=total_order,
             commission=commission,
             saldo_savings=saldo_savings,
@@ -73,37 +168,51 @@ class ExpertFinanceManager:
             custom_date=custom_date
         )
 
+    def validate_order_date(self, order_date: date) -> Optional[str]:
+        """Tanggal order harus antara MIN_ORDER_DATE dan hari ini"""
+        if order_date > date.today():
+            return "❌ Tanggal order tidak boleh di masa depan"
+        if order_date < self.MIN_ORDER_DATE:
+            return f"❌ Tanggal order minimal {self.MIN_ORDER_DATE.isoformat()}"
+        return None
+
+    def validate_order(self, total_order: float, custom_date: Optional[str] = None) -> Optional[str]:
+        """Validasi input order; kembalikan pesan error atau None jika valid"""
+        if total_order < 1000:
+            return "Total order minimal Rp 1,000"
+
+        if custom_date:
+            try:
+                order_date = datetime.strptime(custom_date, '%Y-%m-%d').date()
+            except ValueError:
+                return "❌ Format tanggal tidak valid. Gunakan format YYYY-MM-DD"
+            return self.validate_order_date(order_date)
+
+        return None
+
     def add_order(self, total_order: float, order_type: str = "Regular", custom_date: Optional[str] = None) -> Dict[str, Any]:
         """Add new order dengan analytics real-time"""
         try:
-            if total_order < 1000:
-                return {"success": False, "message": "Total order minimal Rp 1,000"}
-
-            if custom_date:
-                try:
-                    datetime.strptime(custom_date, '%Y-%m-%d')
-                except ValueError:
-                    return {"success": False, "message": "❌ Format tanggal tidak valid. Gunakan format YYYY-MM-DD"}
+            error = self.validate_order(total_order, custom_date)
+            if error:
+                return {"success": False, "message": error}
 
             record = self.calculate_finances(total_order, order_type, custom_date)
             
-            # Save record
-            self.data_handler.save_record([
-                record.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
-                record.total_order,
-                record.commission,
-                record.saldo_savings,
-                record.bbm_savings,
-                record.oli_savings,
-                record.net_income,
-                record.usable_income,
-                record.order_type,
-                record.custom_date or ""
-            ])
-            
-            analytics = self.get_real_time_analytics()
-            insights = self.get_performance_insights()
-            ai_analysis = self.ai_advisor.analyze_performance(analytics)
+            with self._write_lock:
+                # Nilai dibandingkan dengan statistik sebelum order ini ikut masuk
+                parsed = self.data_handler.to_record(record.to_csv_row())
+                anomaly = self.anomaly_detector.score(parsed) if parsed else None
+
+                # Save record
+                self.data_handler.save_record(record.to_csv_row())
+                
+                self.schedule_advisor_refresh()
+                analytics = self.get_write_analytics()
+                self.publish_analytics_delta("order_added", analytics)
+
+            insights = analytics.get('ai_analysis', [])
+            ai_analysis = [dict(insight) for insight in insights]
             
             return {
                 "success": True, 
@@ -111,11 +220,167 @@ class ExpertFinanceManager:
                 "analytics": analytics,
                 "insights": insights,
                 "ai_analysis": ai_analysis,
-                "record": record.to_dict()
+                "record": record.to_dict(),
+                "anomaly": anomaly if anomaly and anomaly["is_anomaly"] else None
             }
         except Exception as e:
             return {"success": False, "message": f"Error: {str(e)}"}
 
+    def get_time_aggregates(self, bucket: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                            timezone: Optional[str] = None, order_type: Optional[str] = None,
+                            max_points: Optional[int] = None) -> Dict[str, Any]:
+        """Revenue, orders, net & usable income per bucket waktu dari time index"""
+        tz = ZoneInfo(timezone) if timezone else self.time_index.data_tz
+        with self._write_lock:
+            series = self.time_index.aggregate(bucket, start, end, tz, order_type)
+
+        total_points = len(series)
+        if max_points and max_points < total_points:
+            series = [series[i] for i in lttb_indices([point["revenue"] for point in series], max_points)]
+
+        return {
+            "bucket": bucket,
+            "timezone": str(tz),
+            "order_type": order_type,
+            "total_points": total_points,
+            "series": series
+        }
+
+    def get_revenue_history(self, max_points: Optional[int] = None, start: Optional[date] = None,
+                            end: Optional[date] = None, view: Optional[HistoricalView] = None) -> Dict[str, Any]:
+        """Seri revenue & order harian, di-downsample LTTB ke `max_points`
+
+        Hanya hari yang punya order ditambah satu titik 0 di tiap tepi celah
+        kosong, jadi ukuran seri mengikuti jumlah hari aktif, bukan panjang rentang.
+        Dengan `view`, seri dibaca dari rollup view tersebut (as_of mode `entered`).
+        """
+        rollups = view.rollups if view else self.rollups
+        day_index = view.day_index if view else self.day_index
+        with self._write_lock:
+            day_rollup = rollups.get_level("day")
+            start = start or day_index.first_day
+            end = end or day_index.last_day
+            active = {}
+            if start and end:
+                first, last = start.toordinal(), end.toordinal()
+                for label, bucket in day_rollup.items():
+                    ordinal = date.fromisoformat(label).toordinal()
+                    if first <= ordinal <= last:
+                        active[ordinal] = (bucket["revenue"], bucket["orders"])
+
+        ordinals = []
+        if start and end and start <= end:
+            boundaries = [start.toordinal() - 1] + sorted(active) + [end.toordinal() + 1]
+            for previous, following in zip(boundaries, boundaries[1:]):
+                # Celah kosong cukup diwakili titik 0 di kedua tepinya
+                for ordinal in sorted({previous + 1, following - 1}):
+                    if previous < ordinal < following:
+                        ordinals.append(ordinal)
+                if following in active:
+                    ordinals.append(following)
+
+        series = {
+            "labels": [date.fromordinal(ordinal).isoformat() for ordinal in ordinals],
+            "revenue": [active.get(ordinal, (0, 0))[0] for ordinal in ordinals],
+            "orders": [active.get(ordinal, (0, 0))[1] for ordinal in ordinals]
+        }
+
+        total_points = len(series["labels"])
+        history = downsample_series(series, "revenue", max_points, x=ordinals)
+        history["total_points"] = total_points
+        history["downsampled"] = len(history["labels"]) < total_points
+        return history
+
+    def get_range_summary(self, start: Optional[date] = None, end: Optional[date] = None) -> Dict[str, Any]:
+        """Ringkasan & progres target untuk rentang tanggal [start, end] dalam O(1)"""
+        with self._write_lock:
+            start = start or self.day_index.first_day
+            end = end or self.day_index.last_day
+            totals = self.day_index.range_totals(start, end)
+
+        days = (end - start).days + 1 if start and end and end >= start else 0
+        revenue = totals["revenue"]
+        orders = totals["orders"]
+        metrics = self.config.get('performance_metrics', {})
+        target_daily_income = metrics.get('target_daily_income', 0)
+        target_weekly_orders = metrics.get('target_weekly_orders', 0)
+
+        return {
+            "from": start.isoformat() if start else None,
+            "to": end.isoformat() if end else None,
+            "days": days,
+            "totals": totals,
+            "avg_order_value": revenue / orders if orders > 0 else 0,
+            "daily_average_income": totals["usable_income"] / days if days > 0 else 0,
+            "efficiency_ratio": (totals["usable_income"] / revenue * 100) if revenue > 0 else 0,
+            "targets": {
+                "target_income": target_daily_income * days,
+                "income_achievement": (totals["usable_income"] / (target_daily_income * days) * 100)
+                if target_daily_income and days else 0,
+                "target_orders": target_weekly_orders * days / 7,
+                "orders_achievement": (orders / (target_weekly_orders * days / 7) * 100)
+                if target_weekly_orders and days else 0
+            }
+        }
+
+    def simulate_targets(self, target_daily_income: Optional[float] = None,
+                         target_weekly_orders: Optional[float] = None,
+                         trials: int = TargetSimulator.DEFAULT_TRIALS) -> Dict[str, Any]:
+        """Peluang mencapai target (default: target di config) lewat simulasi Monte Carlo"""
+        metrics = self.config.get('performance_metrics', {})
+        if target_daily_income is None:
+            target_daily_income = metrics.get('target_daily_income', 0)
+        if target_weekly_orders is None:
+            target_weekly_orders = metrics.get('target_weekly_orders', 0)
+        usable_ratio = 1 - self.COMMISSION_RATE - self.SALDO_SAVINGS_RATE - self.BBM_SAVINGS_RATE - self.OLI_SAVINGS_RATE
+
+        simulator = self.target_simulator
+        with self._write_lock:
+            # Riwayat yang di-bootstrap bergantung pada hari ini, jadi tanggal ikut dalam versi cache
+            version = (self.instance_id, self.data_handler.data_version, date.today().isoformat())
+            key = simulator.cache_key(version, target_daily_income, target_weekly_orders, trials)
+            result = simulator.cached(key)
+            if result is not None:
+                return result
+            inputs = simulator.snapshot(self.day_index.first_day)
+
+        # Simulasi hanya memakai snapshot, jadi order baru tidak menunggu sampai selesai
+        return simulator.simulate(version, inputs, target_daily_income, target_weekly_orders, usable_ratio, trials)
+
+    def get_anomalies(self, limit: int = 50) -> Dict[str, Any]:
+        """Order yang ditandai mencurigakan oleh detektor anomali, terbaru dulu"""
+        with self._write_lock:
+            return {
+                "anomalies": self.anomaly_detector.get_anomalies(limit),
+                "total_flagged": len(self.anomaly_detector.flagged)
+            }
+
+    def get_heatmap(self, order_type: Optional[str] = None) -> Dict[str, Any]:
+        """Heatmap revenue/orders per hari x jam"""
+        with self._write_lock:
+            return self.heatmap.to_dict(order_type)
+
+    def get_hotspots(self, weekday: Optional[int] = None, order_type: Optional[str] = None,
+                     top: int = 5) -> Dict[str, Any]:
+        """Rekomendasi jam & jenis order dengan pendapatan per jam aktif terbaik"""
+        with self._write_lock:
+            matrix = self.hotspot_index.get_matrix(order_type)
+            type_totals = self.hotspot_index.get_type_totals()
+            result = self.ai_advisor.recommend_hotspots(matrix, type_totals, weekday, top)
+        result["order_type"] = order_type
+        return result
+
+    def get_period_comparison(self) -> Dict[str, Any]:
+        """Hari ini vs kemarin, minggu ini vs minggu lalu, bulan ini vs tahun lalu (sampai jam yang sama)"""
+        with self._write_lock:
+            return self.period_comparator.compare()
+
+    def get_history_level(self, year: Optional[str] = None, month: Optional[str] = None,
+                          day: Optional[str] = None) -> Dict[str, Any]:
+        """Riwayat per level tahun > bulan > hari > order, tanpa membaca seluruh CSV"""
+        with self._write_lock:
+            return self.data_handler.get_history_level(year, month, day)
+
     def get_all_data(self) -> List[Dict[str, Any]]:
         """Get all transaction data"""
         return self.data_handler.load_all_data()
@@ -123,13 +388,17 @@ class ExpertFinanceManager:
     def delete_orders(self, indices: List[int]) -> Dict[str, Any]:
         """Delete orders by indices"""
         try:
-            success = self.data_handler.delete_records(indices)
-            if not success:
-                return {"success": False, "message": "Gagal menghapus data"}
+            with self._write_lock:
+                success = self.data_handler.delete_records(indices)
+                if not success:
+                    return {"success": False, "message": "Gagal menghapus data"}
 
-            analytics = self.get_real_time_analytics()
-            insights = self.get_performance_insights()
-            ai_analysis = self.ai_advisor.analyze_performance(analytics)
+                self.schedule_advisor_refresh()
+                analytics = self.get_write_analytics()
+                self.publish_analytics_delta("orders_deleted", analytics)
+
+            insights = analytics.get('ai_analysis', [])
+            ai_analysis = [dict(insight) for insight in insights]
 
             return {
                 "success": True,
@@ -141,191 +410,381 @@ class ExpertFinanceManager:
         except Exception as e:
             return {"success": False, "message": f"Error: {str(e)}"}
 
-    def get_real_time_analytics(self) -> Dict[str, Any]:
-        """Get real-time analytics data"""
-        try:
-            data = self.get_all_data()
-            if not data:
-                return self.get_empty_analytics()
-
-            # Basic summary
-            total_orders = len(data)
-            total_revenue = sum(item['total_order'] for item in data)
-            total_net_income = sum(item['net_income'] for item in data)
-            total_usable_income = sum(item['usable_income'] for item in data)
-
-            # Time-based metrics
-            today = datetime.now().date()
-            today_str = today.isoformat()
-            
-            today_data = [item for item in data if item['display_date'] == today_str]
-            
-            weekly_data = []
-            for item in data:
-                try:
-                    item_date = datetime.strptime(item['display_date'], '%Y-%m-%d').date()
-                    if (today - item_date).days <= 7:
-                        weekly_data.append(item)
-                except ValueError:
-                    continue
-
-            # Performance metrics
-            efficiency_ratio = (total_usable_income / total_revenue * 100) if total_revenue > 0 else 0
-            performance_score = min(100, efficiency_ratio * 1.5)
-
-            # Daily analytics
-            daily_analytics = {}
-            for item in data:
-                date = item['display_date']
-                if date not in daily_analytics:
-                    daily_analytics[date] = {'revenue': 0, 'orders': 0, 'income': 0}
-                daily_analytics[date]['revenue'] += item['total_order']
-                daily_analytics[date]['orders'] += 1
-                daily_analytics[date]['income'] += item['usable_income']
-
-            # Order type analytics
-            order_analytics = {}
-            for item in data:
-                order_type = item['order_type']
-                if order_type not in order_analytics:
-                    order_analytics[order_type] = {'count': 0, 'revenue': 0, 'avg_value': 0}
-                order_analytics[order_type]['count'] += 1
-                order_analytics[order_type]['revenue'] += item['total_order']
-
-            for order_type in order_analytics:
-                if order_analytics[order_type]['count'] > 0:
-                    order_analytics[order_type]['avg_value'] = (
-                        order_analytics[order_type]['revenue'] / order_analytics[order_type]['count']
-                    )
-
-            # Financial breakdown
-            financial_breakdown = {
-                "Komisi Maxim": sum(item['commission'] for item in data),
-                "Tabungan Saldo": sum(item['saldo_savings'] for item in data),
-                "Tabungan BBM": sum(item['bbm_savings'] for item in data),
-                "Tabungan Oli": sum(item['oli_savings'] for item in data),
-                "Pendapatan Bersih": total_net_income,
-                "Pendapatan Siap Pakai": total_usable_income
-            }
+    def get_write_analytics(self) -> Dict[str, Any]:
+        """Analytics untuk respons add/delete (panggil di bawah `_write_lock`)
 
-            # AI Analysis
-            ai_analysis = self.ai_advisor.analyze_performance({
-                "summary": {
-                    "total_orders": total_orders,
-                    "total_revenue": total_revenue,
-                    "total_net_income": total_net_income,
-                    "total_usable_income": total_usable_income,
-                    "efficiency_ratio": efficiency_ratio,
-                    "performance_score": performance_score
-                },
-                "time_metrics": {
-                    "today_orders": len(today_data),
-                    "today_revenue": sum(item['total_order'] for item in today_data),
-                    "weekly_orders": len(weekly_data),
-                    "weekly_revenue": sum(item['total_order'] for item in weekly_data)
-                },
-                "daily_analytics": daily_analytics,
-                "order_analytics": order_analytics,
-                "financial_breakdown": financial_breakdown
-            })
-
-            # Financial tips
-            financial_tips = self.ai_advisor.generate_financial_tips({
-                "summary": {
-                    "total_orders": total_orders,
-                    "efficiency_ratio": efficiency_ratio
-                }
-            })
-
-            # Earnings prediction
-            earnings_prediction = self.ai_advisor.predict_earnings({
-                "daily_analytics": daily_analytics
-            })
-
-            # Chart data
-            chart_data = self.generate_chart_data(data, daily_analytics)
+        Section advisor (insight, tips, prediksi) adalah hasil advisor terakhir, jadi
+        latensi tulis tidak pernah termasuk kerja advisor. `advisor_pending` bernilai
+        true selama hitung ulangnya belum selesai; hasil baru menyusul lewat event SSE `advisor`.
+        """
+        analytics = self.get_real_time_analytics()
+        outputs = self.advisor_outputs
+        analytics["advisor_pending"] = outputs is None or outputs["version"] != self.get_advisor_version()
+        return analytics
 
-            return {
-                "summary": {
-                    "total_orders": total_orders,
-                    "total_revenue": total_revenue,
-                    "total_net_income": total_net_income,
-                    "total_usable_income": total_usable_income,
-                    "avg_order_value": total_revenue / total_orders if total_orders > 0 else 0,
-                    "efficiency_ratio": efficiency_ratio,
-                    "performance_score": performance_score
-                },
-                "time_metrics": {
-                    "today_orders": len(today_data),
-                    "today_revenue": sum(item['total_order'] for item in today_data),
-                    "weekly_orders": len(weekly_data),
-                    "weekly_revenue": sum(item['total_order'] for item in weekly_data)
-                },
-                "daily_analytics": daily_analytics,
-                "order_analytics": order_analytics,
-                "financial_breakdown": financial_breakdown,
-                "ai_analysis": ai_analysis,
-                "financial_tips": financial_tips,
-                "earnings_prediction": earnings_prediction,
-                "chart_data": chart_data
-            }
+    def publish_analytics_delta(self, reason: str, analytics: Dict[str, Any]):
+        """Push ringkasan analytics terbaru ke semua subscriber SSE"""
+        if self.event_broker.subscriber_count == 0:
+            return
+
+        self.event_broker.publish("analytics", self.build_analytics_delta(reason, analytics))
+
+    def build_analytics_delta(self, reason: str, analytics: Dict[str, Any]) -> Dict[str, Any]:
+        """Delta ringkas untuk dashboard: cukup angka header, bukan seluruh analytics"""
+        return {
+            "reason": reason,
+            "data_version": self.data_handler.data_version,
+            "summary": analytics.get("summary", {}),
+            "time_metrics": analytics.get("time_metrics", {}),
+            "timestamp": datetime.now().isoformat()
+        }
+
+    def resolve_analytics_fields(self, fields: Optional[Iterable[str]] = None) -> List[str]:
+        """Validasi daftar section yang diminta; None berarti semua section"""
+        if fields is None:
+            return list(self.ANALYTICS_SECTIONS)
+
+        requested = [field.strip() for field in fields if field and field.strip()]
+        unknown = [field for field in requested if field not in self.ANALYTICS_SECTIONS]
+        if unknown:
+            raise ValueError(f"Unknown analytics fields: {', '.join(unknown)}")
+
+        # Pertahankan urutan kanonik dan buang duplikat
+        return [section for section in self.ANALYTICS_SECTIONS if section in requested]
+
+    def get_real_time_analytics(self, fields: Optional[Iterable[str]] = None,
+                                max_points: Optional[int] = None, as_of: Optional[date] = None,
+                                as_of_mode: str = "occurred") -> Dict[str, Any]:
+        """Get real-time analytics data
+
+        Hanya section di `fields` (beserta agregasi yang dibutuhkannya) yang dihitung.
+        Semua section dibaca dari rollup, jadi biayanya sebanding jumlah hari, bukan jumlah order.
+        Dengan `max_points`, chart_data juga berisi `revenue_history` seluruh riwayat (downsampled).
+        Dengan `as_of` (tanggal lampau), analytics dihitung seperti pada akhir hari tersebut:
+        `as_of_mode="occurred"` memotong per tanggal order (termasuk order bertanggal mundur
+        yang dicatat setelah `as_of`), `"entered"` hanya order yang sudah dicatat s.d. akhir
+        `as_of` (seperti dashboard malam itu; dari rollup tanggal pencatatan, tanpa baca CSV).
+        """
+        if as_of_mode not in HistoricalView.MODES:
+            raise ValueError(f"Unknown as_of_mode: {as_of_mode}")
+        requested = self.resolve_analytics_fields(fields)
+        try:
+            with self._write_lock:
+                if as_of is not None and as_of < datetime.now().date():
+                    view = self.build_entered_view(as_of) if as_of_mode == "entered" else self.historical_view
+                    return self.build_historical_sections(requested, as_of, max_points, view)
+                return self.build_analytics_sections(requested, max_points)
         except Exception as e:
             print(f"❌ Error in get_real_time_analytics: {e}")
-            return self.get_empty_analytics()
+            empty = self.get_empty_analytics()
+            return {section_name: empty[section_name] for section_name in requested}
+
+    def attach_advisor_scheduler(self, scheduler):
+        """Pakai worker background untuk output advisor; tanpa scheduler dihitung inline"""
+        self.advisor_scheduler = scheduler
+        scheduler.register(self)
+
+    def get_advisor_version(self) -> Tuple[str, str]:
+        # Insight & tips berubah seiring jam walau data tetap
+        return self.get_version_tag(), datetime.now().strftime("%Y%m%d%H")
+
+    def schedule_advisor_refresh(self):
+        if self.advisor_scheduler is not None:
+            self.advisor_scheduler.schedule(self)
+
+    def get_advisor_outputs(self) -> Dict[str, Any]:
+        """Hasil advisor terakhir; jika sudah usang, hitung ulang dijadwalkan tanpa ditunggu"""
+        outputs = self.advisor_outputs
+        if outputs is not None and outputs["version"] == self.get_advisor_version():
+            return outputs
+        if self.advisor_scheduler is None:
+            return self.refresh_advisor_outputs()
+
+        self.advisor_scheduler.schedule(self)
+        if outputs is None:
+            # Hitungan pertama belum selesai
+            empty = self.get_empty_analytics()
+            return {section: empty[section] for section in self.ADVISOR_SECTIONS}
+        return outputs
+
+    def refresh_advisor_outputs(self) -> Dict[str, Any]:
+        """Hitung ulang insight, tips & prediksi (dipanggil oleh AdvisorScheduler)
+
+        Input advisor disalin di bawah `_write_lock`, perhitungannya di luar lock
+        supaya order baru tidak menunggu worker advisor.
+        """
+        with self._write_lock:
+            version = self.get_advisor_version()
+            if self.advisor_outputs is not None and self.advisor_outputs["version"] == version:
+                return self.advisor_outputs
+            self.advisor_snapshot_sequence += 1
+            snapshot_sequence = self.advisor_snapshot_sequence
+            inputs = self.snapshot_advisor_inputs()
+
+        outputs = self.build_advisor_outputs(inputs, version)
+
+        with self._write_lock:
+            # Refresh lain dengan snapshot lebih baru sudah selesai duluan: hasil ini dibuang
+            if snapshot_sequence < self.advisor_published_snapshot:
+                return self.advisor_outputs
+            outputs["version"] = version
+            self.advisor_published_snapshot = snapshot_sequence
+            self.advisor_sequence += 1
+            self.advisor_outputs = outputs
+
+        if self.event_broker.subscriber_count > 0:
+            event = {section: outputs[section] for section in self.ADVISOR_SECTIONS}
+            event["advisor_sequence"] = self.advisor_sequence
+            self.event_broker.publish("advisor", event)
+        return outputs
+
+    def snapshot_advisor_inputs(self) -> Optional[Dict[str, Any]]:
+        """Salinan section & state yang dibaca advisor (panggil di bawah `_write_lock`)"""
+        if self.rollups.totals["orders"] <= 0:
+            return None
+
+        inputs = self.build_analytics_sections(
+            ["summary", "time_metrics", "daily_analytics", "order_analytics", "period_comparison"],
+            precomputed=False
+        )
+        inputs["daily_count"] = len(self.rollups.get_level("day"))
+        heatmap = self.heatmap.get_matrix()
+        inputs["heatmap"] = {key: [list(row) for row in rows] for key, rows in heatmap.items()}
+        inputs["forecaster"] = self.forecaster.snapshot() \
+            if self.config.get('forecast_model', 'holt_winters') == 'holt_winters' else None
+        return inputs
+
+    def build_advisor_outputs(self, inputs: Optional[Dict[str, Any]], version: Tuple[str, str]) -> Dict[str, Any]:
+        """Insight, tips & prediksi dari snapshot `snapshot_advisor_inputs` (tanpa lock)"""
+        if inputs is None:
+            empty = self.get_empty_analytics()
+            return {section: empty[section] for section in self.ADVISOR_SECTIONS}
 
-    def generate_chart_data(self, data: List[Dict], daily_analytics: Dict) -> Dict[str, Any]:
-        """Generate chart data untuk visualisasi"""
-        if not data:
-            return self.get_empty_chart_data()
+        return {
+            "ai_analysis": self.ai_advisor.analyze_performance({
+                "summary": inputs["summary"],
+                "time_metrics": inputs["time_metrics"],
+                "order_analytics": inputs["order_analytics"],
+                "daily_count": inputs["daily_count"],
+                "period_comparison": inputs["period_comparison"]
+            }, version=version),
+            "financial_tips": self.ai_advisor.generate_financial_tips({
+                "summary": inputs["summary"],
+                "heatmap": inputs["heatmap"]
+            }),
+            "earnings_prediction": self.ai_advisor.predict_earnings(
+                {"daily_analytics": inputs["daily_analytics"]}, forecaster=inputs["forecaster"]
+            )
+        }
 
-        try:
-            # Revenue trend - last 7 days
-            dates = sorted(daily_analytics.keys())[-7:]
-            revenue_trend = {
-                "labels": dates,
-                "data": [daily_analytics[date]['revenue'] for date in dates]
-            }
+    def build_analytics_sections(self, requested: List[str], max_points: Optional[int] = None,
+                                 precomputed: bool = True) -> Dict[str, Any]:
+        """Section analytics; dengan `precomputed`, section advisor dibaca dari hasil background"""
+        totals = self.rollups.totals
+        if totals["orders"] <= 0:
+            empty = self.get_empty_analytics()
+            return {section: empty[section] for section in requested}
+
+        day_rollup = self.rollups.get_level("day")
+        computed: Dict[str, Any] = {}
+
+        def section(name: str) -> Any:
+            if name not in computed:
+                computed[name] = builders[name]()
+            return computed[name]
+
+        builders: Dict[str, Callable[[], Any]] = {
+            "summary": lambda: self.build_summary(totals),
+            "time_metrics": lambda: self.build_time_metrics(),
+            "daily_analytics": lambda: self.build_daily_analytics(day_rollup),
+            "order_analytics": lambda: self.build_order_analytics(totals["by_type"]),
+            "financial_breakdown": lambda: self.build_financial_breakdown(totals),
+            "ai_analysis": lambda: self.build_ai_analysis(section, len(day_rollup)),
+            "financial_tips": lambda: self.ai_advisor.generate_financial_tips({
+                "summary": section("summary"),
+                "heatmap": self.heatmap.get_matrix()
+            }),
+            "earnings_prediction": lambda: self.ai_advisor.predict_earnings(
+                {"daily_analytics": section("daily_analytics")},
+                forecaster=self.forecaster if self.config.get('forecast_model', 'holt_winters') == 'holt_winters' else None
+            ),
+            "chart_data": lambda: self.build_chart_data(max_points),
+            "order_value_quantiles": lambda: self.order_value_sketches.to_dict(),
+            "period_comparison": lambda: self.period_comparator.compare()
+        }
 
-            # Order types distribution
-            order_types = {}
-            for item in data:
-                order_type = item['order_type']
-                if order_type not in order_types:
-                    order_types[order_type] = 0
-                order_types[order_type] += 1
-
-            order_types_chart = {
-                "labels": list(order_types.keys()),
-                "data": list(order_types.values())
-            }
+        if precomputed:
+            for name in self.ADVISOR_SECTIONS:
+                builders[name] = lambda name=name: self.get_advisor_outputs()[name]
+
+        return {name: section(name) for name in requested}
+
+    def build_entered_view(self, as_of: date) -> HistoricalView:
+        """HistoricalView atas order yang timestamp pencatatannya (Tanggal & Jam) s.d. akhir `as_of`
+
+        Rollup harian live dikoreksi dengan `EntryDateRollup` (order yang dicatat di hari
+        lain), lalu rollup & prefix index sementara dibangun dari hasilnya: O(jumlah hari
+        + pasangan tanggal), tanpa membaca CSV. Quantile memakai sketch bulanan live dan
+        perbandingan periode memakai hari penuh (tanpa time index). Disimpan untuk versi
+        data yang sama.
+        """
+        key = (self.get_version_tag(), as_of.isoformat())
+        if self.entered_view is not None and self.entered_view[0] == key:
+            return self.entered_view[1]
+
+        rollups = RollupStore(self.rollups.rollup_dir, engine=self.rollups.engine)
+        rollups.build_from_days(self.entry_dates.day_buckets(as_of.isoformat()), self.rollups.totals["by_type"])
+        day_index = DayPrefixIndex()
+        day_index.build_from_rollup(rollups.get_level("day"))
+
+        view = HistoricalView(rollups, day_index, self.order_value_sketches, None)
+        self.entered_view = (key, view)
+        return view
+
+    def build_historical_sections(self, requested: List[str], as_of: date, max_points: Optional[int] = None,
+                                  view: Optional[HistoricalView] = None) -> Dict[str, Any]:
+        """Section analytics seperti pada akhir hari `as_of`, dari rollup (lihat HistoricalView)"""
+        view = view or self.historical_view
+        totals = view.totals(as_of)
+        if totals["orders"] <= 0:
+            empty = self.get_empty_analytics()
+            return {section: empty[section] for section in requested}
+
+        day_rollup = view.day_rollup(as_of)
+        # Output advisor bergantung jam: pakai akhir hari `as_of`
+        now = datetime.combine(as_of, datetime.max.time()).replace(microsecond=0)
+        computed: Dict[str, Any] = {}
+
+        def section(name: str) -> Any:
+            if name not in computed:
+                computed[name] = builders[name]()
+            return computed[name]
+
+        def chart_data() -> Dict[str, Any]:
+            chart = view.chart_data(totals, day_rollup)
+            if max_points:
+                chart["revenue_history"] = self.get_revenue_history(max_points, end=as_of, view=view)
+            return chart
+
+        builders: Dict[str, Callable[[], Any]] = {
+            "summary": lambda: self.build_summary(totals),
+            "time_metrics": lambda: view.time_metrics(as_of),
+            "daily_analytics": lambda: self.build_daily_analytics(day_rollup),
+            # Sketch per jenis order tidak bisa dipotong waktu, jadi tanpa percentile
+            "order_analytics": lambda: self.build_order_analytics(totals["by_type"], percentiles=False),
+            "financial_breakdown": lambda: self.build_financial_breakdown(totals),
+            "ai_analysis": lambda: self.ai_advisor.analyze_performance({
+                "summary": section("summary"),
+                "time_metrics": section("time_metrics"),
+                "order_analytics": section("order_analytics"),
+                "period_comparison": section("period_comparison"),
+                "now": now
+            }),
+            "financial_tips": lambda: self.ai_advisor.generate_financial_tips({
+                "summary": section("summary"),
+                "now": now
+            }),
+            "earnings_prediction": lambda: self.ai_advisor.predict_earnings(
+                {"daily_analytics": section("daily_analytics")},
+                forecaster=view.forecaster(as_of, day_rollup)
+                if self.config.get('forecast_model', 'holt_winters') == 'holt_winters' else None
+            ),
+            "chart_data": chart_data,
+            "order_value_quantiles": lambda: view.order_value_quantiles(as_of),
+            "period_comparison": lambda: view.period_comparator.compare(now)
+        }
 
-            # Income breakdown
-            total_commission = sum(item['commission'] for item in data)
-            total_savings = sum(item['saldo_savings'] + item['bbm_savings'] + item['oli_savings'] for item in data)
-            total_net = sum(item['net_income'] for item in data)
+        return {name: section(name) for name in requested}
+
+    def build_ai_analysis(self, section: Callable[[str], Any], day_count: int) -> List[Dict[str, Any]]:
+        """Insight dari rule engine, di-memo per versi data & jam (proyeksi hari ini bergantung jam)"""
+        version = self.get_advisor_version()
+        cached = self.ai_advisor.get_cached_insights(version)
+        if cached is not None:
+            return cached
+
+        return self.ai_advisor.analyze_performance({
+            "summary": section("summary"),
+            "time_metrics": section("time_metrics"),
+            "order_analytics": section("order_analytics"),
+            # Trend: hari ini vs kemarin sampai jam yang sama, bukan dua tanggal tercatat terakhir
+            "daily_count": day_count,
+            "period_comparison": section("period_comparison")
+        }, version=version)
+
+    def build_chart_data(self, max_points: Optional[int] = None) -> Dict[str, Any]:
+        chart_data = self.chart_series.to_dict()
+        if max_points:
+            chart_data["revenue_history"] = self.get_revenue_history(max_points)
+        return chart_data
+
+    def build_summary(self, totals: Dict[str, Any]) -> Dict[str, Any]:
+        """Ringkasan performa dari rollup total"""
+        total_orders = totals["orders"]
+        total_revenue = totals["revenue"]
+        total_usable_income = totals["income"]
+
+        efficiency_ratio = (total_usable_income / total_revenue * 100) if total_revenue > 0 else 0
+        performance_score = min(100, efficiency_ratio * 1.5)
 
-            income_breakdown = {
-                "labels": ["Komisi", "Tabungan", "Pendapatan Bersih"],
-                "data": [total_commission, total_savings, total_net]
-            }
+        return {
+            "total_orders": total_orders,
+            "total_revenue": total_revenue,
+            "total_net_income": totals["net_income"],
+            "total_usable_income": total_usable_income,
+            "avg_order_value": total_revenue / total_orders if total_orders > 0 else 0,
+            "efficiency_ratio": efficiency_ratio,
+            "performance_score": performance_score
+        }
 
-            # Daily performance (last 5 days)
-            recent_dates = sorted(daily_analytics.keys())[-5:]
-            daily_performance = {
-                "labels": recent_dates,
-                "revenue": [daily_analytics[date]['revenue'] for date in recent_dates],
-                "orders": [daily_analytics[date]['orders'] for date in recent_dates]
-            }
+    def build_time_metrics(self) -> Dict[str, Any]:
+        """Metrik hari ini, 7 hari terakhir, dan rolling 7/30/90 hari"""
+        today = datetime.now().date()
+        today_totals = self.day_index.range_totals(today, today)
+        # Sama seperti sebelumnya: tanggal custom di masa depan ikut terhitung mingguan
+        weekly_totals = self.day_index.range_totals(today - timedelta(days=7), None)
 
-            return {
-                "revenue_trend": revenue_trend,
-                "order_types": order_types_chart,
-                "income_breakdown": income_breakdown,
-                "daily_performance": daily_performance
+        return {
+            "today_orders": today_totals["orders"],
+            "today_revenue": today_totals["revenue"],
+            "weekly_orders": weekly_totals["orders"],
+            "weekly_revenue": weekly_totals["revenue"],
+            "rolling": self.rolling_metrics.to_dict()
+        }
+
+    def build_daily_analytics(self, day_rollup: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+        """Agregasi harian per display_date"""
+        return {
+            date: {'revenue': bucket['revenue'], 'orders': bucket['orders'], 'income': bucket['income']}
+            for date, bucket in day_rollup.items()
+        }
+
+    def build_order_analytics(self, by_type: Dict[str, Dict[str, Any]],
+                              percentiles: bool = True) -> Dict[str, Dict[str, float]]:
+        """Agregasi per jenis order"""
+        order_analytics = {}
+        for order_type, values in by_type.items():
+            count = values['count']
+            order_analytics[order_type] = {
+                'count': count,
+                'revenue': values['revenue'],
+                'avg_value': values['revenue'] / count if count > 0 else 0
             }
-        except Exception as e:
-            print(f"❌ Error generating chart data: {e}")
-            return self.get_empty_chart_data()
+            # Median & tail dari sketch, tidak mudah terdistorsi order Corporate besar
+            if percentiles:
+                order_analytics[order_type].update(self.order_value_sketches.get_percentiles(order_type=order_type))
+        return order_analytics
+
+    def build_financial_breakdown(self, totals: Dict[str, Any]) -> Dict[str, float]:
+        """Breakdown komponen finansial"""
+        return {
+            "Komisi Maxim": totals["commission"],
+            "Tabungan Saldo": totals["saldo_savings"],
+            "Tabungan BBM": totals["bbm_savings"],
+            "Tabungan Oli": totals["oli_savings"],
+            "Pendapatan Bersih": totals["net_income"],
+            "Pendapatan Siap Pakai": totals["income"]
+        }
 
     def get_empty_analytics(self) -> Dict[str, Any]:
         """Return empty analytics structure"""
@@ -343,7 +802,8 @@ class ExpertFinanceManager:
                 "today_orders": 0,
                 "today_revenue": 0,
                 "weekly_orders": 0,
-                "weekly_revenue": 0
+                "weekly_revenue": 0,
+                "rolling": self.rolling_metrics.to_dict()
             },
             "daily_analytics": {},
             "order_analytics": {},
@@ -358,7 +818,9 @@ class ExpertFinanceManager:
             "ai_analysis": [],
             "financial_tips": [],
             "earnings_prediction": {"prediction": 0, "confidence": "low", "daily_average": 0},
-            "chart_data": self.get_empty_chart_data()
+            "chart_data": self.get_empty_chart_data(),
+            "order_value_quantiles": {"overall": {"p50": 0, "p90": 0, "p99": 0}, "by_type": {}, "by_month": {}},
+            "period_comparison": self.period_comparator.compare()
         }
 
     def get_empty_chart_data(self) -> Dict[str, Any]:
@@ -373,7 +835,7 @@ class ExpertFinanceManager:
     def get_performance_insights(self) -> List[Dict[str, Any]]:
         """Get expert performance insights"""
         try:
-            analytics = self.get_real_time_analytics()
+            analytics = self.get_real_time_analytics(fields=["ai_analysis"])
             return analytics.get('ai_analysis', [])
         except:
             return []
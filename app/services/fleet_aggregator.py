@@ -0,0 +1,165 @@
+import hashlib
+import heapq
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Optional, Tuple
+
+# Absolute imports
+import sys
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from app.services.data_handler import DataHandler
+from app.services.order_value_sketches import OrderValueSketches
+from app.services.rollup_store import RollupStore
+from app.utils.quantile_sketch import KLLSketch
+
+def build_driver_partial(driver_id: str, data_dir: str) -> Dict[str, Any]:
+    """Agregat parsial satu driver (dijalankan di worker process)
+
+    Memakai rollup & sketch tersimpan jika masih cocok dengan CSV; kalau tidak,
+    dibangun dari CSV tanpa menulis balik ke disk (itu tugas manager driver).
+    """
+    data_handler = DataHandler(
+        data_file=os.path.join(data_dir, 'riwayat_orderan.csv'),
+        config_file=os.path.join(data_dir, 'config.json')
+    )
+    rollup_dir = os.path.join(data_dir, 'rollups')
+    rollups = RollupStore(rollup_dir)
+    sketches = OrderValueSketches(rollup_dir)
+
+    signature = data_handler.get_file_signature()
+    stale = [listener for listener in (rollups, sketches) if not listener.restore(signature)]
+    if stale:
+        for listener in stale:
+            listener.reset()
+        data_handler.feed_listeners(stale, data_handler.iter_records())
+
+    return {
+        "driver_id": driver_id,
+        "signature": signature,
+        "totals": rollups.totals,
+        "sketch": sketches.merged().to_dict(),
+        "type_sketches": {key: sketch.to_dict() for key, sketch in sketches.by_type.items()}
+    }
+
+class FleetAggregator:
+    """Total, leaderboard dan komposisi jenis order untuk seluruh driver
+
+    Partial per driver dihitung paralel di process pool lalu di-merge. Partial
+    disimpan per versi CSV driver, jadi hanya driver yang datanya berubah yang
+    dihitung ulang; hasil merge di-cache sampai ada partisi yang berubah.
+    """
+
+    def __init__(self, tenant_registry, max_workers: Optional[int] = None):
+        self.tenant_registry = tenant_registry
+        self.max_workers = max_workers or min(8, os.cpu_count() or 1)
+        self.partials: Dict[str, Dict[str, Any]] = {}
+        self.cached_key: Optional[Tuple] = None
+        self.cached_result: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    def get_partition_versions(self) -> Dict[str, Dict[str, Any]]:
+        """Signature CSV setiap driver, termasuk yang tidak sedang dimuat"""
+        versions = {}
+        for driver_id in self.tenant_registry.list_driver_ids():
+            data_file = os.path.join(self.tenant_registry.data_dir_for(driver_id), 'riwayat_orderan.csv')
+            versions[driver_id] = DataHandler(data_file=data_file).get_file_signature()
+        return versions
+
+    def get_version_tag(self, versions: Dict[str, Dict[str, Any]]) -> str:
+        key = tuple(sorted((driver_id, sig["size"], sig["mtime_ns"]) for driver_id, sig in versions.items()))
+        # hash() di-salt per proses; digest harus stabil antar restart & worker agar 304 tetap jalan
+        return hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:16]
+
+    def refresh_partials(self, versions: Dict[str, Dict[str, Any]]):
+        """Hitung ulang partial driver yang signature-nya berubah"""
+        for driver_id in list(self.partials):
+            if driver_id not in versions:
+                del self.partials[driver_id]
+
+        stale = [
+            driver_id for driver_id, signature in versions.items()
+            if self.partials.get(driver_id, {}).get("signature") != signature
+        ]
+        if not stale:
+            return
+
+        jobs = [(driver_id, self.tenant_registry.data_dir_for(driver_id)) for driver_id in stale]
+        if len(jobs) == 1:
+            results = [build_driver_partial(*jobs[0])]
+        else:
+            # spawn: fork dari server multi-thread bisa mewarisi lock yang sedang dipegang
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(jobs)), mp_context=context) as pool:
+                results = list(pool.map(build_driver_partial, *zip(*jobs)))
+
+        for partial in results:
+            self.partials[partial["driver_id"]] = partial
+
+    def merge(self, top: int) -> Dict[str, Any]:
+        """Gabungkan semua partial: jumlah, sketch KLL, dan top-k driver"""
+        totals = {field: 0 for field in RollupStore.VALUE_FIELDS}
+        by_type: Dict[str, Dict[str, Any]] = {}
+        overall_sketch = KLLSketch()
+        type_sketches: Dict[str, KLLSketch] = {}
+        drivers = []
+
+        for driver_id in sorted(self.partials):
+            partial = self.partials[driver_id]
+            driver_totals = partial["totals"]
+            for field in RollupStore.VALUE_FIELDS:
+                totals[field] += driver_totals[field]
+            for order_type, stats in driver_totals["by_type"].items():
+                merged = by_type.setdefault(order_type, {"count": 0, "revenue": 0})
+                merged["count"] += stats["count"]
+                merged["revenue"] += stats["revenue"]
+
+            overall_sketch.merge(KLLSketch.from_dict(partial["sketch"]))
+            for order_type, sketch in partial["type_sketches"].items():
+                type_sketches.setdefault(order_type, KLLSketch()).merge(KLLSketch.from_dict(sketch))
+
+            drivers.append({
+                "driver_id": driver_id,
+                "revenue": driver_totals["revenue"],
+                "orders": driver_totals["orders"],
+                "net_income": driver_totals["net_income"],
+                "income": driver_totals["income"]
+            })
+
+        total_orders = totals["orders"]
+        order_mix = {
+            order_type: {
+                "count": stats["count"],
+                "revenue": stats["revenue"],
+                "share": stats["count"] / total_orders if total_orders > 0 else 0,
+                "quantiles": type_sketches[order_type].percentiles() if order_type in type_sketches else None
+            }
+            for order_type, stats in sorted(by_type.items())
+        }
+
+        return {
+            "driver_count": len(drivers),
+            "active_drivers": sum(1 for driver in drivers if driver["orders"] > 0),
+            "totals": totals,
+            "avg_order_value": totals["revenue"] / total_orders if total_orders > 0 else 0,
+            "order_mix": order_mix,
+            "order_value_quantiles": overall_sketch.percentiles(),
+            "leaderboard": {
+                "revenue": heapq.nlargest(top, drivers, key=lambda driver: driver["revenue"]),
+                "orders": heapq.nlargest(top, drivers, key=lambda driver: driver["orders"])
+            }
+        }
+
+    def get_fleet_summary(self, top: int = 10, versions: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+        with self._lock:
+            versions = versions if versions is not None else self.get_partition_versions()
+            key = (self.get_version_tag(versions), top)
+            if key != self.cached_key:
+                self.refresh_partials(versions)
+                self.cached_result = self.merge(top)
+                self.cached_key = key
+            return self.cached_result
@@ -0,0 +1,138 @@
+from datetime import date, timedelta
+from typing import Dict, Any, List
+
+# Absolute imports
+import os
+import sys
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from app.services.forecaster import HoltWintersForecaster
+from app.services.period_comparator import PeriodComparator
+from app.services.rolling_metrics import RollingMetrics
+from app.utils.quantile_sketch import KLLSketch
+
+class HistoricalView:
+    """Section analytics "as of" tanggal lampau, dibangun dari rollup tanpa membaca CSV
+
+    Mode `occurred` (view atas rollup live): tanggal mengikuti waktu kejadian
+    (display_date), semua order s.d. `as_of` termasuk order bertanggal custom
+    yang dicatat belakangan. Mode `entered` memakai view yang sama di atas
+    rollup sementara berisi order yang sudah dicatat s.d. akhir `as_of`, dibangun
+    dari rollup tanggal pencatatan (lihat `ExpertFinanceManager.build_entered_view`).
+    Total berasal dari rollup bulanan + harian bulan terakhir, window
+    hari/minggu/rolling dari prefix index, dan quantile dari sketch bulanan
+    (granularitas bulan; kedua mode memakai sketch yang sama).
+    """
+
+    MODES = ("occurred", "entered")
+    TREND_DAYS = 7
+    PERFORMANCE_DAYS = 5
+
+    def __init__(self, rollups, day_index, order_value_sketches, time_index):
+        self.rollups = rollups
+        self.day_index = day_index
+        self.order_value_sketches = order_value_sketches
+        self.period_comparator = PeriodComparator(day_index, time_index)
+
+    def add_bucket(self, totals: Dict[str, Any], bucket: Dict[str, Any]):
+        for field in self.rollups.VALUE_FIELDS:
+            totals[field] += bucket[field]
+        for order_type, values in bucket["by_type"].items():
+            target = totals["by_type"].setdefault(order_type, {"count": 0, "revenue": 0})
+            target["count"] += values["count"]
+            target["revenue"] += values["revenue"]
+
+    def totals(self, as_of: date) -> Dict[str, Any]:
+        """Total seperti `RollupStore.totals`, tapi hanya order s.d. `as_of`"""
+        month = as_of.isoformat()[:7]
+        totals = self.rollups.empty_bucket()
+        for key, bucket in sorted(self.rollups.get_level("month").items()):
+            if key < month:
+                self.add_bucket(totals, bucket)
+        # Bulan `as_of` sendiri: paling banyak 31 bucket harian
+        for day in range(1, as_of.day + 1):
+            bucket = self.rollups.get_day(f"{month}-{day:02d}")
+            if bucket:
+                self.add_bucket(totals, bucket)
+
+        for field in self.rollups.VALUE_FIELDS:
+            totals[field] = round(totals[field], 6)
+        return totals
+
+    def day_rollup(self, as_of: date) -> Dict[str, Dict[str, Any]]:
+        day_key = as_of.isoformat()
+        return {key: bucket for key, bucket in self.rollups.get_level("day").items() if key <= day_key}
+
+    def time_metrics(self, as_of: date) -> Dict[str, Any]:
+        today_totals = self.day_index.range_totals(as_of, as_of)
+        weekly_totals = self.day_index.range_totals(as_of - timedelta(days=7), as_of)
+
+        rolling = {}
+        for window in RollingMetrics.WINDOWS:
+            sums = self.day_index.range_totals(as_of - timedelta(days=window - 1), as_of)
+            revenue = round(sums["revenue"], 6)
+            orders = sums["orders"]
+            rolling[f"{window}d"] = {
+                "revenue": revenue,
+                "orders": orders,
+                "avg_order_value": revenue / orders if orders > 0 else 0,
+                "daily_average_revenue": revenue / window
+            }
+
+        return {
+            "today_orders": today_totals["orders"],
+            "today_revenue": today_totals["revenue"],
+            "weekly_orders": weekly_totals["orders"],
+            "weekly_revenue": weekly_totals["revenue"],
+            "rolling": rolling
+        }
+
+    def chart_data(self, totals: Dict[str, Any], day_rollup: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Format sama dengan `ChartSeries.to_dict`"""
+        days: List[str] = sorted(day_rollup)[-self.TREND_DAYS:]
+        recent_days = days[-self.PERFORMANCE_DAYS:]
+        # Urutan label mengikuti urutan jenis order pertama muncul di CSV, sama seperti ChartSeries
+        first_seen = list(self.rollups.totals["by_type"])
+        by_type = {
+            key: totals["by_type"][key]["count"]
+            for key in sorted(totals["by_type"], key=lambda key: first_seen.index(key) if key in first_seen else len(first_seen))
+            if totals["by_type"][key]["count"] > 0
+        }
+        return {
+            "revenue_trend": {"labels": days, "data": [day_rollup[day]["revenue"] for day in days]},
+            "order_types": {"labels": list(by_type), "data": list(by_type.values())},
+            "income_breakdown": {
+                "labels": ["Komisi", "Tabungan", "Pendapatan Bersih"],
+                "data": [totals["commission"], totals["savings"], totals["net_income"]]
+            },
+            "daily_performance": {
+                "labels": recent_days,
+                "revenue": [day_rollup[day]["revenue"] for day in recent_days],
+                "orders": [day_rollup[day]["orders"] for day in recent_days]
+            }
+        }
+
+    def forecaster(self, as_of: date, day_rollup: Dict[str, Dict[str, Any]]) -> HoltWintersForecaster:
+        """Holt-Winters yang dilipat s.d. sehari sebelum `as_of`, seperti forecaster live pada hari itu"""
+        forecaster = HoltWintersForecaster()
+        if day_rollup:
+            first = date.fromisoformat(min(day_rollup)).toordinal()
+            for ordinal in range(first, as_of.toordinal()):
+                bucket = day_rollup.get(date.fromordinal(ordinal).isoformat())
+                forecaster.fold(ordinal, bucket["revenue"] if bucket else 0.0)
+        return forecaster
+
+    def order_value_quantiles(self, as_of: date) -> Dict[str, Any]:
+        """Quantile dari sketch bulanan s.d. bulan `as_of`; sketch per jenis order tidak bisa dipotong waktu"""
+        month = as_of.isoformat()[:7]
+        months = {key: sketch for key, sketch in self.order_value_sketches.by_month.items() if key <= month}
+        merged = KLLSketch(self.order_value_sketches.k)
+        for sketch in months.values():
+            merged.merge(sketch)
+        return {
+            "overall": merged.percentiles(),
+            "by_type": {},
+            "by_month": {key: months[key].percentiles() for key in sorted(months)}
+        }
@@ -0,0 +1,189 @@
+import bisect
+import json
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+# Absolute imports
+import os
+import sys
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from app.utils.helpers import get_record_datetime
+
+class HotspotIndex:
+    """Revenue per jam kerja aktif, per hari x jam dan per jenis order
+
+    Jeda dari order sebelumnya dianggap waktu kerja untuk mendapat order itu,
+    dibatasi `MAX_GAP_MINUTES`; jeda lebih panjang berarti driver sedang off,
+    sehingga order pertama sesi dihitung `SESSION_START_MINUTES`. Order disimpan
+    terurut waktu, jadi insert/hapus hanya mengubah jeda order sesudahnya.
+
+    Matriks disimpan ke disk; daftar order saat restart dibangun dari seri per
+    jenis milik TimeIndex yang sudah dimuat, jadi CSV tidak perlu dibaca.
+    """
+
+    ALL_TYPES = "__all__"
+    MAX_GAP_MINUTES = 90
+    SESSION_START_MINUTES = 15
+
+    def __init__(self, rollup_dir: Optional[str] = None, time_index: Optional[Any] = None):
+        self.rollup_dir = rollup_dir
+        # TimeIndex harus didaftarkan (dan di-restore) sebelum index ini
+        self.time_index = time_index
+        self.reset()
+
+    def reset(self):
+        # Terurut (waktu, total_order, jenis order)
+        self.events: List[Tuple[datetime, float, str]] = []
+        self.matrices: Dict[str, Dict[str, List[List[float]]]] = {}
+        self.type_totals: Dict[str, Dict[str, float]] = {}
+
+    def empty_matrix(self) -> Dict[str, List[List[float]]]:
+        return {
+            "revenue": [[0.0] * 24 for _ in range(7)],
+            "orders": [[0] * 24 for _ in range(7)],
+            "active_minutes": [[0.0] * 24 for _ in range(7)]
+        }
+
+    def wait_minutes(self, index: int) -> float:
+        """Waktu kerja yang diatribusikan ke event ke-`index`"""
+        if index == 0:
+            return self.SESSION_START_MINUTES
+        gap = (self.events[index][0] - self.events[index - 1][0]).total_seconds() / 60
+        return gap if gap <= self.MAX_GAP_MINUTES else self.SESSION_START_MINUTES
+
+    def apply(self, event: Tuple[datetime, float, str], revenue: float, orders: int, minutes: float):
+        moment, _, order_type = event
+        weekday, hour = moment.weekday(), moment.hour
+        for key in (self.ALL_TYPES, order_type):
+            matrix = self.matrices.get(key)
+            if matrix is None:
+                matrix = self.matrices[key] = self.empty_matrix()
+            matrix["revenue"][weekday][hour] = round(matrix["revenue"][weekday][hour] + revenue, 6)
+            matrix["orders"][weekday][hour] += orders
+            matrix["active_minutes"][weekday][hour] = round(matrix["active_minutes"][weekday][hour] + minutes, 6)
+
+            totals = self.type_totals.setdefault(key, {"revenue": 0.0, "orders": 0, "active_minutes": 0.0})
+            totals["revenue"] = round(totals["revenue"] + revenue, 6)
+            totals["orders"] += orders
+            totals["active_minutes"] = round(totals["active_minutes"] + minutes, 6)
+
+    def to_event(self, record: Dict[str, Any]) -> Tuple[datetime, float, str]:
+        return get_record_datetime(record), record['total_order'], record['order_type']
+
+    def add(self, record: Dict[str, Any]):
+        self.insert(self.to_event(record))
+
+    def add_batch(self, records: List[Dict[str, Any]]):
+        """Batch kecil di-insert satu per satu; batch besar (replay/import) digabung,
+        diurutkan sekali, lalu matriks dihitung ulang O(n)"""
+        events = [self.to_event(record) for record in records]
+        if len(events) * 8 < len(self.events):
+            for event in events:
+                self.insert(event)
+            return
+
+        self.events.extend(events)
+        self.events.sort()
+        self.rebuild()
+
+    def rebuild(self):
+        """Hitung ulang matriks & total dari `events`; pembulatan sekali di akhir"""
+        self.matrices = {}
+        self.type_totals = {}
+        for index, (moment, revenue, order_type) in enumerate(self.events):
+            minutes = self.wait_minutes(index)
+            weekday, hour = moment.weekday(), moment.hour
+            for key in (self.ALL_TYPES, order_type):
+                matrix = self.matrices.get(key)
+                if matrix is None:
+                    matrix = self.matrices[key] = self.empty_matrix()
+                    self.type_totals[key] = {"revenue": 0.0, "orders": 0, "active_minutes": 0.0}
+                matrix["revenue"][weekday][hour] += revenue
+                matrix["orders"][weekday][hour] += 1
+                matrix["active_minutes"][weekday][hour] += minutes
+                totals = self.type_totals[key]
+                totals["revenue"] += revenue
+                totals["orders"] += 1
+                totals["active_minutes"] += minutes
+
+        for key, matrix in self.matrices.items():
+            for field in ("revenue", "active_minutes"):
+                matrix[field] = [[round(value, 6) for value in row] for row in matrix[field]]
+                self.type_totals[key][field] = round(self.type_totals[key][field], 6)
+
+    def insert(self, event: Tuple[datetime, float, str]):
+        index = bisect.bisect_right(self.events, event)
+        has_next = index < len(self.events)
+        if has_next:
+            # Jeda order sesudahnya sekarang diukur dari order baru
+            self.apply(self.events[index], 0, 0, -self.wait_minutes(index))
+
+        self.events.insert(index, event)
+        self.apply(event, event[1], 1, self.wait_minutes(index))
+        if has_next:
+            self.apply(self.events[index + 1], 0, 0, self.wait_minutes(index + 1))
+
+    def remove(self, record: Dict[str, Any]):
+        event = self.to_event(record)
+        index = bisect.bisect_left(self.events, event)
+        if index >= len(self.events) or self.events[index] != event:
+            return
+
+        has_next = index + 1 < len(self.events)
+        if has_next:
+            self.apply(self.events[index + 1], 0, 0, -self.wait_minutes(index + 1))
+        self.apply(event, -event[1], -1, -self.wait_minutes(index))
+
+        del self.events[index]
+        if has_next:
+            self.apply(self.events[index], 0, 0, self.wait_minutes(index))
+
+    @property
+    def state_file(self) -> str:
+        return os.path.join(self.rollup_dir, "hotspots.json")
+
+    def flush(self, signature: Dict[str, Any]):
+        if not self.rollup_dir:
+            return
+        os.makedirs(self.rollup_dir, exist_ok=True)
+        payload = {"signature": signature, "matrices": self.matrices, "type_totals": self.type_totals}
+        temp_path = self.state_file + '.tmp'
+        with open(temp_path, 'w') as file:
+            json.dump(payload, file, separators=(',', ':'))
+        os.replace(temp_path, self.state_file)
+
+    def restore(self, signature: Dict[str, Any]) -> bool:
+        if not self.rollup_dir or self.time_index is None or self.time_index.restored_signature != signature:
+            return False
+        try:
+            with open(self.state_file, 'r') as file:
+                payload = json.load(file)
+        except (OSError, ValueError):
+            return False
+        if payload.get("signature") != signature:
+            return False
+
+        events = []
+        data_tz = self.time_index.data_tz
+        for order_type, series in self.time_index.by_type.items():
+            series.merge_pending()
+            for epoch, revenue in zip(series.epochs, series.values["revenue"]):
+                moment = datetime.fromtimestamp(epoch, data_tz).replace(tzinfo=None)
+                events.append((moment, revenue, order_type))
+        events.sort()
+
+        self.events = events
+        self.matrices = payload["matrices"]
+        self.type_totals = payload["type_totals"]
+        return True
+
+    def get_matrix(self, order_type: Optional[str] = None) -> Dict[str, List[List[float]]]:
+        return self.matrices.get(order_type or self.ALL_TYPES) or self.empty_matrix()
+
+    def get_type_totals(self) -> Dict[str, Dict[str, float]]:
+        """Total per jenis order (tanpa agregat semua jenis)"""
+        return {key: totals for key, totals in self.type_totals.items()
+                if key != self.ALL_TYPES and totals["orders"] > 0}
@@ -0,0 +1,118 @@
+import operator
+import string
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple
+
+@dataclass
+class InsightRule:
+    """Satu aturan insight: jika `metric` `op` `threshold`, tampilkan pesan"""
+    id: str
+    metric: str
+    op: str
+    threshold: float
+    type: str
+    icon: str
+    title: str
+    message: str          # template format, boleh memakai metric apa pun
+    priority: str = "medium"
+    # Aturan dengan group sama saling eksklusif: hanya yang pertama cocok yang tampil
+    group: Optional[str] = None
+
+INSIGHT_RULES: List[InsightRule] = [
+    InsightRule("efficiency_elite", "efficiency", ">", 75, "success", "🚀", "Efisiensi Elite",
+                "Efisiensi {efficiency:.1f}% - Performa luar biasa!", "high", group="efficiency"),
+    InsightRule("efficiency_optimal", "efficiency", ">", 60, "success", "⭐", "Efisiensi Optimal",
+                "Efisiensi {efficiency:.1f}% - Pertahankan!", "medium", group="efficiency"),
+    InsightRule("efficiency_low", "efficiency", "<", 40, "warning", "⚡", "Butuh Optimasi",
+                "Efisiensi {efficiency:.1f}% - Perlu evaluasi strategi", "high", group="efficiency"),
+    InsightRule("trend_up", "revenue_trend", ">", 0, "success", "📈", "Trend Positif",
+                "Revenue naik {revenue_trend:,.0f} dibanding kemarin di jam yang sama", "medium", group="trend"),
+    InsightRule("trend_down", "revenue_trend", "<", 0, "warning", "📉", "Trend Menurun",
+                "Revenue turun {revenue_trend_abs:,.0f} dibanding kemarin di jam yang sama", "high", group="trend"),
+    InsightRule("best_order_type", "best_type_margin", ">", 0, "info", "🎯", "Fokus Optimal",
+                "{best_type} menghasilkan {best_type_avg:,.0f}/order", "medium"),
+    InsightRule("today_projection", "today_projection_margin", ">", 0, "success", "🎉", "Performa Cemerlang",
+                "Diperkirakan {expected_revenue:,.0f} hari ini", "medium"),
+]
+
+class CompiledRuleGroup:
+    """Aturan satu group yang sudah dikompilasi: predicate & formatter siap pakai"""
+
+    OPERATORS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le,
+                 "==": operator.eq, "!=": operator.ne}
+    PRIORITY_RANK = {"high": 0, "medium": 1, "low": 2}
+
+    def __init__(self, rules: List[Tuple[int, InsightRule]]):
+        self.compiled = []
+        inputs = set()
+        for order, rule in rules:
+            if rule.op not in self.OPERATORS:
+                raise ValueError(f"Unknown operator '{rule.op}' in rule {rule.id}")
+            fields = {name for _, name, _, _ in string.Formatter().parse(rule.message) if name}
+            inputs.update(fields)
+            inputs.add(rule.metric)
+            self.compiled.append((
+                (self.PRIORITY_RANK[rule.priority], order),
+                rule,
+                self.OPERATORS[rule.op],
+                rule.message.format
+            ))
+        self.inputs = tuple(sorted(inputs))
+
+    def evaluate(self, metrics: Dict[str, Any]) -> Optional[Tuple[Tuple[int, int], Dict[str, Any]]]:
+        for sort_key, rule, predicate, format_message in self.compiled:
+            value = metrics.get(rule.metric)
+            if value is None or not predicate(value, rule.threshold):
+                continue
+            return sort_key, {
+                "type": rule.type,
+                "icon": rule.icon,
+                "title": rule.title,
+                "message": format_message(**metrics),
+                "priority": rule.priority
+            }
+        return None
+
+class InsightRuleEngine:
+    """Evaluator aturan insight yang dikompilasi sekali
+
+    Aturan diindeks per metric input; setiap evaluasi hanya group yang inputnya
+    berubah yang dievaluasi ulang, hasil group lain dipakai dari evaluasi sebelumnya.
+    """
+
+    def __init__(self, rules: Optional[List[InsightRule]] = None, limit: int = 5):
+        self.limit = limit
+        grouped: Dict[str, List[Tuple[int, InsightRule]]] = {}
+        for order, rule in enumerate(rules if rules is not None else INSIGHT_RULES):
+            grouped.setdefault(rule.group or rule.id, []).append((order, rule))
+
+        self.groups = [CompiledRuleGroup(group_rules) for group_rules in grouped.values()]
+        self.groups_by_metric: Dict[str, List[int]] = {}
+        for index, group in enumerate(self.groups):
+            for metric in group.inputs:
+                self.groups_by_metric.setdefault(metric, []).append(index)
+        self.reset()
+
+    def reset(self):
+        self.metrics: Dict[str, Any] = {}
+        self.fired: Dict[int, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+        self.evaluated_groups = 0  # jumlah evaluasi group, untuk observasi biaya
+
+    def evaluate(self, metrics: Dict[str, Any]) -> List[Dict[str, Any]]:
+        changed = {
+            name for name in set(metrics) | set(self.metrics)
+            if metrics.get(name) != self.metrics.get(name)
+        }
+        self.metrics = dict(metrics)
+
+        stale = {index for name in changed for index in self.groups_by_metric.get(name, ())}
+        for index in stale:
+            self.evaluated_groups += 1
+            result = self.groups[index].evaluate(metrics)
+            if result is None:
+                self.fired.pop(index, None)
+            else:
+                self.fired[index] = result
+
+        ranked = sorted(self.fired.values(), key=lambda item: item[0])
+        return [dict(insight) for _, insight in ranked[:self.limit]]
@@ -0,0 +1,96 @@
+import json
+import os
+from typing import Dict, Any, Optional
+
+# Absolute imports
+import sys
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from app.utils.quantile_sketch import KLLSketch
+
+class OrderValueSketches:
+    """Sketch distribusi total_order per jenis order dan per bulan, disimpan bersama rollup
+
+    Sketch tidak bisa dikurangi, jadi listener ini sengaja tidak punya `remove`:
+    setiap delete membuat DataHandler membangunnya ulang dengan membaca seluruh
+    CSV (O(jumlah order)), sementara listener lain cukup dikurangi incremental.
+    """
+
+    def __init__(self, rollup_dir: str = 'data/rollups', k: int = 128):
+        self.rollup_dir = rollup_dir
+        self.k = k
+        self.reset()
+
+    def reset(self):
+        self.by_type: Dict[str, KLLSketch] = {}
+        self.by_month: Dict[str, KLLSketch] = {}
+        self.merged_cache: Optional[KLLSketch] = None
+
+    def add(self, record: Dict[str, Any]):
+        value = record['total_order']
+        self.merged_cache = None
+        # Sketch baru hanya dibuat untuk key baru (konstruksinya me-seed RNG)
+        for sketches, key in ((self.by_type, record['order_type']), (self.by_month, record['display_date'][:7])):
+            sketch = sketches.get(key)
+            if sketch is None:
+                sketch = sketches[key] = KLLSketch(self.k)
+            sketch.update(value)
+
+    @property
+    def sketch_file(self) -> str:
+        return os.path.join(self.rollup_dir, "sketches.json")
+
+    def flush(self, signature: Dict[str, Any]):
+        os.makedirs(self.rollup_dir, exist_ok=True)
+        payload = {
+            "signature": signature,
+            "by_type": {key: sketch.to_dict() for key, sketch in self.by_type.items()},
+            "by_month": {key: sketch.to_dict() for key, sketch in self.by_month.items()}
+        }
+        temp_path = self.sketch_file + '.tmp'
+        with open(temp_path, 'w') as file:
+            json.dump(payload, file, separators=(',', ':'))
+        os.replace(temp_path, self.sketch_file)
+
+    def restore(self, signature: Dict[str, Any]) -> bool:
+        try:
+            with open(self.sketch_file, 'r') as file:
+                payload = json.load(file)
+        except (OSError, ValueError):
+            return False
+        if payload.get("signature") != signature:
+            return False
+
+        self.by_type = {key: KLLSketch.from_dict(value) for key, value in payload["by_type"].items()}
+        self.by_month = {key: KLLSketch.from_dict(value) for key, value in payload["by_month"].items()}
+        self.merged_cache = None
+        return True
+
+    def get_percentiles(self, order_type: Optional[str] = None, month: Optional[str] = None) -> Dict[str, float]:
+        """p50/p90/p99 untuk satu jenis order, satu bulan, atau gabungan semuanya"""
+        if order_type:
+            sketch = self.by_type.get(order_type)
+        elif month:
+            sketch = self.by_month.get(month)
+        else:
+            sketch = self.merged()
+        return sketch.percentiles() if sketch else {"p50": 0, "p90": 0, "p99": 0}
+
+    def merged(self) -> KLLSketch:
+        """Gabungan semua bulan; di-cache sampai ada order baru (jangan diubah oleh pemanggil)"""
+        if self.merged_cache is None:
+            sketch = KLLSketch(self.k)
+            for month_sketch in self.by_month.values():
+                sketch.merge(month_sketch)
+            self.merged_cache = sketch
+        return self.merged_cache
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Percentile semua jenis order dan bulan untuk analytics API"""
+        return {
+            "overall": self.get_percentiles(),
+            "by_type": {key: sketch.percentiles() for key, sketch in self.by_type.items()},
+            "by_month": {key: self.by_month[key].percentiles() for key in sorted(self.by_month)}
+        }
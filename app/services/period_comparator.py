@@ -0,0 +1,93 @@
+from datetime import date, datetime, timedelta
+from typing import Dict, Any, Optional, Tuple
+
+class PeriodComparator:
+    """Perbandingan periode berjalan vs periode sebelumnya sampai titik waktu yang sama
+
+    Hari penuh diambil dari prefix index harian (O(1) per rentang); hanya hari
+    terakhir periode pembanding yang dihitung parsial dari time index, yaitu
+    order sebelum jam yang sama dengan sekarang. Jadi jam 10 pagi, hari ini
+    dibandingkan dengan kemarin sampai jam 10, bukan dengan kemarin penuh.
+    Tanpa time index (view mode `entered`) hari terakhir dihitung penuh.
+    """
+
+    FIELDS = ("revenue", "orders", "net_income", "usable_income")
+
+    def __init__(self, day_index, time_index):
+        self.day_index = day_index
+        self.time_index = time_index
+
+    @staticmethod
+    def same_day_last_year(day: date) -> date:
+        try:
+            return day.replace(year=day.year - 1)
+        except ValueError:
+            # 29 Februari -> 28 Februari
+            return day.replace(year=day.year - 1, day=28)
+
+    def partial_day(self, day: date, until: datetime) -> Dict[str, float]:
+        """Total hari `day` sebelum jam `until` (waktu lokal data)"""
+        if self.time_index is None:
+            totals = self.day_index.range_totals(day, day)
+            return {field: totals[field] for field in self.FIELDS}
+        start = datetime.combine(day, datetime.min.time())
+        end = datetime.combine(day, until.time())
+        buckets = self.time_index.aggregate("day", start, end) if end > start else []
+        totals = buckets[0] if buckets else {}
+        return {field: totals.get(field, 0) for field in self.FIELDS}
+
+    def period_totals(self, start: date, end: date, until: Optional[datetime] = None) -> Dict[str, Any]:
+        """Total hari [start, end]; dengan `until`, hari `end` hanya dihitung sampai jam tersebut"""
+        if until is None:
+            totals = self.day_index.range_totals(start, end)
+            totals = {field: totals[field] for field in self.FIELDS}
+        else:
+            full = self.day_index.range_totals(start, end - timedelta(days=1))
+            partial = self.partial_day(end, until)
+            totals = {field: full[field] + partial[field] for field in self.FIELDS}
+        totals["start"] = start.isoformat()
+        totals["end"] = end.isoformat()
+        return totals
+
+    def compare_period(self, current: Tuple[date, date], previous: Tuple[date, date],
+                       previous_last_day: date, now: datetime) -> Dict[str, Any]:
+        # Periode berjalan: semua order s.d. hari ini (hari ini memang baru sebagian)
+        current_totals = self.period_totals(*current)
+        previous_totals = self.period_totals(*previous, until=now)
+        change = {}
+        for field in ("revenue", "orders", "usable_income"):
+            difference = current_totals[field] - previous_totals[field]
+            change[field] = difference
+            change[f"{field}_pct"] = difference / previous_totals[field] * 100 if previous_totals[field] else None
+
+        return {
+            "current": current_totals,
+            "previous": previous_totals,
+            "previous_full": self.period_totals(previous[0], previous_last_day),
+            "change": change
+        }
+
+    def compare(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Hari ini vs kemarin, minggu ini vs minggu lalu, bulan ini vs bulan sama tahun lalu"""
+        now = now or datetime.now()
+        today = now.date()
+        week_start = today - timedelta(days=today.weekday())
+        month_start = today.replace(day=1)
+        last_year_today = self.same_day_last_year(today)
+
+        last_week_start = week_start - timedelta(weeks=1)
+        last_year_month_start = last_year_today.replace(day=1)
+        last_year_month_end = (last_year_month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        yesterday = today - timedelta(days=1)
+
+        return {
+            "as_of": now.replace(microsecond=0).isoformat(),
+            "day": self.compare_period((today, today), (yesterday, yesterday), yesterday, now),
+            "week": self.compare_period(
+                (week_start, today), (last_week_start, today - timedelta(weeks=1)),
+                last_week_start + timedelta(days=6), now
+            ),
+            "month_yoy": self.compare_period(
+                (month_start, today), (last_year_month_start, last_year_today), last_year_month_end, now
+            )
+        }
@@ -0,0 +1,126 @@
+from datetime import date, datetime
+from typing import Dict, Any, List, Optional
+
+class RollingMetrics:
+    """Revenue & order rolling 7/30/90 hari kalender dengan ring buffer per hari
+
+    Setiap window menyimpan jumlah berjalan; maju satu hari cukup mengurangi hari
+    yang keluar window, dan order baru cukup menambah slot harinya. Hari tanpa
+    order tetap dihitung sebagai nol. Saat restart dibangun dari rollup harian.
+    """
+
+    WINDOWS = (7, 30, 90)
+    CAPACITY = 90
+
+    def __init__(self, rollups: Optional[Any] = None):
+        self.rollups = rollups
+        self.reset()
+
+    def today(self) -> int:
+        return datetime.now().date().toordinal()
+
+    def reset(self):
+        self.current = self.today()
+        self.slot_day: List[Optional[int]] = [None] * self.CAPACITY
+        self.revenue = [0.0] * self.CAPACITY
+        self.orders = [0] * self.CAPACITY
+        self.sums = {window: {"revenue": 0.0, "orders": 0} for window in self.WINDOWS}
+        # Order bertanggal custom di masa depan, dimasukkan saat harinya tiba
+        self.pending: Dict[int, List[float]] = {}
+
+    def place(self, ordinal: int, revenue: float, orders: int):
+        """Tambahkan nilai ke slot hari `ordinal` (harus di dalam window 90 hari)"""
+        slot = ordinal % self.CAPACITY
+        if self.slot_day[slot] != ordinal:
+            self.slot_day[slot] = ordinal
+            self.revenue[slot] = 0.0
+            self.orders[slot] = 0
+        self.revenue[slot] += revenue
+        self.orders[slot] += orders
+
+        for window, sums in self.sums.items():
+            if ordinal > self.current - window:
+                sums["revenue"] += revenue
+                sums["orders"] += orders
+
+    def apply(self, record: Dict[str, Any], sign: int):
+        self.advance()
+        ordinal = date.fromisoformat(record['display_date']).toordinal()
+        revenue = sign * record['total_order']
+
+        if ordinal > self.current:
+            pending = self.pending.setdefault(ordinal, [0.0, 0])
+            pending[0] += revenue
+            pending[1] += sign
+            if pending[1] <= 0:
+                del self.pending[ordinal]
+        elif ordinal > self.current - self.CAPACITY:
+            self.place(ordinal, revenue, sign)
+
+    def add(self, record: Dict[str, Any]):
+        self.apply(record, 1)
+
+    def remove(self, record: Dict[str, Any]):
+        self.apply(record, -1)
+
+    def restore(self, signature: Dict[str, Any]) -> bool:
+        """Isi slot dari rollup harian jika rollup baru saja dimuat untuk CSV yang sama"""
+        if self.rollups is None or self.rollups.restored_signature != signature:
+            return False
+        self.reset()
+        for key, bucket in self.rollups.get_level("day").items():
+            if bucket["orders"] <= 0:
+                continue
+            ordinal = date.fromisoformat(key).toordinal()
+            if ordinal > self.current:
+                self.pending[ordinal] = [bucket["revenue"], bucket["orders"]]
+            elif ordinal > self.current - self.CAPACITY:
+                self.place(ordinal, bucket["revenue"], bucket["orders"])
+        return True
+
+    def value_at(self, ordinal: int):
+        slot = ordinal % self.CAPACITY
+        if self.slot_day[slot] != ordinal:
+            return 0.0, 0
+        return self.revenue[slot], self.orders[slot]
+
+    def advance(self):
+        """Geser semua window sampai hari ini, O(1) per hari yang terlewati"""
+        today = self.today()
+        if today <= self.current:
+            return
+
+        if today - self.current >= self.CAPACITY:
+            # Lompat jauh: semua slot kedaluwarsa
+            pending = self.pending
+            self.reset()
+            for ordinal in sorted(pending):
+                if ordinal > today:
+                    self.pending[ordinal] = pending[ordinal]
+                elif ordinal > today - self.CAPACITY:
+                    self.place(ordinal, *pending[ordinal])
+            return
+
+        while self.current < today:
+            self.current += 1
+            for window, sums in self.sums.items():
+                revenue, orders = self.value_at(self.current - window)
+                sums["revenue"] -= revenue
+                sums["orders"] -= orders
+
+            if self.current in self.pending:
+                self.place(self.current, *self.pending.pop(self.current))
+
+    def to_dict(self) -> Dict[str, Dict[str, float]]:
+        self.advance()
+        metrics = {}
+        for window, sums in self.sums.items():
+            revenue = round(sums["revenue"], 6)
+            orders = sums["orders"]
+            metrics[f"{window}d"] = {
+                "revenue": revenue,
+                "orders": orders,
+                "avg_order_value": revenue / orders if orders > 0 else 0,
+                "daily_average_revenue": revenue / window
+            }
+        return metrics
@@ -0,0 +1,224 @@
+import json
+import os
+import re
+from datetime import datetime
+from typing import Dict, Any, Iterable, List, Optional, Set
+
+# Absolute imports
+import sys
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from app.services.analytics_engine import PythonAnalyticsEngine
+
+class RollupStore:
+    """Rollup harian, mingguan (ISO) dan bulanan yang di-update incremental dan disimpan ke disk"""
+
+    LEVELS = ("day", "week", "month")
+    VALUE_FIELDS = (
+        "revenue", "orders", "income", "commission", "saldo_savings",
+        "bbm_savings", "oli_savings", "savings", "net_income"
+    )
+
+    def __init__(self, rollup_dir: str = 'data/rollups', engine: Optional[Any] = None):
+        self.rollup_dir = rollup_dir
+        self.engine = engine or PythonAnalyticsEngine()
+        self.reset()
+
+    # Naikkan jika layout file berubah; state format lama dibangun ulang dari CSV
+    FORMAT_VERSION = 2
+    SHARD_PATTERN = re.compile(r'^(day-\d{4}-\d{2}|week-\d{4})\.json$')
+
+    def reset(self):
+        self.levels: Dict[str, Dict[str, Dict[str, Any]]] = {level: {} for level in self.LEVELS}
+        self.totals = self.empty_bucket()
+        # Shard yang berubah sejak flush terakhir; setelah reset semua shard ditulis ulang
+        self.dirty: Set[str] = set()
+        self.rewrite_all = True
+        # Signature CSV dari state yang berhasil dimuat; index turunan dibangun dari rollup ini
+        self.restored_signature: Optional[Dict[str, Any]] = None
+
+    def empty_bucket(self) -> Dict[str, Any]:
+        bucket = {field: 0 for field in self.VALUE_FIELDS}
+        bucket["by_type"] = {}
+        return bucket
+
+    def bucket_keys(self, display_date: str) -> Dict[str, str]:
+        """Key rollup untuk setiap level dari display_date"""
+        date = datetime.strptime(display_date, '%Y-%m-%d').date()
+        iso_year, iso_week, _ = date.isocalendar()
+        return {
+            "day": display_date,
+            "week": f"{iso_year}-W{iso_week:02d}",
+            "month": display_date[:7]
+        }
+
+    def shard_of(self, level: str, key: str) -> str:
+        """File tempat bucket disimpan: hari per bulan, minggu per tahun ISO, bulan dalam satu file"""
+        if level == "day":
+            return f"day-{key[:7]}"
+        if level == "week":
+            return f"week-{key[:4]}"
+        return "month"
+
+    def mark_dirty(self, level: str, key: str):
+        self.dirty.add(self.shard_of(level, key))
+
+    def shard_buckets(self, shard: str) -> Dict[str, Dict[str, Any]]:
+        """Isi satu shard tanpa menelusuri seluruh level (maks. 31 hari / 53 minggu)"""
+        if shard == "month":
+            return self.levels["month"]
+        level, prefix = shard.split("-", 1)
+        if level == "day":
+            keys = (f"{prefix}-{day:02d}" for day in range(1, 32))
+        else:
+            keys = (f"{prefix}-W{week:02d}" for week in range(1, 54))
+        rollup = self.levels[level]
+        return {key: rollup[key] for key in keys if key in rollup}
+
+    def apply(self, bucket: Dict[str, Any], record: Dict[str, Any], sign: int):
+        bucket["revenue"] += sign * record['total_order']
+        bucket["orders"] += sign
+        bucket["income"] += sign * record['usable_income']
+        bucket["commission"] += sign * record['commission']
+        bucket["saldo_savings"] += sign * record['saldo_savings']
+        bucket["bbm_savings"] += sign * record['bbm_savings']
+        bucket["oli_savings"] += sign * record['oli_savings']
+        bucket["savings"] += sign * (record['saldo_savings'] + record['bbm_savings'] + record['oli_savings'])
+        bucket["net_income"] += sign * record['net_income']
+
+        order_type = bucket["by_type"].setdefault(record['order_type'], {"count": 0, "revenue": 0})
+        order_type["count"] += sign
+        order_type["revenue"] += sign * record['total_order']
+
+        if sign < 0:
+            # Hindari sisa floating point setelah pengurangan
+            for field in self.VALUE_FIELDS:
+                bucket[field] = round(bucket[field], 6)
+            order_type["revenue"] = round(order_type["revenue"], 6)
+            if order_type["count"] <= 0:
+                del bucket["by_type"][record['order_type']]
+
+    def merge(self, target: Dict[str, Any], bucket: Dict[str, Any], sign: int = 1):
+        """Tambah (atau kurangi) bucket ke bucket lain, seperti `apply` untuk satu order"""
+        for field in self.VALUE_FIELDS:
+            target[field] += sign * bucket[field]
+        for order_type, values in bucket["by_type"].items():
+            target_type = target["by_type"].setdefault(order_type, {"count": 0, "revenue": 0})
+            target_type["count"] += sign * values["count"]
+            target_type["revenue"] += sign * values["revenue"]
+            if sign < 0:
+                target_type["revenue"] = round(target_type["revenue"], 6)
+                if target_type["count"] <= 0:
+                    del target["by_type"][order_type]
+        if sign < 0:
+            for field in self.VALUE_FIELDS:
+                target[field] = round(target[field], 6)
+
+    def build_from_days(self, day_buckets: Dict[str, Dict[str, Any]], type_order: Iterable[str] = ()):
+        """Isi semua level dari bucket harian (untuk view sementara, bukan untuk di-flush)
+
+        `type_order` menjaga urutan jenis order di totals sama dengan rollup live.
+        """
+        self.reset()
+        self.totals["by_type"] = {order_type: {"count": 0, "revenue": 0} for order_type in type_order}
+        for day, bucket in sorted(day_buckets.items()):
+            for level, key in self.bucket_keys(day).items():
+                rollup = self.levels[level]
+                if key not in rollup:
+                    rollup[key] = self.empty_bucket()
+                self.merge(rollup[key], bucket)
+            self.merge(self.totals, bucket)
+        self.totals["by_type"] = {key: values for key, values in self.totals["by_type"].items() if values["count"] > 0}
+
+    def add(self, record: Dict[str, Any]):
+        for level, key in self.bucket_keys(record['display_date']).items():
+            rollup = self.levels[level]
+            if key not in rollup:
+                rollup[key] = self.empty_bucket()
+            self.apply(rollup[key], record, 1)
+            self.mark_dirty(level, key)
+        self.apply(self.totals, record, 1)
+
+    def add_batch(self, records: List[Dict[str, Any]]):
+        """Tambah banyak record sekaligus lewat engine analytics yang dipilih"""
+        self.engine.accumulate(self, records)
+
+    def remove(self, record: Dict[str, Any]):
+        for level, key in self.bucket_keys(record['display_date']).items():
+            rollup = self.levels[level]
+            if key not in rollup:
+                continue
+            self.apply(rollup[key], record, -1)
+            if rollup[key]["orders"] <= 0:
+                del rollup[key]
+            self.mark_dirty(level, key)
+        self.apply(self.totals, record, -1)
+
+    def level_file(self, name: str) -> str:
+        return os.path.join(self.rollup_dir, f"{name}.json")
+
+    def write_json(self, name: str, payload: Any):
+        """Tulis atomik agar crash di tengah tulis tidak merusak rollup"""
+        path = self.level_file(name)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w') as file:
+            json.dump(payload, file, separators=(',', ':'))
+        os.replace(temp_path, path)
+
+    def list_shard_files(self) -> List[str]:
+        if not os.path.isdir(self.rollup_dir):
+            return []
+        return [name for name in os.listdir(self.rollup_dir) if self.SHARD_PATTERN.match(name)]
+
+    def flush(self, signature: Dict[str, Any]):
+        """Simpan shard yang berubah saja; summary (berisi signature CSV) ditulis terakhir"""
+        os.makedirs(self.rollup_dir, exist_ok=True)
+        if self.rewrite_all:
+            shards = {"month"}
+            for level in ("day", "week"):
+                shards.update(self.shard_of(level, key) for key in self.levels[level])
+            # Shard dari data lama yang sudah tidak ada lagi
+            for name in self.list_shard_files():
+                if name[:-len(".json")] not in shards:
+                    os.remove(os.path.join(self.rollup_dir, name))
+        else:
+            shards = self.dirty
+
+        for shard in shards:
+            self.write_json(shard, self.shard_buckets(shard))
+        self.write_json("summary", {"format": self.FORMAT_VERSION, "signature": signature, "totals": self.totals})
+        self.dirty = set()
+        self.rewrite_all = False
+
+    def restore(self, signature: Dict[str, Any]) -> bool:
+        """Muat rollup dari disk jika masih cocok dengan CSV saat ini"""
+        try:
+            with open(self.level_file("summary"), 'r') as file:
+                summary = json.load(file)
+            if summary.get("format") != self.FORMAT_VERSION or summary.get("signature") != signature:
+                return False
+
+            levels = {level: {} for level in self.LEVELS}
+            with open(self.level_file("month"), 'r') as file:
+                levels["month"] = json.load(file)
+            for name in self.list_shard_files():
+                with open(os.path.join(self.rollup_dir, name), 'r') as file:
+                    levels[name.split("-", 1)[0]].update(json.load(file))
+        except (OSError, ValueError):
+            return False
+
+        # Urutan key kronologis, tidak bergantung urutan file di folder
+        self.levels = {level: dict(sorted(buckets.items())) for level, buckets in levels.items()}
+        self.totals = summary["totals"]
+        self.dirty = set()
+        self.rewrite_all = False
+        self.restored_signature = signature
+        return True
+
+    def get_level(self, level: str) -> Dict[str, Dict[str, Any]]:
+        return self.levels[level]
+
+    def get_day(self, date: str) -> Optional[Dict[str, Any]]:
+        return self.levels["day"].get(date)
@@ -0,0 +1,181 @@
+import random
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # tanpa numpy simulasi tetap jalan dengan trial lebih sedikit
+    np = None
+
+class TargetSimulator:
+    """Simulasi Monte Carlo peluang mencapai target harian & mingguan
+
+    Jumlah order per hari di-bootstrap dari `LOOKBACK_DAYS` hari terakhir,
+    termasuk hari tanpa order (libur ikut mengurangi peluang), nilai order
+    disampling dari sketch distribusi nilai order, lalu pendapatan siap pakai
+    dihitung dengan rasio potongan yang berlaku.
+
+    `snapshot` membaca rollup & sketch sehingga harus dipanggil di bawah lock
+    manager; `simulate` hanya memakai snapshot dan boleh berjalan di luar lock.
+    """
+
+    LOOKBACK_DAYS = 90
+    MIN_ACTIVE_DAYS = 3
+    DEFAULT_TRIALS = 20000
+    MAX_TRIALS = 100000
+    PYTHON_MAX_TRIALS = 2000
+    CACHE_SIZE = 64
+    SEED = 20240101
+
+    def __init__(self, rollups, order_value_sketches):
+        self.rollups = rollups
+        self.order_value_sketches = order_value_sketches
+        self._cache: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def daily_order_counts(self, today: Optional[date] = None,
+                           first_day: Optional[date] = None) -> List[int]:
+        """Jumlah order per hari dalam lookback, hari tanpa order bernilai 0
+
+        Hari ini belum selesai, jadi tidak ikut. Hari sebelum order pertama
+        (`first_day`) juga tidak ikut: driver baru belum punya hari libur.
+        """
+        today = today or date.today()
+        day_rollup = self.rollups.get_level("day")
+        counts = []
+        for offset in range(1, self.LOOKBACK_DAYS + 1):
+            day = today - timedelta(days=offset)
+            if first_day is not None and day < first_day:
+                break
+            bucket = day_rollup.get(day.isoformat())
+            counts.append(bucket["orders"] if bucket else 0)
+        return counts
+
+    def snapshot(self, first_day: Optional[date] = None) -> Dict[str, Any]:
+        """Input simulasi yang disalin dari rollup & sketch (panggil di bawah lock manager)"""
+        values, weights = self.order_value_sketches.merged().weighted_items()
+        return {
+            "counts": self.daily_order_counts(first_day=first_day),
+            "values": values,
+            "weights": weights
+        }
+
+    def cached(self, key: Tuple) -> Optional[Dict[str, Any]]:
+        with self._cache_lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        return None
+
+    def cache_key(self, version: Any, target_daily_income: float, target_weekly_orders: float,
+                  trials: int) -> Tuple:
+        return (version, float(target_daily_income), float(target_weekly_orders), self.clamp_trials(trials))
+
+    def clamp_trials(self, trials: int) -> int:
+        trials = max(100, min(int(trials), self.MAX_TRIALS))
+        if np is None:
+            trials = min(trials, self.PYTHON_MAX_TRIALS)
+        return trials
+
+    def simulate(self, version: Any, inputs: Dict[str, Any], target_daily_income: float,
+                 target_weekly_orders: float, usable_ratio: float,
+                 trials: int = DEFAULT_TRIALS) -> Dict[str, Any]:
+        """Hasil simulasi dari snapshot input, di-cache per (versi data, target)"""
+        key = self.cache_key(version, target_daily_income, target_weekly_orders, trials)
+        result = self.cached(key)
+        if result is not None:
+            return result
+
+        result = self.run(inputs, target_daily_income, target_weekly_orders, usable_ratio, key[-1])
+        with self._cache_lock:
+            self._cache[key] = result
+            if len(self._cache) > self.CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return result
+
+    def run(self, inputs: Dict[str, Any], target_daily_income: float, target_weekly_orders: float,
+            usable_ratio: float, trials: int) -> Dict[str, Any]:
+        counts, values, weights = inputs["counts"], inputs["values"], inputs["weights"]
+        active_days = sum(1 for count in counts if count > 0)
+        if active_days < self.MIN_ACTIVE_DAYS or not values:
+            return {
+                "available": False,
+                "message": f"Butuh minimal {self.MIN_ACTIVE_DAYS} hari aktif dalam {self.LOOKBACK_DAYS} hari terakhir",
+                "active_days": active_days
+            }
+
+        if np is not None:
+            daily_income, weekly_orders = self.run_numpy(counts, values, weights, usable_ratio, trials)
+        else:
+            daily_income, weekly_orders = self.run_python(counts, values, weights, usable_ratio, trials)
+
+        return {
+            "available": True,
+            "trials": trials,
+            "active_days": active_days,
+            "observed_days": len(counts),
+            "work_probability": active_days / len(counts),
+            "daily_income": self.summarize(daily_income, target_daily_income),
+            "weekly_orders": self.summarize(weekly_orders, target_weekly_orders)
+        }
+
+    def run_numpy(self, counts: List[int], values: List[float], weights: List[int],
+                  usable_ratio: float, trials: int):
+        rng = np.random.default_rng(self.SEED)
+        counts_array = np.asarray(counts, dtype=np.int64)
+        probabilities = np.asarray(weights, dtype=float)
+        probabilities /= probabilities.sum()
+
+        # Satu hari per trial: jumlah order bootstrap, lalu nilai setiap order
+        day_orders = rng.choice(counts_array, size=trials)
+        order_values = rng.choice(np.asarray(values, dtype=float), size=int(day_orders.sum()), p=probabilities)
+        trial_ids = np.repeat(np.arange(trials), day_orders)
+        daily_income = np.bincount(trial_ids, weights=order_values, minlength=trials) * usable_ratio
+
+        # Satu minggu per trial: 7 hari bootstrap (hari libur ikut terambil)
+        weekly_orders = rng.choice(counts_array, size=(trials, 7)).sum(axis=1).astype(float)
+        return daily_income, weekly_orders
+
+    def run_python(self, counts: List[int], values: List[float], weights: List[int],
+                   usable_ratio: float, trials: int):
+        rng = random.Random(self.SEED)
+        daily_income = []
+        weekly_orders = []
+        for _ in range(trials):
+            orders = rng.choice(counts)
+            daily_income.append(sum(rng.choices(values, weights=weights, k=orders)) * usable_ratio)
+            weekly_orders.append(float(sum(rng.choice(counts) for _ in range(7))))
+        return daily_income, weekly_orders
+
+    def summarize(self, outcomes, target: float) -> Dict[str, Any]:
+        """Peluang mencapai target, expected shortfall, dan sebaran hasil"""
+        if np is not None:
+            outcomes = np.asarray(outcomes, dtype=float)
+            shortfall = np.maximum(target - outcomes, 0.0)
+            p10, p50, p90 = np.percentile(outcomes, [10, 50, 90])
+            probability = float((outcomes >= target).mean())
+            expected_shortfall = float(shortfall.mean())
+            missed = shortfall[shortfall > 0]
+            shortfall_when_missed = float(missed.mean()) if missed.size else 0.0
+            expected = float(outcomes.mean())
+        else:
+            ordered = sorted(outcomes)
+            count = len(ordered)
+            p10, p50, p90 = (ordered[min(count - 1, int(count * q))] for q in (0.1, 0.5, 0.9))
+            shortfalls = [max(target - value, 0.0) for value in outcomes]
+            missed = [value for value in shortfalls if value > 0]
+            probability = sum(1 for value in outcomes if value >= target) / count
+            expected_shortfall = sum(shortfalls) / count
+            shortfall_when_missed = sum(missed) / len(missed) if missed else 0.0
+            expected = sum(outcomes) / count
+
+        return {
+            "target": target,
+            "probability": probability,
+            "expected": expected,
+            "expected_shortfall": expected_shortfall,
+            "shortfall_when_missed": shortfall_when_missed,
+            "percentiles": {"p10": float(p10), "p50": float(p50), "p90": float(p90)}
+        }
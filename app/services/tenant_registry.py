@@ -0,0 +1,165 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+# Absolute imports
+import sys
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from app.services.advisor_scheduler import AdvisorScheduler
+from app.services.finance_manager import ExpertFinanceManager
+
+class TenantRegistry:
+    """Manager per driver dengan LRU terbatas agar memori tetap terprediksi
+
+    Setiap driver punya folder data sendiri (`data/drivers/<driver_id>/`).
+    Driver yang jarang aktif dikeluarkan dari memori (state-nya di-flush) dan
+    dimuat ulang saat diakses lagi; semua listener di-restore dari `rollups/`
+    tanpa membaca CSV. Hanya driver tanpa state yang cocok (belum pernah di-flush
+    atau CSV diubah di luar server) yang perlu replay CSV penuh.
+    """
+
+    DRIVER_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+    def __init__(self, base_dir: str = 'data', max_live_tenants: int = 100,
+                 default_manager: Optional[ExpertFinanceManager] = None,
+                 advisor_scheduler: Optional[AdvisorScheduler] = None):
+        self.base_dir = base_dir
+        self.max_live_tenants = max(1, max_live_tenants)
+        # Manager tanpa driver ID (data lama di `data/`), tidak pernah di-evict
+        self.default_manager = default_manager
+        self.advisor_scheduler = advisor_scheduler
+        self._tenants: "OrderedDict[str, ExpertFinanceManager]" = OrderedDict()
+        # Manager yang sedang dimuat (restore/replay CSV) di luar lock, satu Future per driver
+        self._loading: Dict[str, Future] = {}
+        # Jumlah request yang sedang memakai manager; yang masih dipakai tidak di-evict
+        self._in_use: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def validate_driver_id(cls, driver_id: str) -> str:
+        if not driver_id or not cls.DRIVER_ID_PATTERN.match(driver_id):
+            raise ValueError("Driver ID tidak valid (hanya huruf, angka, '-' dan '_', maks 64 karakter)")
+        return driver_id
+
+    def data_dir_for(self, driver_id: str) -> str:
+        return os.path.join(self.base_dir, 'drivers', self.validate_driver_id(driver_id))
+
+    def get(self, driver_id: Optional[str] = None, create: bool = False) -> ExpertFinanceManager:
+        """Ambil manager untuk driver; None berarti manager default
+
+        Driver tanpa folder data menghasilkan LookupError, kecuali `create=True`
+        (hanya untuk tulis eksplisit). Manager driver harus dikembalikan dengan
+        `release(driver_id)` setelah request selesai.
+        """
+        if not driver_id:
+            if self.default_manager is None:
+                self.default_manager = self.create_manager(self.base_dir)
+            return self.default_manager
+
+        data_dir = self.data_dir_for(driver_id)
+        with self._lock:
+            manager = self._tenants.get(driver_id)
+            if manager is not None:
+                self._tenants.move_to_end(driver_id)
+                self._in_use[driver_id] = self._in_use.get(driver_id, 0) + 1
+                return manager
+
+            future = self._loading.get(driver_id)
+            owner = future is None
+            if owner:
+                if not create and not os.path.isdir(data_dir):
+                    raise LookupError(f"Driver '{driver_id}' tidak ditemukan")
+                future = self._loading[driver_id] = Future()
+            self._in_use[driver_id] = self._in_use.get(driver_id, 0) + 1
+
+        if not owner:
+            try:
+                return future.result()
+            except Exception:
+                self.release(driver_id)
+                raise
+
+        # Memuat driver (restore, atau replay CSV jika state tidak cocok) tidak menahan lock global
+        try:
+            manager = self.create_manager(data_dir)
+        except Exception as e:
+            with self._lock:
+                del self._loading[driver_id]
+            future.set_exception(e)
+            self.release(driver_id)
+            raise
+
+        with self._lock:
+            self._tenants[driver_id] = manager
+            del self._loading[driver_id]
+            evicted = self.evict_cold_tenants()
+        future.set_result(manager)
+        for cold_manager in evicted:
+            cold_manager.flush_state()
+        return manager
+
+    def release(self, driver_id: Optional[str]):
+        """Tandai satu request selesai memakai manager driver"""
+        if not driver_id:
+            return
+        with self._lock:
+            count = self._in_use.get(driver_id, 0) - 1
+            if count > 0:
+                self._in_use[driver_id] = count
+            else:
+                self._in_use.pop(driver_id, None)
+
+    def create_manager(self, data_dir: str) -> ExpertFinanceManager:
+        manager = ExpertFinanceManager(data_dir)
+        if self.advisor_scheduler is not None:
+            manager.attach_advisor_scheduler(self.advisor_scheduler)
+        return manager
+
+    def evict_cold_tenants(self) -> List[ExpertFinanceManager]:
+        """Keluarkan tenant paling lama tidak diakses sampai kembali di bawah batas
+
+        Tenant yang masih dipakai request atau punya subscriber SSE dilewati, jadi
+        tidak pernah ada dua manager hidup untuk folder data yang sama. Dipanggil
+        dengan lock dipegang; state manager yang dikeluarkan di-flush oleh pemanggil.
+        """
+        evicted = []
+        for driver_id in list(self._tenants):
+            if len(self._tenants) <= self.max_live_tenants:
+                break
+            if self._in_use.get(driver_id) or self._tenants[driver_id].event_broker.subscriber_count > 0:
+                continue
+            manager = self._tenants.pop(driver_id)
+            if self.advisor_scheduler is not None:
+                self.advisor_scheduler.unregister(manager)
+            evicted.append(manager)
+        return evicted
+
+    def flush_all(self):
+        """Simpan state tertunda semua manager yang sedang dimuat (dipanggil saat server berhenti)"""
+        with self._lock:
+            managers = list(self._tenants.values())
+        if self.default_manager is not None:
+            managers.append(self.default_manager)
+        for manager in managers:
+            manager.flush_state()
+
+    def list_driver_ids(self) -> List[str]:
+        """Semua driver yang punya folder data, termasuk yang sedang tidak dimuat"""
+        drivers_dir = os.path.join(self.base_dir, 'drivers')
+        if not os.path.isdir(drivers_dir):
+            return []
+        return sorted(
+            name for name in os.listdir(drivers_dir)
+            if self.DRIVER_ID_PATTERN.match(name) and os.path.isdir(os.path.join(drivers_dir, name))
+        )
+
+    @property
+    def live_tenant_count(self) -> int:
+        with self._lock:
+            return len(self._tenants)
@@ -0,0 +1,160 @@
+import json
+import os
+from typing import Dict, Any, List, Optional, Tuple
+
+class TimeHierarchy:
+    """Index tahun → bulan → hari → (row ID, offset byte di CSV) dengan total di setiap level
+
+    Row ID adalah urutan baris data di CSV (sama dengan indeks untuk delete),
+    offset dipakai untuk membaca langsung baris order satu hari tanpa scan file.
+
+    Persistensi: snapshot penuh di `state_file` plus journal append-only berisi
+    baris yang ditambahkan sesudahnya, jadi setiap append hanya menulis baris
+    baru. Journal dilipat ke snapshot setelah panjangnya menyamai separuh
+    jumlah baris (biaya tulis ulang teramortisasi O(1) per baris).
+    """
+
+    FIELDS = ("orders", "revenue", "net_income", "usable_income")
+    COMPACT_MIN_ROWS = 1000
+
+    def __init__(self, state_file: Optional[str] = None):
+        self.state_file = state_file
+        self.reset()
+
+    def reset(self):
+        self.years: Dict[str, Dict[str, Any]] = {}
+        self.row_count = 0  # termasuk baris yang tidak bisa di-parse, agar row ID tetap sejajar CSV
+        self.pending: List[List[Any]] = []  # baris yang belum ditulis ke journal
+        self.journal_rows = 0
+        self.rewrite_all = True
+
+    def empty_node(self) -> Dict[str, Any]:
+        return {field: 0 for field in self.FIELDS}
+
+    def apply_totals(self, node: Dict[str, Any], record: Dict[str, Any]):
+        node["orders"] += 1
+        node["revenue"] += record['total_order']
+        node["net_income"] += record['net_income']
+        node["usable_income"] += record['usable_income']
+
+    def add(self, row_id: int, offset: int, record: Optional[Dict[str, Any]]):
+        self.row_count = max(self.row_count, row_id + 1)
+        if not self.rewrite_all:
+            self.pending.append(self.journal_entry(row_id, offset, record))
+        if record is None:
+            return
+
+        display_date = record['display_date']
+        year = self.years.setdefault(display_date[:4], dict(self.empty_node(), months={}))
+        month = year["months"].setdefault(display_date[:7], dict(self.empty_node(), days={}))
+        day = month["days"].setdefault(display_date, dict(self.empty_node(), rows=[]))
+        for node in (year, month, day):
+            self.apply_totals(node, record)
+        day["rows"].append([row_id, offset])
+
+    @staticmethod
+    def summarize(key: str, node: Dict[str, Any]) -> Dict[str, Any]:
+        summary = {"key": key, "orders": node["orders"], "revenue": round(node["revenue"], 6),
+                   "net_income": round(node["net_income"], 6), "usable_income": round(node["usable_income"], 6)}
+        summary["avg_order_value"] = summary["revenue"] / summary["orders"] if summary["orders"] else 0
+        return summary
+
+    def list_years(self) -> List[Dict[str, Any]]:
+        return [self.summarize(key, self.years[key]) for key in sorted(self.years)]
+
+    def list_months(self, year: str) -> List[Dict[str, Any]]:
+        months = self.years.get(year, {}).get("months", {})
+        return [self.summarize(key, months[key]) for key in sorted(months)]
+
+    def list_days(self, month: str) -> List[Dict[str, Any]]:
+        days = self.years.get(month[:4], {}).get("months", {}).get(month, {}).get("days", {})
+        return [self.summarize(key, days[key]) for key in sorted(days)]
+
+    def day_rows(self, day: str) -> List[Tuple[int, int]]:
+        node = self.years.get(day[:4], {}).get("months", {}).get(day[:7], {}).get("days", {}).get(day)
+        return [tuple(row) for row in node["rows"]] if node else []
+
+    @staticmethod
+    def journal_entry(row_id: int, offset: int, record: Optional[Dict[str, Any]]) -> List[Any]:
+        """Cukup field yang dipakai `add`; baris tidak valid hanya memajukan row ID"""
+        if record is None:
+            return [row_id, offset]
+        return [row_id, offset, record['display_date'], record['total_order'],
+                record['net_income'], record['usable_income']]
+
+    def replay_entry(self, entry: List[Any]):
+        record = None
+        if len(entry) > 2:
+            record = dict(zip(("display_date", "total_order", "net_income", "usable_income"), entry[2:]))
+        self.add(entry[0], entry[1], record)
+
+    @property
+    def journal_file(self) -> str:
+        return os.path.splitext(self.state_file)[0] + '.journal'
+
+    def flush(self, signature: Dict[str, Any]):
+        """Tulis baris baru ke journal; snapshot penuh setelah reset atau saat journal dilipat"""
+        if not self.state_file:
+            self.pending = []
+            return
+        os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+        if self.rewrite_all or self.journal_rows + len(self.pending) > max(self.COMPACT_MIN_ROWS, self.row_count // 2):
+            self.write_snapshot(signature)
+            return
+        if not self.pending:
+            return
+
+        # Satu baris JSON per flush; signature CSV sesudah append untuk validasi saat restore
+        line = json.dumps({"rows": self.pending, "signature": signature}, separators=(',', ':'))
+        with open(self.journal_file, 'a') as file:
+            file.write(line + '\n')
+        self.journal_rows += len(self.pending)
+        self.pending = []
+
+    def write_snapshot(self, signature: Dict[str, Any]):
+        payload = {"signature": signature, "row_count": self.row_count, "years": self.years}
+        temp_path = self.state_file + '.tmp'
+        with open(temp_path, 'w') as file:
+            json.dump(payload, file, separators=(',', ':'))
+        os.replace(temp_path, self.state_file)
+        # Journal lama sudah termasuk snapshot; jika crash sebelum ini, row ID-nya tidak cocok saat restore
+        with open(self.journal_file, 'w'):
+            pass
+        self.pending = []
+        self.journal_rows = 0
+        self.rewrite_all = False
+
+    def restore(self, signature: Dict[str, Any]) -> bool:
+        if not self.state_file:
+            return False
+        try:
+            with open(self.state_file, 'r') as file:
+                payload = json.load(file)
+        except (OSError, ValueError):
+            return False
+
+        self.reset()
+        self.years = payload["years"]
+        self.row_count = payload["row_count"]
+        latest = payload.get("signature")
+        try:
+            with open(self.journal_file, 'r') as file:
+                for line in file:
+                    try:
+                        batch = json.loads(line)
+                    except ValueError:
+                        break  # baris terakhir terpotong (crash saat append)
+                    if not batch["rows"] or batch["rows"][0][0] != self.row_count:
+                        break
+                    for entry in batch["rows"]:
+                        self.replay_entry(entry)
+                    self.journal_rows += len(batch["rows"])
+                    latest = batch["signature"]
+        except OSError:
+            pass
+
+        if latest != signature:
+            self.reset()
+            return False
+        self.rewrite_all = False
+        return True
@@ -0,0 +1,339 @@
+import bisect
+import json
+from array import array
+from itertools import accumulate, chain
+from operator import itemgetter
+from datetime import datetime, timedelta, tzinfo
+from typing import Dict, Any, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+# Absolute imports
+import os
+import sys
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from app.utils.helpers import get_record_datetime
+
+class SortedSeries:
+    """Kolom-kolom ringkas (array) terurut epoch beserta prefix kumulatif per kolom
+
+    Total rentang = dua bisect + dua lookup prefix. Order baru (epoch terbesar)
+    memperpanjang prefix O(1); sisip/hapus di tengah hanya menandai prefix tidak
+    valid mulai posisi itu, dan prefix dihitung ulang sekali saat query berikutnya.
+    Batch dari replay ditampung lalu digabung & diurutkan sekali.
+
+    Disimpan sebagai baris biner (epoch + 3 kolom); flush hanya menulis baris
+    sejak posisi pertama yang berubah, jadi order baru cukup menambah ekor file.
+    """
+
+    FIELDS = ("revenue", "net_income", "usable_income")
+    ROW_BYTES = 8 * (1 + len(FIELDS))
+
+    def __init__(self):
+        self.epochs = array('d')
+        self.values: Dict[str, array] = {field: array('d') for field in self.FIELDS}
+        self.cumulative: Dict[str, array] = {field: array('d') for field in self.FIELDS}
+        self.valid = 0  # prefix benar untuk posisi < valid
+        self.persisted = 0  # baris < persisted sama dengan isi file
+        self.pending: List[Tuple[float, float, float, float]] = []
+
+    def insert(self, epoch: float, revenue: float, net_income: float, usable_income: float):
+        self.merge_pending()
+        row = (revenue, net_income, usable_income)
+        # Order baru hampir selalu paling akhir -> append O(1); backfill pakai bisect
+        if not self.epochs or epoch >= self.epochs[-1]:
+            appended = self.valid == len(self.epochs)
+            self.epochs.append(epoch)
+            for field, value in zip(self.FIELDS, row):
+                self.values[field].append(value)
+                cumulative = self.cumulative[field]
+                cumulative.append((cumulative[-1] if cumulative else 0.0) + value if appended else 0.0)
+            if appended:
+                self.valid += 1
+            return
+
+        position = bisect.bisect_right(self.epochs, epoch)
+        self.epochs.insert(position, epoch)
+        for field, value in zip(self.FIELDS, row):
+            self.values[field].insert(position, value)
+            self.cumulative[field].insert(position, 0.0)
+        self.valid = min(self.valid, position)
+        self.persisted = min(self.persisted, position)
+
+    def extend(self, rows: List[Tuple[float, float, float, float]]):
+        """Tampung banyak baris (epoch, revenue, net_income, usable_income); digabung saat dibutuhkan"""
+        self.pending.extend(rows)
+
+    def remove(self, epoch: float, revenue: float, net_income: float, usable_income: float) -> bool:
+        self.merge_pending()
+        position = bisect.bisect_left(self.epochs, epoch)
+        while position < len(self.epochs) and self.epochs[position] == epoch:
+            if self.values["revenue"][position] == revenue and self.values["net_income"][position] == net_income \
+                    and self.values["usable_income"][position] == usable_income:
+                del self.epochs[position]
+                for field in self.FIELDS:
+                    del self.values[field][position]
+                    del self.cumulative[field][position]
+                self.valid = min(self.valid, position)
+                self.persisted = min(self.persisted, position)
+                return True
+            position += 1
+        return False
+
+    def merge_pending(self):
+        if not self.pending:
+            return
+        pending = sorted(self.pending, key=itemgetter(0))
+        self.pending = []
+        if not self.epochs or pending[0][0] >= self.epochs[-1]:
+            rows = pending
+            first_changed = len(self.epochs)
+        else:
+            first_changed = bisect.bisect_right(self.epochs, pending[0][0])
+            # Urutkan ulang ekor mulai posisi backfill pertama saja
+            tail = list(zip(self.epochs[first_changed:], *(self.values[field][first_changed:] for field in self.FIELDS)))
+            rows = sorted(tail + pending, key=itemgetter(0))
+            del self.epochs[first_changed:]
+            for field in self.FIELDS:
+                del self.values[field][first_changed:]
+                del self.cumulative[field][first_changed:]
+
+        self.epochs.extend(row[0] for row in rows)
+        for column, field in enumerate(self.FIELDS, start=1):
+            self.values[field].extend(row[column] for row in rows)
+            self.cumulative[field].extend(0.0 for _ in rows)
+        self.valid = min(self.valid, first_changed)
+        self.persisted = min(self.persisted, first_changed)
+
+    def refresh(self):
+        """Gabung batch tertunda lalu hitung ulang prefix dari posisi pertama yang berubah"""
+        self.merge_pending()
+        if self.valid == len(self.epochs):
+            return
+        start = self.valid
+        for field in self.FIELDS:
+            cumulative = self.cumulative[field]
+            initial = cumulative[start - 1] if start > 0 else 0.0
+            cumulative[start:] = array('d', accumulate(self.values[field][start:], initial=initial))[1:]
+        self.valid = len(self.epochs)
+
+    def prefix(self, field: str, position: int) -> float:
+        """Total `field` untuk posisi < `position`"""
+        return self.cumulative[field][position - 1] if position > 0 else 0.0
+
+    def totals(self, start: float, end: float) -> Dict[str, float]:
+        """Total untuk rentang [start, end) lewat dua bisect + dua lookup prefix"""
+        self.refresh()
+        lo = bisect.bisect_left(self.epochs, start)
+        hi = bisect.bisect_left(self.epochs, end)
+        totals: Dict[str, float] = {"orders": hi - lo}
+        for field in self.FIELDS:
+            totals[field] = round(self.prefix(field, hi) - self.prefix(field, lo), 6) if hi > lo else 0
+        return {"revenue": totals["revenue"], "orders": totals["orders"],
+                "net_income": totals["net_income"], "usable_income": totals["usable_income"]}
+
+    def write_tail(self, path: str):
+        """Tulis ulang file mulai baris `persisted` (biasanya hanya order baru)"""
+        self.merge_pending()
+        start = self.persisted if os.path.exists(path) else 0
+        columns = [self.epochs[start:]] + [self.values[field][start:] for field in self.FIELDS]
+        rows = array('d', chain.from_iterable(zip(*columns)))
+        with open(path, 'r+b' if start else 'wb') as file:
+            file.truncate(start * self.ROW_BYTES)
+            file.seek(start * self.ROW_BYTES)
+            rows.tofile(file)
+        self.persisted = len(self.epochs)
+
+    @classmethod
+    def load(cls, path: str, count: int) -> Optional["SortedSeries"]:
+        """Seri dari `count` baris pertama file; None jika file lebih pendek"""
+        data = array('d')
+        with open(path, 'rb') as file:
+            data.frombytes(file.read(count * cls.ROW_BYTES))
+        width = 1 + len(cls.FIELDS)
+        if len(data) != count * width:
+            return None
+
+        series = cls()
+        series.epochs = data[0::width]
+        for column, field in enumerate(cls.FIELDS, start=1):
+            series.values[field] = data[column::width]
+            series.cumulative[field] = array('d', [0.0]) * count
+        series.persisted = count
+        return series
+
+    def first_epoch(self) -> float:
+        self.merge_pending()
+        return self.epochs[0]
+
+    def last_epoch(self) -> float:
+        self.merge_pending()
+        return self.epochs[-1]
+
+    def __len__(self):
+        return len(self.epochs) + len(self.pending)
+
+class TimeIndex:
+    """Index waktu terurut untuk agregasi per bucket (hour/day/week/month) tanpa full scan"""
+
+    BUCKETS = ("hour", "day", "week", "month")
+    MAX_BUCKETS = 10000
+    ALL_TYPES = "__all__"
+    FORMAT_VERSION = 1
+
+    def __init__(self, timezone: str = "Asia/Jakarta", rollup_dir: Optional[str] = None):
+        # Timestamp di CSV adalah jam lokal driver pada zona waktu ini
+        self.data_tz = ZoneInfo(timezone)
+        # Tanpa rollup_dir (misal view sementara) index tidak disimpan
+        self.rollup_dir = rollup_dir
+        self.reset()
+
+    def reset(self):
+        self.all = SortedSeries()
+        self.by_type: Dict[str, SortedSeries] = {}
+        self.series_files: Dict[str, str] = {}
+        self.restored_signature: Optional[Dict[str, Any]] = None
+
+    def record_values(self, record: Dict[str, Any]) -> Tuple[float, float, float, float]:
+        epoch = get_record_datetime(record).replace(tzinfo=self.data_tz).timestamp()
+        return epoch, record['total_order'], record['net_income'], record['usable_income']
+
+    def add(self, record: Dict[str, Any]):
+        values = self.record_values(record)
+        self.all.insert(*values)
+        self.by_type.setdefault(record['order_type'], SortedSeries()).insert(*values)
+
+    def add_batch(self, records: List[Dict[str, Any]]):
+        """Replay/import: baris ditampung per seri dan diurutkan sekali saat query pertama"""
+        by_type: Dict[str, List[Tuple[float, float, float, float]]] = {}
+        rows = []
+        for record in records:
+            values = self.record_values(record)
+            rows.append(values)
+            by_type.setdefault(record['order_type'], []).append(values)
+        self.all.extend(rows)
+        for order_type, type_rows in by_type.items():
+            self.by_type.setdefault(order_type, SortedSeries()).extend(type_rows)
+
+    def remove(self, record: Dict[str, Any]):
+        values = self.record_values(record)
+        self.all.remove(*values)
+        series = self.by_type.get(record['order_type'])
+        if series is not None:
+            series.remove(*values)
+
+    def named_series(self) -> Dict[str, SortedSeries]:
+        series = dict(self.by_type)
+        series[self.ALL_TYPES] = self.all
+        return series
+
+    @property
+    def state_file(self) -> str:
+        return os.path.join(self.rollup_dir, "time_index.json")
+
+    def flush(self, signature: Dict[str, Any]):
+        """Ekor setiap seri ke file biner, lalu header (signature & jumlah baris) ditulis terakhir"""
+        if not self.rollup_dir:
+            return
+        os.makedirs(self.rollup_dir, exist_ok=True)
+        counts = {}
+        for name, series in self.named_series().items():
+            file_name = self.series_files.setdefault(name, f"time-{len(self.series_files)}.bin")
+            series.write_tail(os.path.join(self.rollup_dir, file_name))
+            counts[name] = len(series.epochs)
+
+        payload = {"format": self.FORMAT_VERSION, "signature": signature, "timezone": str(self.data_tz),
+                   "files": self.series_files, "counts": counts}
+        temp_path = self.state_file + '.tmp'
+        with open(temp_path, 'w') as file:
+            json.dump(payload, file, separators=(',', ':'))
+        os.replace(temp_path, self.state_file)
+
+    def restore(self, signature: Dict[str, Any]) -> bool:
+        if not self.rollup_dir:
+            return False
+        try:
+            with open(self.state_file, 'r') as file:
+                payload = json.load(file)
+            if payload.get("format") != self.FORMAT_VERSION or payload.get("signature") != signature \
+                    or payload.get("timezone") != str(self.data_tz):
+                return False
+            loaded = {}
+            for name, file_name in payload["files"].items():
+                series = SortedSeries.load(os.path.join(self.rollup_dir, file_name), payload["counts"][name])
+                if series is None:
+                    return False
+                loaded[name] = series
+        except (OSError, KeyError, ValueError):
+            return False
+
+        self.reset()
+        self.all = loaded.pop(self.ALL_TYPES, SortedSeries())
+        self.by_type = loaded
+        self.series_files = dict(payload["files"])
+        self.restored_signature = signature
+        return True
+
+    def floor(self, moment: datetime, bucket: str) -> datetime:
+        """Awal bucket (waktu lokal) yang memuat `moment`"""
+        if bucket == "hour":
+            return moment.replace(minute=0, second=0, microsecond=0)
+        moment = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+        if bucket == "week":
+            return moment - timedelta(days=moment.weekday())
+        if bucket == "month":
+            return moment.replace(day=1)
+        return moment
+
+    def step(self, moment: datetime, bucket: str) -> datetime:
+        """Awal bucket berikutnya, dihitung di jam dinding lokal agar aman terhadap DST"""
+        if bucket == "hour":
+            return moment + timedelta(hours=1)
+        if bucket == "day":
+            return moment + timedelta(days=1)
+        if bucket == "week":
+            return moment + timedelta(weeks=1)
+        if moment.month == 12:
+            return moment.replace(year=moment.year + 1, month=1)
+        return moment.replace(month=moment.month + 1)
+
+    def aggregate(self, bucket: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                  tz: Optional[tzinfo] = None, order_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Seri agregat per bucket untuk rentang [start, end)
+
+        `start`/`end` adalah waktu naive pada zona `tz` (default: zona waktu data).
+        Batas bucket dihitung di zona `tz`, lalu total tiap bucket diambil dari index.
+        """
+        if bucket not in self.BUCKETS:
+            raise ValueError(f"Unknown bucket: {bucket}")
+
+        tz = tz or self.data_tz
+        series = self.by_type.get(order_type) if order_type else self.all
+        if series is None or len(series) == 0:
+            return []
+
+        if start is None:
+            start = datetime.fromtimestamp(series.first_epoch(), tz).replace(tzinfo=None)
+        if end is None:
+            end = datetime.fromtimestamp(series.last_epoch(), tz).replace(tzinfo=None) + timedelta(seconds=1)
+        if end <= start:
+            return []
+
+        results = []
+        current = self.floor(start, bucket)
+        while current < end:
+            following = self.step(current, bucket)
+            lower = max(current, start).replace(tzinfo=tz).timestamp()
+            upper = min(following, end).replace(tzinfo=tz).timestamp()
+
+            totals = series.totals(lower, upper)
+            totals["start"] = current.replace(tzinfo=tz).isoformat()
+            results.append(totals)
+
+            if len(results) > self.MAX_BUCKETS:
+                raise ValueError(f"Too many buckets (max {self.MAX_BUCKETS}), persempit rentang waktu")
+            current = following
+
+        return results
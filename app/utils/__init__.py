@@ -1,4 +1,6 @@
 from .config import Config
 from .helpers import format_currency, format_percentage
+from .quantile_sketch import KLLSketch
+from .downsample import lttb_indices, downsample_series
 
-__all__ = ['Config', 'format_currency', 'format_percentage']
+__all__ = ['Config', 'format_currency', 'format_percentage', 'KLLSketch', 'lttb_indices', 'downsample_series']
@@ -0,0 +1,56 @@
+from typing import Dict, Any, List, Optional, Sequence
+
+def lttb_indices(values: Sequence[float], max_points: int, x: Optional[Sequence[float]] = None) -> List[int]:
+    """Largest-Triangle-Three-Buckets: pilih index titik yang paling menjaga bentuk grafik
+
+    Titik pertama dan terakhir selalu ikut; sisanya satu titik per bucket, yaitu
+    titik yang membentuk segitiga terbesar dengan titik terpilih sebelumnya dan
+    rata-rata bucket berikutnya. `x` default-nya index (seri berjarak sama).
+    """
+    count = len(values)
+    if max_points >= count or count <= 2:
+        return list(range(count))
+    if max_points < 3:
+        return [0, count - 1][:max(1, max_points)]
+
+    if x is None:
+        x = range(count)
+
+    selected = [0]
+    bucket_size = (count - 2) / (max_points - 2)
+    previous = 0
+
+    for bucket in range(max_points - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+
+        # Rata-rata bucket berikutnya (untuk bucket terakhir: titik terakhir)
+        next_start = end
+        next_end = min(int((bucket + 2) * bucket_size) + 1, count)
+        if next_start >= next_end:
+            next_start, next_end = count - 1, count
+        span = next_end - next_start
+        avg_x = sum(x[i] for i in range(next_start, next_end)) / span
+        avg_y = sum(values[i] for i in range(next_start, next_end)) / span
+
+        prev_x, prev_y = x[previous], values[previous]
+        best_index, best_area = start, -1.0
+        for i in range(start, end):
+            area = abs((prev_x - avg_x) * (values[i] - prev_y) - (prev_x - x[i]) * (avg_y - prev_y))
+            if area > best_area:
+                best_index, best_area = i, area
+
+        selected.append(best_index)
+        previous = best_index
+
+    selected.append(count - 1)
+    return selected
+
+def downsample_series(series: Dict[str, List[Any]], value_key: str, max_points: Optional[int],
+                      x: Optional[Sequence[float]] = None) -> Dict[str, List[Any]]:
+    """Downsample beberapa list paralel (labels, revenue, orders, ...) berdasarkan `value_key`"""
+    values = series[value_key]
+    if not max_points or max_points >= len(values):
+        return series
+    indices = lttb_indices(values, max_points, x)
+    return {key: [column[i] for i in indices] for key, column in series.items()}
@@ -1,3 +1,5 @@
+from datetime import date, datetime, time
+
 def format_currency(amount: float) -> str:
     """Format currency to Indonesian Rupiah"""
     return 'Rp ' + format(int(amount), ',d').replace(',', '.')
@@ -8,7 +10,6 @@ def format_percentage(value: float) -> str:
 
 def validate_date(date_string: str) -> bool:
     """Validate date string in YYYY-MM-DD format"""
-    from datetime import datetime
     try:
         datetime.strptime(date_string, '%Y-%m-%d')
         return True
@@ -29,3 +30,13 @@ def clean_numeric_input(value: str) -> float:
         return float(cleaned)
     except (ValueError, TypeError):
         return 0.0
+
+def get_record_datetime(record: dict):
+    """Waktu kejadian order: display_date + jam dari timestamp (naive, zona waktu data)"""
+    # fromisoformat jauh lebih cepat dari strptime; dipanggil per order saat replay/import
+    date_part = date.fromisoformat(record['display_date'])
+    try:
+        time_part = datetime.fromisoformat(record.get('timestamp', '')).time()
+    except ValueError:
+        time_part = time(0, 0)
+    return datetime.combine(date_part, time_part)
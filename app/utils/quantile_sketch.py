@@ -0,0 +1,111 @@
+import math
+import random
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+class KLLSketch:
+    """KLL streaming quantile sketch (Karnin, Lang & Liberty) yang bisa di-merge
+
+    Memori ~O(k) berapapun jumlah data; error rank sekitar 1.65/k.
+    """
+
+    def __init__(self, k: int = 128, c: float = 2 / 3, seed: Optional[int] = None):
+        self.k = k
+        self.c = c
+        self.n = 0
+        self.rng = random.Random(seed)
+        self.compactors: List[List[float]] = [[]]
+        self.update_limits()
+
+    def capacity(self, level: int) -> int:
+        depth = len(self.compactors) - level - 1
+        return max(2, int(math.ceil(self.k * self.c ** depth)))
+
+    def update_limits(self):
+        self.size = sum(len(compactor) for compactor in self.compactors)
+        self.max_size = sum(self.capacity(level) for level in range(len(self.compactors)))
+
+    def update(self, value: float):
+        self.compactors[0].append(value)
+        self.n += 1
+        self.size += 1
+        if self.size >= self.max_size:
+            self.compress()
+
+    def compress(self):
+        """Kompaksi level pertama yang penuh: separuh item naik level dengan bobot 2x"""
+        for level in range(len(self.compactors)):
+            if len(self.compactors[level]) < self.capacity(level):
+                continue
+
+            if level + 1 >= len(self.compactors):
+                self.compactors.append([])
+
+            items = self.compactors[level]
+            leftover = [items.pop()] if len(items) % 2 else []
+            items.sort()
+            offset = 1 if self.rng.random() < 0.5 else 0
+            self.compactors[level + 1].extend(items[offset::2])
+            self.compactors[level] = leftover
+
+            self.update_limits()
+            if self.size < self.max_size:
+                break
+
+    def merge(self, other: 'KLLSketch'):
+        """Gabungkan sketch lain ke sketch ini (misal antar bulan atau antar driver)"""
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append([])
+        for level, compactor in enumerate(other.compactors):
+            self.compactors[level].extend(compactor)
+        self.n += other.n
+        self.update_limits()
+        while self.size >= self.max_size:
+            self.compress()
+
+    def quantiles(self, fractions: Sequence[float]) -> List[float]:
+        """Perkiraan nilai pada tiap fraksi (0..1)"""
+        if self.n == 0:
+            return [0.0 for _ in fractions]
+
+        weighted = sorted(
+            (value, 2 ** level)
+            for level, compactor in enumerate(self.compactors)
+            for value in compactor
+        )
+        total_weight = sum(weight for _, weight in weighted)
+
+        results = []
+        for fraction in fractions:
+            target = fraction * total_weight
+            cumulative = 0
+            result = weighted[-1][0]
+            for value, weight in weighted:
+                cumulative += weight
+                if cumulative >= target:
+                    result = value
+                    break
+            results.append(result)
+        return results
+
+    def weighted_items(self) -> Tuple[List[float], List[int]]:
+        """Nilai tersimpan beserta bobotnya (2^level), untuk sampling dari distribusi"""
+        values, weights = [], []
+        for level, compactor in enumerate(self.compactors):
+            values.extend(compactor)
+            weights.extend([2 ** level] * len(compactor))
+        return values, weights
+
+    def percentiles(self) -> Dict[str, float]:
+        p50, p90, p99 = self.quantiles((0.5, 0.9, 0.99))
+        return {"p50": p50, "p90": p90, "p99": p99}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"k": self.k, "n": self.n, "compactors": self.compactors}
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any]) -> 'KLLSketch':
+        sketch = cls(k=payload["k"])
+        sketch.n = payload["n"]
+        sketch.compactors = [list(compactor) for compactor in payload["compactors"]] or [[]]
+        sketch.update_limits()
+        return sketch
@@ -1,11 +1,14 @@
+import json
 from datetime import datetime
 from typing import Dict, Any
 
 from ..services.finance_manager import ExpertFinanceManager
 
 class TemplateRenderer:
-    def __init__(self, finance_manager: ExpertFinanceManager):
+    def __init__(self, finance_manager: ExpertFinanceManager, base_path: str = ''):
         self.finance_manager = finance_manager
+        # Prefix URL tenant, misal `/d/<driver_id>`; kosong untuk data default
+        self.base_path = base_path
 
     def create_base_template(self, title: str, active_page: str, content: str) -> str:
         """Create base template untuk semua halaman"""
@@ -19,6 +22,7 @@ class TemplateRenderer:
         orders_class = get_nav_class('orders')
         history_class = get_nav_class('history')
         targets_class = get_nav_class('targets')
+        base_path = self.base_path
 
         return f'''
 <!DOCTYPE html>
@@ -30,6 +34,7 @@ class TemplateRenderer:
     <title>{title} - Maxim Finance AI</title>
     <script src="https://cdn.tailwindcss.com"></script>
     <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
+    <script>const BASE_PATH = {json.dumps(base_path)};</script>
     <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css" rel="stylesheet">
     <style>
         .gradient-bg {{
@@ -95,16 +100,16 @@ class TemplateRenderer:
                     </h1>
                 </div>
                 <div class="flex flex-wrap justify-center gap-2">
-                    <a href="/dashboard" class="px-3 md:px-4 py-2 rounded-lg transition-all duration-300 {dashboard_class} mobile-text-center">
+                    <a href="{base_path}/dashboard" class="px-3 md:px-4 py-2 rounded-lg transition-all duration-300 {dashboard_class} mobile-text-center">
                         <i class="fas fa-tachometer-alt mr-2"></i>Dashboard
                     </a>
-                    <a href="/orders" class="px-3 md:px-4 py-2 rounded-lg transition-all duration-300 {orders_class} mobile-text-center">
+                    <a href="{base_path}/orders" class="px-3 md:px-4 py-2 rounded-lg transition-all duration-300 {orders_class} mobile-text-center">
                         <i class="fas fa-plus-circle mr-2"></i>Add Order
                     </a>
-                    <a href="/history" class="px-3 md:px-4 py-2 rounded-lg transition-all duration-300 {history_class} mobile-text-center">
+                    <a href="{base_path}/history" class="px-3 md:px-4 py-2 rounded-lg transition-all duration-300 {history_class} mobile-text-center">
                         <i class="fas fa-history mr-2"></i>History
                     </a>
-                    <a href="/targets" class="px-3 md:px-4 py-2 rounded-lg transition-all duration-300 {targets_class} mobile-text-center">
+                    <a href="{base_path}/targets" class="px-3 md:px-4 py-2 rounded-lg transition-all duration-300 {targets_class} mobile-text-center">
                         <i class="fas fa-bullseye mr-2"></i>Targets
                     </a>
                 </div>
@@ -211,7 +216,7 @@ class TemplateRenderer:
                         </div>
                         <div class="mt-4 flex items-center text-sm">
                             <span class="text-green-600 font-medium" id="revenueTrend">+0%</span>
-                            <span class="text-gray-500 ml-2">vs kemarin</span>
+                            <span class="text-gray-500 ml-2">vs kemarin (jam yang sama)</span>
                         </div>
                     </div>
 
@@ -358,7 +363,7 @@ class TemplateRenderer:
                 // Load dashboard data
                 async function loadDashboardData() {
                     try {
-                        const response = await fetch('/api/analytics');
+                        const response = await fetch(BASE_PATH + '/api/analytics');
                         const data = await response.json();
                         
                         if (data.success) {
@@ -385,6 +390,9 @@ class TemplateRenderer:
                     // Update order stats
                     document.getElementById('orderStats').textContent = `Hari ini: ${analytics.time_metrics.today_orders} orders`;
                     
+                    // Revenue hari ini vs kemarin sampai jam yang sama (dihitung di server)
+                    updateRevenueTrend(analytics.period_comparison);
+
                     // Update AI Insights
                     updateAIInsights(analytics.ai_analysis);
                     
@@ -571,6 +579,18 @@ class TemplateRenderer:
                     });
                 }
 
+                function updateRevenueTrend(comparison) {
+                    const trend = document.getElementById('revenueTrend');
+                    const percent = comparison ? comparison.day.change.revenue_pct : null;
+                    if (percent === null || percent === undefined) {
+                        trend.textContent = '-';
+                        trend.className = 'text-gray-500 font-medium';
+                        return;
+                    }
+                    trend.textContent = `${percent >= 0 ? '+' : ''}${percent.toFixed(1)}%`;
+                    trend.className = `${percent >= 0 ? 'text-green-600' : 'text-red-600'} font-medium`;
+                }
+
                 function updateAIInsights(insights) {
                     const container = document.getElementById('aiInsights');
                     if (insights.length === 0) {
@@ -640,23 +660,69 @@ class TemplateRenderer:
                         high: 'green'
                     };
 
+                    // Model Holt-Winters mengirim interval prediksi, model lama (dan masa warm-up) hanya label confidence
+                    const interval = prediction.intervals && prediction.intervals['80'];
+                    const confidence = confidenceColors[prediction.confidence] ? prediction.confidence : 'low';
+                    const badge = interval ? `
+                                <span class="px-2 py-1 bg-blue-100 text-blue-600 rounded-full text-xs font-medium">
+                                    80%: ${formatCurrency(interval.low)} - ${formatCurrency(interval.high)}
+                                </span>` : `
+                                <span class="px-2 py-1 bg-${confidenceColors[confidence]}-100 text-${confidenceColors[confidence]}-600 rounded-full text-xs font-medium">
+                                    ${confidence.toUpperCase()} CONFIDENCE
+                                </span>`;
+
                     container.innerHTML = `
                         <div class="text-center">
                             <p class="text-2xl font-bold text-gray-800 mb-2">${formatCurrency(prediction.prediction)}</p>
-                            <div class="flex items-center justify-center mb-3">
-                                <span class="px-2 py-1 bg-${confidenceColors[prediction.confidence]}-100 text-${confidenceColors[prediction.confidence]}-600 rounded-full text-xs font-medium">
-                                    ${prediction.confidence.toUpperCase()} CONFIDENCE
-                                </span>
+                            <div class="flex items-center justify-center mb-3">${badge}
                             </div>
                             <p class="text-sm text-gray-600">Rata-rata: ${formatCurrency(prediction.daily_average)}/hari</p>
                         </div>
                     `;
                 }
 
+                function applyAnalyticsDelta(delta) {
+                    // Update header stats langsung dari delta SSE
+                    document.getElementById('totalRevenue').textContent = formatCurrency(delta.summary.total_revenue);
+                    document.getElementById('usableIncome').textContent = formatCurrency(delta.summary.total_usable_income);
+                    document.getElementById('totalOrders').textContent = delta.summary.total_orders.toLocaleString();
+                    document.getElementById('efficiencyScore').textContent = formatPercentage(delta.summary.efficiency_ratio);
+                    document.getElementById('orderStats').textContent = `Hari ini: ${delta.time_metrics.today_orders} orders`;
+                }
+
+                let fullRefreshTimer = null;
+                function scheduleFullRefresh() {
+                    // Gabungkan beberapa event beruntun menjadi satu fetch penuh
+                    clearTimeout(fullRefreshTimer);
+                    fullRefreshTimer = setTimeout(loadDashboardData, 2000);
+                }
+
+                function connectLiveUpdates() {
+                    if (!window.EventSource) {
+                        // Browser lama: fallback ke polling
+                        setInterval(loadDashboardData, 30000);
+                        return;
+                    }
+
+                    const source = new EventSource(BASE_PATH + '/api/stream');
+                    source.addEventListener('analytics', (event) => {
+                        applyAnalyticsDelta(JSON.parse(event.data));
+                        scheduleFullRefresh();
+                    });
+                    source.addEventListener('advisor', (event) => {
+                        // Insight, tips & prediksi selesai dihitung ulang di server
+                        const advisor = JSON.parse(event.data);
+                        updateAIInsights(advisor.ai_analysis);
+                        updateFinancialTips(advisor.financial_tips);
+                        updateEarningsPrediction(advisor.earnings_prediction);
+                    });
+                }
+
                 // Load dashboard on page load
-                document.addEventListener('DOMContentLoaded', loadDashboardData);
-                // Refresh every 30 seconds
-                setInterval(loadDashboardData, 30000);
+                document.addEventListener('DOMContentLoaded', () => {
+                    loadDashboardData();
+                    connectLiveUpdates();
+                });
             </script>
             '''
         )
@@ -834,7 +900,7 @@ class TemplateRenderer:
                     }
 
                     try {
-                        const response = await fetch('/api/add-order', {
+                        const response = await fetch(BASE_PATH + '/api/add-order', {
                             method: 'POST',
                             headers: {
                                 'Content-Type': 'application/json',
@@ -850,6 +916,10 @@ class TemplateRenderer:
 
                         if (result.success) {
                             showAlert(result.message, 'success');
+                            if (result.anomaly) {
+                                // Kemungkinan salah ketik nominal (misal kelebihan satu nol)
+                                showAlert(`⚠️ Nominal tidak biasa: ${formatCurrency(totalOrder)}, biasanya sekitar ${formatCurrency(result.anomaly.expected)}. Cek kembali di Riwayat.`, 'error');
+                            }
                             document.getElementById('orderForm').reset();
                             document.getElementById('previewSection').classList.add('hidden');
                             
@@ -917,6 +987,15 @@ class TemplateRenderer:
                     </div>
                 </div>
 
+                <!-- Drill-down Tahun > Bulan > Hari > Order -->
+                <div class="glass-card rounded-2xl p-6">
+                    <div class="flex items-center justify-between mb-4">
+                        <h3 class="text-lg font-semibold text-gray-800"><i class="fas fa-sitemap mr-2 text-purple-600"></i>Jelajah Riwayat</h3>
+                        <div id="historyBreadcrumb" class="text-sm text-gray-600"></div>
+                    </div>
+                    <div id="historyLevel" class="grid grid-cols-2 md:grid-cols-4 gap-3"></div>
+                </div>
+
                 <!-- Filters -->
                 <div class="glass-card rounded-2xl p-6">
                     <div class="grid grid-cols-1 md:grid-cols-4 gap-4">
@@ -1008,7 +1087,7 @@ class TemplateRenderer:
                         document.getElementById('loadingState').classList.remove('hidden');
                         document.getElementById('emptyState').classList.add('hidden');
                         
-                        const response = await fetch('/api/data');
+                        const response = await fetch(BASE_PATH + '/api/data');
                         const data = await response.json();
                         
                         if (data.success) {
@@ -1133,7 +1212,7 @@ class TemplateRenderer:
 
                     try {
                         const indices = Array.from(selectedTransactions);
-                        const response = await fetch('/api/delete-orders', {
+                        const response = await fetch(BASE_PATH + '/api/delete-orders', {
                             method: 'POST',
                             headers: {
                                 'Content-Type': 'application/json',
@@ -1166,12 +1245,77 @@ class TemplateRenderer:
                     showAlert('Fitur export CSV akan segera hadir!', 'info');
                 }
 
+                let historyPath = {};
+
+                async function loadHistoryLevel(path) {
+                    // Server hanya membaca level yang sedang dilihat (order dibaca per hari)
+                    historyPath = path;
+                    const params = new URLSearchParams(path);
+                    try {
+                        const response = await fetch(BASE_PATH + '/api/history-index?' + params.toString());
+                        const data = await response.json();
+                        if (data.success) {
+                            renderHistoryLevel(data.history);
+                        }
+                    } catch (error) {
+                        console.error('Error loading history level:', error);
+                    }
+                }
+
+                function renderHistoryLevel(history) {
+                    const crumbs = [`<a href="#" onclick="loadHistoryLevel({}); return false;" class="text-purple-600">Semua</a>`];
+                    if (historyPath.year) {
+                        crumbs.push(`<a href="#" onclick="loadHistoryLevel({year: '${historyPath.year}'}); return false;" class="text-purple-600">${historyPath.year}</a>`);
+                    }
+                    if (historyPath.month) {
+                        crumbs.push(`<a href="#" onclick="loadHistoryLevel({year: '${historyPath.year}', month: '${historyPath.month}'}); return false;" class="text-purple-600">${historyPath.month}</a>`);
+                    }
+                    if (historyPath.day) {
+                        crumbs.push(`<span>${historyPath.day}</span>`);
+                    }
+                    document.getElementById('historyBreadcrumb').innerHTML = crumbs.join(' / ');
+
+                    const container = document.getElementById('historyLevel');
+                    if (history.items.length === 0) {
+                        container.innerHTML = '<p class="text-gray-500 col-span-full">Belum ada data</p>';
+                        return;
+                    }
+
+                    if (history.level === 'orders') {
+                        container.innerHTML = history.items.map(order => `
+                            <div class="p-3 bg-gray-50 rounded-xl">
+                                <p class="text-sm text-gray-600">${order.timestamp.split(' ')[1] || ''} • ${order.order_type}</p>
+                                <p class="font-semibold text-gray-800">${formatCurrency(order.total_order)}</p>
+                                <p class="text-xs text-green-600">Siap pakai ${formatCurrency(order.usable_income)}</p>
+                            </div>
+                        `).join('');
+                        return;
+                    }
+
+                    const next = {
+                        years: key => ({year: key}),
+                        months: key => ({year: historyPath.year, month: key}),
+                        days: key => ({year: historyPath.year, month: historyPath.month, day: key})
+                    }[history.level];
+                    container.innerHTML = history.items.map(item => `
+                        <button onclick='loadHistoryLevel(${JSON.stringify(next(item.key))})' class="p-3 bg-gray-50 rounded-xl text-left hover:bg-purple-50 transition-colors">
+                            <p class="text-sm text-gray-600">${item.key}</p>
+                            <p class="font-semibold text-gray-800">${formatCurrency(item.revenue)}</p>
+                            <p class="text-xs text-gray-500">${item.orders} orders</p>
+                        </button>
+                    `).join('');
+                }
+
                 function refreshData() {
                     loadTransactionData();
+                    loadHistoryLevel(historyPath);
                 }
 
                 // Load data on page load
-                document.addEventListener('DOMContentLoaded', loadTransactionData);
+                document.addEventListener('DOMContentLoaded', () => {
+                    loadTransactionData();
+                    loadHistoryLevel({});
+                });
             </script>
             '''
         )
@@ -1259,6 +1403,16 @@ class TemplateRenderer:
                             </div>
                         </div>
 
+                        <!-- Target Simulation -->
+                        <div>
+                            <h3 class="text-lg font-semibold text-gray-800 mb-3">
+                                <i class="fas fa-dice mr-2"></i>Peluang Capai Target
+                            </h3>
+                            <div id="targetSimulation" class="grid grid-cols-1 md:grid-cols-2 gap-4">
+                                <!-- Will be populated by JavaScript -->
+                            </div>
+                        </div>
+
                         <!-- Action Buttons -->
                         <div class="flex flex-col md:flex-row gap-4 pt-6">
                             <button 
@@ -1331,7 +1485,7 @@ class TemplateRenderer:
             <script>
                 async function loadCurrentConfig() {
                     try {
-                        const response = await fetch('/api/config');
+                        const response = await fetch(BASE_PATH + '/api/config');
                         const data = await response.json();
                         
                         if (data.success) {
@@ -1354,7 +1508,7 @@ class TemplateRenderer:
 
                 async function updatePerformanceSummary() {
                     try {
-                        const response = await fetch('/api/analytics');
+                        const response = await fetch(BASE_PATH + '/api/analytics?fields=summary');
                         const data = await response.json();
                         
                         if (data.success) {
@@ -1381,6 +1535,55 @@ class TemplateRenderer:
                     }
                 }
 
+                let simulationTimer = null;
+
+                function scheduleTargetSimulation() {
+                    // Debounce: simulasi dijalankan setelah user berhenti mengetik/menggeser
+                    clearTimeout(simulationTimer);
+                    simulationTimer = setTimeout(updateTargetSimulation, 250);
+                }
+
+                async function updateTargetSimulation() {
+                    const params = new URLSearchParams({
+                        daily_income: parseInt(document.getElementById('targetDailyIncome').value) || 0,
+                        weekly_orders: parseInt(document.getElementById('targetWeeklyOrders').value) || 0
+                    });
+                    try {
+                        const response = await fetch(BASE_PATH + '/api/simulate-targets?' + params.toString());
+                        const data = await response.json();
+                        const container = document.getElementById('targetSimulation');
+
+                        if (!data.success || !data.simulation.available) {
+                            container.innerHTML = `
+                                <div class="bg-gray-50 rounded-xl p-4 text-sm text-gray-600 md:col-span-2">
+                                    ${data.simulation ? data.simulation.message : 'Simulasi tidak tersedia'}
+                                </div>
+                            `;
+                            return;
+                        }
+
+                        const daily = data.simulation.daily_income;
+                        const weekly = data.simulation.weekly_orders;
+                        container.innerHTML = `
+                            <div class="bg-indigo-50 rounded-xl p-4">
+                                <p class="text-sm text-indigo-600 mb-1">Pendapatan Harian ≥ ${formatCurrency(daily.target)}</p>
+                                <p class="text-2xl font-bold text-indigo-700">${formatPercentage(daily.probability * 100)}</p>
+                                <p class="text-xs text-gray-600 mt-1">Rata-rata kekurangan: ${formatCurrency(daily.expected_shortfall)}</p>
+                            </div>
+                            <div class="bg-teal-50 rounded-xl p-4">
+                                <p class="text-sm text-teal-600 mb-1">Order Mingguan ≥ ${weekly.target}</p>
+                                <p class="text-2xl font-bold text-teal-700">${formatPercentage(weekly.probability * 100)}</p>
+                                <p class="text-xs text-gray-600 mt-1">Rata-rata kekurangan: ${weekly.expected_shortfall.toFixed(1)} order</p>
+                            </div>
+                        `;
+                    } catch (error) {
+                        console.error('Error loading target simulation:', error);
+                    }
+                }
+
+                document.getElementById('targetDailyIncome').addEventListener('input', scheduleTargetSimulation);
+                document.getElementById('targetWeeklyOrders').addEventListener('input', scheduleTargetSimulation);
+
                 // Form submission
                 document.getElementById('configForm').addEventListener('submit', async function(e) {
                     e.preventDefault();
@@ -1395,7 +1598,7 @@ class TemplateRenderer:
                     };
 
                     try {
-                        const response = await fetch('/api/update-config', {
+                        const response = await fetch(BASE_PATH + '/api/update-config', {
                             method: 'POST',
                             headers: {
                                 'Content-Type': 'application/json',
@@ -1418,9 +1621,10 @@ class TemplateRenderer:
                 });
 
                 // Load data on page load
-                document.addEventListener('DOMContentLoaded', function() {
-                    loadCurrentConfig();
+                document.addEventListener('DOMContentLoaded', async function() {
+                    await loadCurrentConfig();
                     updatePerformanceSummary();
+                    updateTargetSimulation();
                 });
             </script>
             '''
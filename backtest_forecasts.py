@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Backtest model prediksi earnings secara offline
+
+Riwayat tiap driver di-replay hari per hari; di setiap cutoff semua model
+memprediksi `horizon` hari ke depan, lalu dibandingkan dengan data aktual.
+
+Contoh:
+    python backtest_forecasts.py data/riwayat_orderan.csv
+    python backtest_forecasts.py data/drivers --horizon 7 --workers 4
+"""
+
+import argparse
+import glob
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.services.backtester import MODELS, run_backtests
+
+def collect_sources(paths):
+    """File CSV langsung, atau semua riwayat_orderan.csv di dalam folder"""
+    sources = []
+    for path in paths:
+        if os.path.isdir(path):
+            sources.extend(sorted(glob.glob(os.path.join(path, '**', 'riwayat_orderan.csv'), recursive=True)))
+        else:
+            sources.append(path)
+    return sources
+
+def format_value(value, pattern: str, width: int = 0) -> str:
+    return pattern.format(value) if value is not None else "-".rjust(width)
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest model prediksi earnings terhadap riwayat CSV")
+    parser.add_argument("paths", nargs="+", help="File CSV riwayat order atau folder berisi data driver")
+    parser.add_argument("--models", default=",".join(MODELS), help=f"Model dipisah koma (default: {','.join(MODELS)})")
+    parser.add_argument("--horizon", type=int, default=7, help="Jumlah hari yang diprediksi per cutoff")
+    parser.add_argument("--min-history", type=int, default=14, help="Minimal hari riwayat sebelum cutoff pertama")
+    parser.add_argument("--workers", type=int, help="Jumlah process paralel (default: jumlah core)")
+    parser.add_argument("--per-driver", action="store_true", help="Tampilkan hasil per driver")
+    args = parser.parse_args()
+
+    sources = collect_sources(args.paths)
+    missing = [source for source in sources if not os.path.exists(source)]
+    if not sources or missing:
+        print(f"❌ File tidak ditemukan: {', '.join(missing) or ', '.join(args.paths)}")
+        sys.exit(1)
+
+    try:
+        report = run_backtests(
+            sources,
+            models=[name.strip() for name in args.models.split(",") if name.strip()],
+            horizon=max(1, args.horizon),
+            min_history=max(1, args.min_history),
+            workers=args.workers
+        )
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    print(f"📊 Backtest {len(sources)} driver, horizon {report['horizon']} hari\n")
+    print(f"{'model':>14} | {'prediksi':>8} | {'MAE':>12} | {'MAPE':>7} | {'cover 80%':>9} | {'µs/prediksi':>11}")
+    print("-" * 76)
+    for name, stats in report["models"].items():
+        print(f"{name:>14} | {stats['predictions']:>8,} | {format_value(stats['mae'], '{:>12,.0f}', 12)} | "
+              f"{format_value(stats['mape'], '{:>6.1f}%', 7)} | {format_value(stats['coverage_80'], '{:>8.1f}%', 9)} | "
+              f"{format_value(stats['us_per_prediction'], '{:>11.1f}', 11)}")
+
+    if args.per_driver:
+        for driver in report["drivers"]:
+            print(f"\n• {driver['source']} ({driver['days']} hari)")
+            for name, stats in driver["models"].items():
+                print(f"   {name:>12}: MAE {format_value(stats['mae'], '{:,.0f}')}, "
+                      f"MAPE {format_value(stats['mape'], '{:.1f}%')}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark engine analytics (python vs numpy) untuk membangun rollup
+
+Menampilkan waktu per engine untuk beberapa jumlah baris dan titik crossover,
+dipakai untuk menentukan AutoAnalyticsEngine.NUMPY_MIN_ROWS.
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.services.analytics_engine import NumpyAnalyticsEngine, PythonAnalyticsEngine
+from app.services.rollup_store import RollupStore
+
+ORDER_TYPES = ["Regular", "Premium", "Corporate", "Food", "Delivery"]
+
+def generate_records(count: int, seed: int = 42):
+    """Record sintetis dengan format sama seperti DataHandler.load_all_data()"""
+    rng = random.Random(seed)
+    start = date.today() - timedelta(days=730)
+    records = []
+    for _ in range(count):
+        total = rng.randint(10, 300) * 500.0
+        display_date = (start + timedelta(days=rng.randint(0, 730))).isoformat()
+        records.append({
+            'timestamp': f"{display_date} {rng.randint(0, 23):02d}:00:00",
+            'total_order': total,
+            'commission': total * 0.15,
+            'saldo_savings': total * 0.10,
+            'bbm_savings': total * 0.10,
+            'oli_savings': total * 0.10,
+            'net_income': total * 0.85,
+            'usable_income': total * 0.55,
+            'order_type': rng.choice(ORDER_TYPES),
+            'custom_date': '',
+            'display_date': display_date
+        })
+    return records
+
+def time_engine(engine, records, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        rollups = RollupStore(tempfile.gettempdir(), engine=engine)
+        started = time.perf_counter()
+        rollups.add_batch(records)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def snapshot(engine, records) -> str:
+    rollups = RollupStore(tempfile.gettempdir(), engine=engine)
+    rollups.add_batch(records)
+    return json.dumps({"levels": rollups.levels, "totals": rollups.totals})
+
+def main():
+    sizes = [10, 100, 500, 1000, 2000, 5000, 10000, 50000, 200000]
+    python_engine = PythonAnalyticsEngine()
+    numpy_engine = NumpyAnalyticsEngine()
+
+    print(f"{'rows':>8} | {'python (ms)':>12} | {'numpy (ms)':>11} | {'speedup':>7} | identik")
+    print("-" * 58)
+    crossover = None
+    for size in sizes:
+        records = generate_records(size)
+        repeat = 5 if size <= 10000 else 2
+        python_time = time_engine(python_engine, records, repeat)
+        numpy_time = time_engine(numpy_engine, records, repeat)
+        identical = snapshot(python_engine, records) == snapshot(numpy_engine, records)
+        speedup = python_time / numpy_time if numpy_time > 0 else 0
+
+        if crossover is None and numpy_time < python_time:
+            crossover = size
+        print(f"{size:>8,} | {python_time * 1000:>12.2f} | {numpy_time * 1000:>11.2f} | {speedup:>6.1f}x | {'ya' if identical else 'TIDAK'}")
+
+    print(f"\n📍 Crossover: numpy lebih cepat mulai ~{crossover:,} baris" if crossover else "\n📍 numpy tidak lebih cepat di ukuran yang diuji")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Maxim Finance AI - Bulk Import Riwayat Order
+
+Contoh:
+    python import_orders.py riwayat_lama.csv
+    python import_orders.py riwayat_lama.ndjson --batch-size 20000
+    python import_orders.py riwayat_budi.csv --driver budi
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.services.bulk_importer import BulkImporter
+from app.services.finance_manager import ExpertFinanceManager
+from app.services.tenant_registry import TenantRegistry
+
+def main():
+    parser = argparse.ArgumentParser(description="Import riwayat order dari CSV atau NDJSON")
+    parser.add_argument("source", help="File CSV/NDJSON berisi kolom total_order, order_type, custom_date/timestamp")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="Format file (default: dari ekstensi)")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Jumlah baris per batch tulis")
+    parser.add_argument("--checkpoint", help="Lokasi file checkpoint (default: <source>.checkpoint.json)")
+    parser.add_argument("--restart", action="store_true", help="Abaikan checkpoint dan mulai dari awal")
+    parser.add_argument("--driver", help="Import ke data driver tertentu (data/drivers/<driver_id>/)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.source):
+        print(f"❌ File tidak ditemukan: {args.source}")
+        sys.exit(1)
+
+    try:
+        data_dir = TenantRegistry().data_dir_for(args.driver) if args.driver else 'data'
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    finance_manager = ExpertFinanceManager(data_dir)
+    importer = BulkImporter(
+        finance_manager,
+        batch_size=max(1, args.batch_size),
+        checkpoint_file=args.checkpoint or f"{args.source}.checkpoint.json"
+    )
+
+    print(f"📥 Import {args.source} ...")
+    try:
+        stats = importer.run(args.source, file_format=args.format, resume=not args.restart)
+    except KeyboardInterrupt:
+        print("\n🛑 Import dihentikan. Jalankan ulang perintah yang sama untuk melanjutkan.")
+        sys.exit(130)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    print(f"\n✅ Import selesai dalam {stats['elapsed_seconds']:.1f} detik")
+    print(f"   • Diproses : {stats['processed']:,}")
+    print(f"   • Diimport : {stats['imported']:,}")
+    print(f"   • Ditolak  : {stats['rejected']:,}")
+    print(f"   • Kecepatan: {stats['rows_per_second']:,.0f} baris/detik")
+    for error in stats["errors"]:
+        print(f"   ⚠️ {error}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Test AnomalyDetector: salah ketik ditandai, pergeseran level bertahan terkejar
+"""
+
+import random
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.anomaly_detector import AnomalyDetector
+
+def make_record(value, i):
+    return {'total_order': float(value), 'order_type': 'Food', 'display_date': '2026-03-01',
+            'timestamp': f'2026-03-01 {i % 24:02d}:00:00'}
+
+def feed(detector, rng, low, high, count):
+    """Jumlah order yang ditandai di antara `count` order baru"""
+    flags = []
+    for i in range(count):
+        before = len(detector.flagged)
+        detector.add(make_record(rng.randrange(low, high + 1, 500), i))
+        flags.append(len(detector.flagged) > before)
+    return flags
+
+def test_typo_flagged_without_moving_baseline():
+    rng = random.Random(1)
+    detector = AnomalyDetector(rollup_dir='unused')
+    feed(detector, rng, 18000, 25000, 200)
+    detector.add(make_record(215000, 5))
+    assert len(detector.flagged) == 1
+    assert not any(feed(detector, rng, 18000, 25000, 50))
+
+def test_level_shift_rebaselines():
+    rng = random.Random(1)
+    detector = AnomalyDetector(rollup_dir='unused')
+    feed(detector, rng, 18000, 25000, 200)
+    flags = feed(detector, rng, 45000, 55000, 100)
+    assert flags[0]
+    assert sum(flags) <= 10
+    assert not any(flags[20:])
+    assert 40000 < detector.score(make_record(50000, 0))["expected"] < 60000
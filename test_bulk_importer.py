@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test BulkImporter: listener di-update per batch tanpa membaca ulang CSV
+"""
+
+import csv
+import random
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.bulk_importer import BulkImporter
+from app.services.data_handler import DataHandler
+from app.services.finance_manager import ExpertFinanceManager
+
+def write_source(path, rows, seed):
+    rng = random.Random(seed)
+    origin = datetime.now() - timedelta(days=365)
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(["timestamp", "total_order", "order_type"])
+        for _ in range(rows):
+            # Urutan acak: riwayat lama sering diekspor tidak terurut
+            moment = origin + timedelta(minutes=rng.randrange(0, 360 * 24 * 60))
+            writer.writerow([moment.strftime('%Y-%m-%d %H:%M:%S'), rng.randrange(5000, 150000, 500),
+                             rng.choice(["Regular", "Premium", "Food"])])
+
+def run_import(tmp_path, rows):
+    data_dir = tmp_path / f"data-{rows}"
+    source = tmp_path / f"source-{rows}.csv"
+    write_source(source, rows, seed=rows)
+    manager = ExpertFinanceManager(str(data_dir))
+
+    scans = []
+    iter_records = manager.data_handler.iter_records
+    manager.data_handler.iter_records = lambda: scans.append(1) or iter_records()
+
+    started = time.perf_counter()
+    stats = BulkImporter(manager, batch_size=1000).run(str(source), resume=False)
+    elapsed = time.perf_counter() - started
+    assert stats["imported"] == rows
+    assert not scans
+    return manager, elapsed
+
+def test_import_updates_listeners_per_batch_and_scales_linearly(tmp_path, monkeypatch):
+    _, small = run_import(tmp_path, 2000)
+    manager, large = run_import(tmp_path, 8000)
+    # 4x baris: linear ~4x, replay/insert kuadratik mendekati 16x
+    assert large < small * 8 + 0.5
+
+    # State listener sama dengan replay penuh dan langsung bisa di-restore
+    assert manager.day_index.range_totals()["orders"] == 8000
+    assert manager.time_index.all.totals(0.0, 4e9)["orders"] == 8000
+    monkeypatch.setattr(DataHandler, "iter_records", lambda self: iter(()))
+    restarted = ExpertFinanceManager(manager.data_dir)
+    assert restarted.day_index.range_totals() == manager.day_index.range_totals()
+    assert restarted.heatmap.matrices == manager.heatmap.matrices
+    assert restarted.hotspot_index.type_totals == manager.hotspot_index.type_totals
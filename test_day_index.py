@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test DayPrefixIndex terhadap penjumlahan langsung
+"""
+
+import random
+import sys
+import os
+from datetime import date, timedelta
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.day_index import DayPrefixIndex
+from app.services.rollup_store import RollupStore
+
+def make_record(rng, day):
+    total = float(rng.randrange(5000, 150000, 500))
+    return {
+        'total_order': total,
+        'commission': total * 0.15,
+        'saldo_savings': total * 0.10,
+        'bbm_savings': total * 0.10,
+        'oli_savings': total * 0.10,
+        'net_income': total * 0.85,
+        'usable_income': total * 0.55,
+        'display_date': day.isoformat()
+    }
+
+def brute_force(records, start, end):
+    selected = [record for record in records if start.isoformat() <= record['display_date'] <= end.isoformat()]
+    return len(selected), sum(record['total_order'] for record in selected)
+
+def test_range_totals_match_brute_force():
+    rng = random.Random(3)
+    index = DayPrefixIndex()
+    records = []
+    origin = date(2025, 6, 1)
+    for _ in range(2000):
+        if records and rng.random() < 0.2:
+            index.remove(records.pop(rng.randrange(len(records))))
+            continue
+        # Termasuk backfill sebelum hari pertama dan hari jauh di luar rentang biasa
+        offset = rng.choice([rng.randint(-60, 120), rng.randint(-3000, 3000)])
+        record = make_record(rng, origin + timedelta(days=offset))
+        records.append(record)
+        index.add(record)
+
+    for _ in range(500):
+        start = origin + timedelta(days=rng.randint(-3100, 3100))
+        end = start + timedelta(days=rng.randint(-5, 400))
+        totals = index.range_totals(start, end)
+        orders, revenue = brute_force(records, start, end)
+        assert totals["orders"] == orders
+        assert abs(totals["revenue"] - revenue) < 1e-3
+
+    assert index.range_totals()["orders"] == len(records)
+
+def test_size_follows_active_days():
+    index = DayPrefixIndex()
+    rng = random.Random(1)
+    index.add(make_record(rng, date(2000, 1, 1)))
+    index.add(make_record(rng, date(2026, 1, 1)))
+    assert len(index.days) == 2
+    assert index.first_day == date(2000, 1, 1)
+    assert index.last_day == date(2026, 1, 1)
+    assert index.range_totals(date(2001, 1, 1), date(2025, 12, 31))["orders"] == 0
+
+def test_empty_index():
+    index = DayPrefixIndex()
+    assert index.range_totals()["orders"] == 0
+    assert index.first_day is None and index.last_day is None
+
+def test_batch_and_rollup_builds_match_per_record_adds():
+    rng = random.Random(9)
+    origin = date(2025, 6, 1)
+    records = [make_record(rng, origin + timedelta(days=rng.randint(-400, 400))) for _ in range(3000)]
+    incremental = DayPrefixIndex()
+    for record in records:
+        incremental.add(record)
+
+    batched = DayPrefixIndex()
+    for start in range(0, len(records), 700):
+        batched.add_batch(records[start:start + 700])
+
+    rollups = RollupStore(rollup_dir='unused')
+    for record in records:
+        rollups.add(dict(record, order_type='Regular'))
+    from_rollup = DayPrefixIndex(rollups)
+    from_rollup.build_from_rollup(rollups.get_level("day"))
+
+    for index in (batched, from_rollup):
+        assert list(index.days) == list(incremental.days)
+        for field in DayPrefixIndex.FIELDS:
+            for expected, actual in zip(incremental.cumulative[field], index.cumulative[field]):
+                assert abs(expected - actual) < 1e-3
+
+def test_restore_requires_rollups_loaded_for_same_signature():
+    rollups = RollupStore(rollup_dir='unused')
+    index = DayPrefixIndex(rollups)
+    assert not index.restore({"size": 1, "mtime_ns": 1})
+    rollups.add(dict(make_record(random.Random(1), date(2026, 1, 1)), order_type='Regular'))
+    rollups.restored_signature = {"size": 1, "mtime_ns": 1}
+    assert index.restore({"size": 1, "mtime_ns": 1})
+    assert index.range_totals()["orders"] == 1
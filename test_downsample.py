@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test LTTB downsampling
+"""
+
+import math
+import random
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils.downsample import downsample_series, lttb_indices
+
+def test_keeps_endpoints_and_count():
+    rng = random.Random(5)
+    for _ in range(200):
+        count = rng.randint(0, 500)
+        values = [rng.uniform(0, 100) for _ in range(count)]
+        max_points = rng.randint(3, 600)
+        indices = lttb_indices(values, max_points)
+        assert len(indices) == min(count, max_points)
+        assert indices == sorted(set(indices))
+        if count:
+            assert indices[0] == 0 and indices[-1] == count - 1
+
+def test_keeps_spikes():
+    values = [0.0] * 1000
+    values[137] = 500.0
+    values[802] = -300.0
+    indices = lttb_indices(values, 50)
+    assert 137 in indices and 802 in indices
+
+def test_one_point_per_bucket():
+    """Setiap bucket memilih titik dengan luas segitiga terbesar"""
+    values = [math.sin(i / 15) * 100 + (i % 7) for i in range(400)]
+    indices = lttb_indices(values, 40)
+    bucket_size = (len(values) - 2) / 38
+    for bucket, selected in enumerate(indices[1:-1]):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+        assert start <= selected < end
+
+def test_uses_x_spacing():
+    # Dengan 3 titik hanya ada satu bucket: dipilih titik dengan segitiga terbesar terhadap titik pertama & terakhir
+    values = [4, 1, 3, 5, 2, 5, 6]
+    x = [3, 6, 9, 44, 50, 52, 54]
+
+    def area(i, xs):
+        return abs((xs[0] - xs[-1]) * (values[i] - values[0]) - (xs[0] - xs[i]) * (values[-1] - values[0]))
+
+    uniform_x = list(range(len(values)))
+    assert lttb_indices(values, 3) == [0, max(range(1, 6), key=lambda i: area(i, uniform_x)), 6] == [0, 1, 6]
+    assert lttb_indices(values, 3, x=x) == [0, max(range(1, 6), key=lambda i: area(i, x)), 6] == [0, 4, 6]
+
+def test_downsample_series_keeps_columns_aligned():
+    series = {"labels": [f"d{i}" for i in range(100)], "revenue": [float(i % 13) for i in range(100)],
+              "orders": list(range(100))}
+    result = downsample_series(series, "revenue", 10)
+    assert len(result["labels"]) == 10
+    for label, orders in zip(result["labels"], result["orders"]):
+        assert label == f"d{orders}"
+    assert downsample_series(series, "revenue", None) is series
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test EntryDateRollup: rollup harian mode `entered` tanpa membaca CSV
+"""
+
+import random
+import sys
+import os
+from datetime import date, timedelta
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.entry_date_rollup import EntryDateRollup
+from app.services.rollup_store import RollupStore
+
+def make_record(rng, origin):
+    entered = origin + timedelta(days=rng.randrange(0, 60))
+    display = entered
+    if rng.random() < 0.3:
+        # Order bertanggal custom, dicatat sebelum/sesudah tanggal kejadiannya
+        display = entered + timedelta(days=rng.randrange(-20, 5))
+    total = float(rng.randrange(5000, 150000, 500))
+    return {
+        'timestamp': f"{entered.isoformat()} {rng.randrange(24):02d}:{rng.randrange(60):02d}:00",
+        'display_date': display.isoformat(),
+        'order_type': rng.choice(["Regular", "Premium", "Food"]),
+        'total_order': total,
+        'commission': total * 0.15,
+        'saldo_savings': total * 0.10,
+        'bbm_savings': total * 0.10,
+        'oli_savings': total * 0.10,
+        'net_income': total * 0.85,
+        'usable_income': total * 0.55
+    }
+
+def assert_buckets_close(actual, expected):
+    assert sorted(actual) == sorted(expected)
+    for key, bucket in expected.items():
+        for field in RollupStore.VALUE_FIELDS:
+            assert abs(actual[key][field] - bucket[field]) < 1e-6
+        assert {name: values["count"] for name, values in actual[key]["by_type"].items()} == \
+            {name: values["count"] for name, values in bucket["by_type"].items() if values["count"] > 0}
+
+def test_day_buckets_match_rollup_of_entered_orders(tmp_path):
+    rng = random.Random(9)
+    origin = date(2025, 3, 1)
+    rollups = RollupStore(str(tmp_path))
+    entry_dates = EntryDateRollup(rollups)
+    records = [make_record(rng, origin) for _ in range(1500)]
+    for record in records:
+        rollups.add(record)
+        entry_dates.add(record)
+    for record in records[:200]:
+        rollups.remove(record)
+        entry_dates.remove(record)
+    records = records[200:]
+
+    for offset in range(-1, 62, 3):
+        as_of = (origin + timedelta(days=offset)).isoformat()
+        expected = RollupStore(str(tmp_path))
+        for record in records:
+            if record['timestamp'][:10] <= as_of:
+                expected.add(record)
+        assert_buckets_close(entry_dates.day_buckets(as_of), expected.get_level("day"))
+
+        view = RollupStore(str(tmp_path))
+        view.build_from_days(entry_dates.day_buckets(as_of), rollups.totals["by_type"])
+        for level in ("week", "month"):
+            assert_buckets_close(view.get_level(level), expected.get_level(level))
+        assert_buckets_close({"all": view.totals}, {"all": expected.totals})
+
+    signature = {"size": 1, "mtime_ns": 1}
+    entry_dates.flush(signature)
+    restored = EntryDateRollup(rollups)
+    assert not restored.restore({"size": 2, "mtime_ns": 2})
+    assert restored.restore(signature)
+    assert restored.buckets == entry_dates.buckets
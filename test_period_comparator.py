@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test PeriodComparator: periode pembanding dihitung sampai jam yang sama
+"""
+
+import sys
+import os
+from datetime import date, datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.ai_advisor import AIFinanceAdvisor
+from app.services.day_index import DayPrefixIndex
+from app.services.period_comparator import PeriodComparator
+from app.services.time_index import TimeIndex
+
+NOW = datetime(2026, 3, 18, 10, 30)
+
+def make_record(moment, total):
+    return {
+        'total_order': total,
+        'commission': total * 0.15,
+        'saldo_savings': total * 0.10,
+        'bbm_savings': total * 0.10,
+        'oli_savings': total * 0.10,
+        'net_income': total * 0.85,
+        'usable_income': total * 0.55,
+        'order_type': 'Regular',
+        'display_date': moment.date().isoformat(),
+        'timestamp': moment.strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+def build_comparator(orders):
+    day_index = DayPrefixIndex()
+    time_index = TimeIndex()
+    for moment, total in orders:
+        record = make_record(moment, total)
+        day_index.add(record)
+        time_index.add(record)
+    return PeriodComparator(day_index, time_index)
+
+def test_previous_day_cut_at_same_hour():
+    yesterday = NOW - timedelta(days=1)
+    comparator = build_comparator([
+        (yesterday.replace(hour=8), 20000.0),
+        (yesterday.replace(hour=10, minute=29), 15000.0),
+        (yesterday.replace(hour=10, minute=31), 40000.0),  # setelah jam sekarang
+        (yesterday.replace(hour=21), 50000.0),
+        (NOW.replace(hour=9), 30000.0)
+    ])
+    day = comparator.compare(NOW)["day"]
+    assert day["previous"]["orders"] == 2
+    assert day["previous"]["revenue"] == 35000.0
+    assert day["previous_full"]["orders"] == 4
+    assert day["current"]["revenue"] == 30000.0
+    assert day["change"]["revenue"] == -5000.0
+
+def test_week_counts_full_days_plus_partial_last_day():
+    # Rabu: minggu lalu = Senin & Selasa penuh + Rabu lalu sampai 10:30
+    last_monday = date(2026, 3, 9)
+    comparator = build_comparator([
+        (datetime.combine(last_monday, datetime.min.time()).replace(hour=23), 10000.0),
+        (datetime(2026, 3, 10, 6), 10000.0),
+        (datetime(2026, 3, 11, 10), 10000.0),
+        (datetime(2026, 3, 11, 11), 10000.0),
+        (datetime(2026, 3, 12, 9), 10000.0)
+    ])
+    week = comparator.compare(NOW)["week"]
+    assert week["previous"]["start"] == "2026-03-09"
+    assert week["previous"]["end"] == "2026-03-11"
+    assert week["previous"]["orders"] == 3
+    assert week["previous_full"]["orders"] == 5
+    assert week["change"]["orders_pct"] == -100.0
+
+def test_no_trend_without_orders_yesterday():
+    # Driver baru: order pertama hari ini tidak boleh dibaca sebagai "Revenue naik"
+    comparison = build_comparator([(NOW.replace(hour=9), 30000.0)]).compare(NOW)
+    assert comparison["day"]["change"]["revenue_pct"] is None
+    metrics = AIFinanceAdvisor.extract_insight_metrics({
+        "summary": {"efficiency_ratio": 55},
+        "time_metrics": {"today_revenue": 30000.0},
+        "order_analytics": {},
+        "period_comparison": comparison,
+        "now": NOW
+    })
+    assert "revenue_trend" not in metrics
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test KLL quantile sketch dan OrderValueSketches
+"""
+
+import bisect
+import random
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.order_value_sketches import OrderValueSketches
+from app.utils.quantile_sketch import KLLSketch
+
+FRACTIONS = (0.5, 0.9, 0.99)
+
+def rank_errors(sketch, values):
+    ordered = sorted(values)
+    return [
+        abs(bisect.bisect_left(ordered, estimate) / len(ordered) - fraction)
+        for fraction, estimate in zip(FRACTIONS, sketch.quantiles(FRACTIONS))
+    ]
+
+def order_values(seed, count=50000):
+    rng = random.Random(seed)
+    return [round(rng.lognormvariate(10, 0.6)) for _ in range(count)]
+
+def test_rank_error_within_bound():
+    for seed in range(5):
+        values = order_values(seed)
+        sketch = KLLSketch(128, seed=seed)
+        for value in values:
+            sketch.update(value)
+        assert max(rank_errors(sketch, values)) <= 1.65 / 128
+        assert sketch.size <= sketch.max_size
+
+def test_merged_sketch_within_bound():
+    values = order_values(42)
+    parts = [KLLSketch(128, seed=i) for i in range(6)]
+    for i, value in enumerate(values):
+        parts[i % len(parts)].update(value)
+
+    merged = KLLSketch(128, seed=99)
+    for part in parts:
+        merged.merge(part)
+    assert merged.n == len(values)
+    assert max(rank_errors(merged, values)) <= 1.65 / 128
+
+def test_roundtrip_keeps_quantiles():
+    sketch = KLLSketch(64, seed=1)
+    for value in order_values(1, 5000):
+        sketch.update(value)
+    restored = KLLSketch.from_dict(sketch.to_dict())
+    assert restored.n == sketch.n
+    assert restored.quantiles(FRACTIONS) == sketch.quantiles(FRACTIONS)
+
+def test_merged_cache_invalidated_on_add():
+    sketches = OrderValueSketches(rollup_dir='unused')
+    record = {'total_order': 20000.0, 'order_type': 'Food', 'display_date': '2026-01-05'}
+    sketches.add(record)
+    first = sketches.merged()
+    assert sketches.merged() is first
+
+    sketches.add(dict(record, total_order=90000.0, display_date='2026-02-01'))
+    assert sketches.merged() is not first
+    assert sketches.merged().n == 2
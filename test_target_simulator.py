@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Test TargetSimulator: hari tanpa order ikut di-bootstrap
+"""
+
+import sys
+import os
+from datetime import date, timedelta
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.order_value_sketches import OrderValueSketches
+from app.services.rollup_store import RollupStore
+from app.services.target_simulator import TargetSimulator
+
+TODAY = date(2026, 3, 31)
+
+def build_simulator(active_offsets, orders_per_day=10):
+    rollups = RollupStore(rollup_dir='unused')
+    sketches = OrderValueSketches(rollup_dir='unused')
+    for offset in active_offsets:
+        for _ in range(orders_per_day):
+            record = {
+                'total_order': 20000.0, 'commission': 3000.0, 'saldo_savings': 2000.0,
+                'bbm_savings': 2000.0, 'oli_savings': 2000.0, 'net_income': 17000.0,
+                'usable_income': 11000.0, 'order_type': 'Food',
+                'display_date': (TODAY - timedelta(days=offset)).isoformat()
+            }
+            rollups.add(record)
+            sketches.add(record)
+    return TargetSimulator(rollups, sketches)
+
+def test_counts_include_idle_days_after_first_order():
+    simulator = build_simulator([1, 3, 6])
+    counts = simulator.daily_order_counts(TODAY, first_day=TODAY - timedelta(days=6))
+    assert counts == [10, 0, 10, 0, 0, 10]
+    assert len(simulator.daily_order_counts(TODAY)) == TargetSimulator.LOOKBACK_DAYS
+
+def test_idle_days_lower_probability():
+    # Kerja setiap hari: target 10 order/hari selalu tercapai. Kerja selang sehari: ~50%
+    daily = build_simulator(range(1, 31))
+    alternate = build_simulator(range(1, 31, 2))
+    results = []
+    for simulator in (daily, alternate):
+        first_day = TODAY - timedelta(days=30)
+        inputs = {"counts": simulator.daily_order_counts(TODAY, first_day)}
+        inputs["values"], inputs["weights"] = simulator.order_value_sketches.merged().weighted_items()
+        results.append(simulator.run(inputs, 110000, 70, 0.55, 2000))
+
+    assert results[0]["daily_income"]["probability"] == 1.0
+    assert results[0]["work_probability"] == 1.0
+    assert 0.4 < results[1]["daily_income"]["probability"] < 0.6
+    assert results[1]["work_probability"] == 0.5
+    assert results[1]["weekly_orders"]["expected"] < 40
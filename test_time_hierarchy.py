@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test persistensi TimeHierarchy: snapshot + journal append-only
+"""
+
+import os
+import random
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.time_hierarchy import TimeHierarchy
+
+def make_record(rng):
+    total = float(rng.randrange(5000, 150000, 500))
+    return {'display_date': f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            'total_order': total, 'net_income': total * 0.85, 'usable_income': total * 0.55}
+
+def append_rows(hierarchy, rng, count):
+    for _ in range(count):
+        record = None if rng.random() < 0.05 else make_record(rng)
+        hierarchy.add(hierarchy.row_count, hierarchy.row_count * 100, record)
+
+def test_restore_replays_journal(tmp_path):
+    state_file = str(tmp_path / 'hierarchy.json')
+    rng = random.Random(4)
+    live = TimeHierarchy(state_file)
+    append_rows(live, rng, 300)
+    live.flush({"size": 0})
+
+    for step in range(1, 40):
+        append_rows(live, rng, rng.randint(1, 5))
+        live.flush({"size": step})
+        assert live.journal_rows > 0
+    snapshot_size = os.path.getsize(state_file)
+
+    restored = TimeHierarchy(state_file)
+    assert restored.restore({"size": 39})
+    assert restored.row_count == live.row_count
+    assert restored.years == live.years
+    # Append tidak menulis ulang snapshot
+    assert os.path.getsize(state_file) == snapshot_size
+
+def test_stale_or_truncated_journal_rejected(tmp_path):
+    state_file = str(tmp_path / 'hierarchy.json')
+    rng = random.Random(8)
+    live = TimeHierarchy(state_file)
+    append_rows(live, rng, 50)
+    live.flush({"size": 0})
+    append_rows(live, rng, 3)
+    live.flush({"size": 1})
+
+    assert not TimeHierarchy(state_file).restore({"size": 2})
+    with open(live.journal_file, 'a') as file:
+        file.write('{"rows": [[53, 1')
+    assert not TimeHierarchy(state_file).restore({"size": 2})
+    assert TimeHierarchy(state_file).restore({"size": 1})
+
+def test_journal_compacted_into_snapshot(tmp_path):
+    state_file = str(tmp_path / 'hierarchy.json')
+    rng = random.Random(2)
+    live = TimeHierarchy(state_file)
+    live.flush({"size": 0})
+    for step in range(1, TimeHierarchy.COMPACT_MIN_ROWS + 2):
+        append_rows(live, rng, 1)
+        live.flush({"size": step})
+    assert live.journal_rows < TimeHierarchy.COMPACT_MIN_ROWS
+
+    restored = TimeHierarchy(state_file)
+    assert restored.restore({"size": TimeHierarchy.COMPACT_MIN_ROWS + 1})
+    assert restored.years == live.years
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test SortedSeries (prefix kumulatif) terhadap penjumlahan langsung
+"""
+
+import random
+from datetime import datetime, timedelta
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.time_index import SortedSeries, TimeIndex
+from app.services.hotspot_index import HotspotIndex
+
+def brute_force(rows, start, end):
+    selected = [row for row in rows if start <= row[0] < end]
+    return len(selected), sum(row[1] for row in selected), sum(row[3] for row in selected)
+
+def test_totals_match_brute_force_with_backfill_batches_and_removes():
+    rng = random.Random(11)
+    series = SortedSeries()
+    rows = []
+    clock = 1_700_000_000.0
+    for step in range(3000):
+        action = rng.random()
+        if rows and action < 0.15:
+            row = rows.pop(rng.randrange(len(rows)))
+            assert series.remove(*row)
+        elif action < 0.25:
+            batch = [(clock - rng.uniform(0, 5e6), float(rng.randrange(5000, 90000, 500)), 1.0, 2.0)
+                     for _ in range(rng.randint(1, 40))]
+            rows.extend(batch)
+            series.extend(batch)
+        else:
+            # Kebanyakan order baru di akhir, sebagian backfill
+            clock += rng.uniform(0, 3600)
+            epoch = clock if rng.random() < 0.8 else clock - rng.uniform(0, 5e6)
+            row = (epoch, float(rng.randrange(5000, 90000, 500)), 1.0, float(rng.randrange(100, 900)))
+            rows.append(row)
+            series.insert(*row)
+
+        if step % 25 == 0:
+            start = clock - rng.uniform(0, 6e6)
+            end = start + rng.uniform(0, 3e6)
+            orders, revenue, usable = brute_force(rows, start, end)
+            totals = series.totals(start, end)
+            assert totals["orders"] == orders
+            assert abs(totals["revenue"] - revenue) < 1e-3
+            assert abs(totals["usable_income"] - usable) < 1e-3
+
+    assert len(series) == len(rows)
+    assert not series.remove(-1.0, 0.0, 0.0, 0.0)
+
+def make_record(rng, moment):
+    total = float(rng.randrange(5000, 90000, 500))
+    return {
+        'timestamp': moment.strftime('%Y-%m-%d %H:%M:%S'),
+        'display_date': moment.strftime('%Y-%m-%d'),
+        'order_type': rng.choice(['food', 'bike', 'send']),
+        'total_order': total,
+        'net_income': total * 0.85,
+        'usable_income': total * 0.55
+    }
+
+def series_rows(index):
+    for series in index.named_series().values():
+        series.merge_pending()
+    return {name: list(zip(series.epochs, series.values["revenue"]))
+            for name, series in index.named_series().items()}
+
+def test_flush_writes_tail_and_restore_matches_live_state(tmp_path):
+    rng = random.Random(5)
+    origin = datetime(2025, 6, 1, 8)
+    signature = {"size": 1, "mtime_ns": 1}
+    index = TimeIndex(rollup_dir=str(tmp_path))
+    records = [make_record(rng, origin + timedelta(minutes=rng.randrange(0, 90 * 24 * 60))) for _ in range(500)]
+    index.add_batch(records)
+    index.flush(signature)
+
+    # Order baru, backfill, dan hapus setelah flush pertama
+    for step in range(60):
+        record = make_record(rng, origin + timedelta(days=90, minutes=step * 7))
+        records.append(record)
+        index.add(record)
+    backfill = make_record(rng, origin + timedelta(days=3))
+    records.append(backfill)
+    index.add(backfill)
+    index.remove(records.pop(10))
+    signature = {"size": 2, "mtime_ns": 2}
+    index.flush(signature)
+
+    restored = TimeIndex(rollup_dir=str(tmp_path))
+    assert not restored.restore({"size": 3, "mtime_ns": 3})
+    assert restored.restore(signature)
+    assert series_rows(restored) == series_rows(index)
+    assert restored.all.totals(0.0, 4e9) == index.all.totals(0.0, 4e9)
+
+    rebuilt = TimeIndex()
+    rebuilt.add_batch(records)
+    assert series_rows(restored) == series_rows(rebuilt)
+
+    # Hotspot dibangun ulang dari seri TimeIndex yang sudah dimuat
+    hotspots = HotspotIndex(str(tmp_path), index)
+    for record in records:
+        hotspots.add(record)
+    hotspots.flush(signature)
+    restored_hotspots = HotspotIndex(str(tmp_path), restored)
+    assert restored_hotspots.restore(signature)
+    assert restored_hotspots.events == hotspots.events
+    assert restored_hotspots.matrices == hotspots.matrices